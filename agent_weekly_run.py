@@ -6,6 +6,8 @@
 # import traceback 
 # from preprocess import build_model_input
 # from optimiser import solve_week
+# from history import record_run
+# from registry import register_run
 
 
 # #✉️ set up 
@@ -46,6 +48,10 @@
 #         output_path = "results/weekly_plan.csv"
 #         os.makedirs("results", exist_ok= True)
 #         plan.to_csv(output_path, index = False)
+
+#         #keep the run in the history and the run registry
+#         run_id = record_run("data/forests.csv", "data/trucks.csv", plan, season = "dry")
+#         register_run("data/forests.csv", "data/trucks.csv", plan, "dry", "agent", run_id = run_id)
         
 #         #send the report 
 #         send_email(
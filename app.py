@@ -2,16 +2,14 @@
 #another new one 
 import streamlit as st
 import pandas as pd
-from preprocess import build_model_input
-from optimiser import solve_week
+from preprocess import read_trucks
+from solve_cache import cached_solve
+from scheduler import schedule_trips
+from report_writer import results_workbook
 import helper_maxflow
-import tempfile
-import time
-from collections import defaultdict
-import io
-import openpyxl
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from history import record_run
+from registry import recent_runs, register_run, weekly_trend
+from perf import recording, stage_table
 
 # --- Custom ARISE Theme CSS ---
 st.markdown("""
@@ -104,53 +102,57 @@ st.image("arise_logo.png", width=180)
 # --- Ship/Boat Emoji Animation ---
 ship_emojis = ["🎄"]
 
-st.set_page_config(page_title="Truck Forest Allocation Optimizer", layout="wide")
-st.title("🪵Truck Forest Allocation Optimizer")
-st.markdown("<span style='font-size:1.2em; color:#90caf9; font-weight:500;'>Optimize truck allocations for maximum CBM collection from forests to NKOK, Libreville</span>", unsafe_allow_html=True)
-
-# --- Inputs ---
-col1, col2, col3 = st.columns(3)
-with col1:
-    forests_file = st.file_uploader("Upload Forests CSV", type="csv")
-with col2:
-    trucks_file = st.file_uploader("Upload Trucks CSV", type="csv")
-with col3:
-    season = st.selectbox("Season", ["dry", "rain"])
+SAMPLE_FORESTS_CSV = "data/forests.csv"
+SAMPLE_TRUCKS_CSV = "data/trucks.csv"
 
-# --- User input for cost per CBM ---
-# (No longer needed, cost is not used)
-
-if forests_file and trucks_file:
-    # --- Animated Title While Loading ---
-    title_placeholder = st.empty()
-    start_time = time.time()
-    for i in range(12):  # ~1.2s animation (adjust as needed)
-        title_placeholder.title(f"{ship_emojis[i % len(ship_emojis)]} Truck Forest Allocation Optimizer")
-        time.sleep(0.1)
-    # Save uploaded files to temp files for pipeline compatibility
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as f1, \
-         tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as f2:
-        f1.write(forests_file.getbuffer())
-        f2.write(trucks_file.getbuffer())
-        forests_path = f1.name
-        trucks_path = f2.name
-
-    # Build model input
-    df = build_model_input(forests_csv=forests_path, trucks_csv=trucks_path, season=season)
-
-    # Run optimizer (maximize profit)
-    plan = solve_week(df, maximize_profit=True)
-    elapsed = time.time() - start_time
-    # Show final emoji after loading
-    title_placeholder.title(f"{ship_emojis[int(time.time()) % len(ship_emojis)]} Truck Forest Allocation Optimizer")
 
+# --- Pipeline stages ---
+# Everything below is memoized on the uploaded bytes and the season, so a
+# rerun caused by a widget (download button, expander, ...) only redraws.
+@st.cache_data(show_spinner=False, max_entries=16)
+def solve_uploads(forests_bytes, trucks_bytes, season):
+    # Build model input and run optimizer (maximize profit), reusing the
+    # cached plan when the same files and season were solved before
+    df, plan = cached_solve(forests_bytes, trucks_bytes, season=season, maximize_profit=True)
+    pairs = df.loc[pd.MultiIndex.from_frame(plan[["truck_id", "forest_id"]])]
     # Ensure 'hours_used' exists in plan
     if 'hours_used' not in plan.columns:
-        plan['hours_used'] = plan.apply(lambda row: row['trips_planned'] * df.loc[(row['truck_id'], row['forest_id']), 'trip_hours'], axis=1)
-
+        plan['hours_used'] = plan['trips_planned'].to_numpy() * pairs['trip_hours'].to_numpy()
     # Ensure 'profit' column exists in plan
     if 'profit' not in plan.columns:
-        plan['profit'] = plan.apply(lambda row: row['trips_planned'] * df.loc[(row['truck_id'], row['forest_id']), 'cbm_per_truck'] * df.loc[(row['truck_id'], row['forest_id']), 'profit_per_cbm_euros'], axis=1)
+        plan['profit'] = (plan['trips_planned'].to_numpy() * pairs['cbm_per_truck'].to_numpy()
+                          * pairs['profit_per_cbm_euros'].to_numpy())
+    return df, plan
+
+
+# --- Function to generate daily forest-truck plan DataFrame from plan DataFrame ---
+def generate_daily_forest_plan(plan_df, df):
+    # Pack each truck's trips into 10.5 h driving days using the real trip hours
+    schedule = schedule_trips(plan_df, df)
+    # Sort by day, then forest_id, then truck_id (without total_trips_for_truck)
+    daily_forest_plan_df = schedule.sort_values(['day', 'forest_id', 'truck_id'], kind='stable')[[
+        'day', 'forest_id', 'truck_id', 'trip_number', 'cbm_per_truck', 'profit', 'end_day', 'trip_hours']]
+    return daily_forest_plan_df.reset_index(drop=True)
+
+
+# --- Generate grouped daily forest-truck summary for Excel ---
+def generate_grouped_daily_plan(daily_forest_plan):
+    grouped = {}
+    for day, day_df in daily_forest_plan.groupby('day'):
+        day_df_sorted = day_df.sort_values(['forest_id', 'truck_id'])
+        rows = []
+        for forest, forest_df in day_df_sorted.groupby('forest_id'):
+            truck_ids_list = [str(tid) for tid in forest_df['truck_id'].tolist()]
+            truck_ids = ', '.join(truck_ids_list)
+            total_trucks = len(truck_ids_list)
+            rows.append({'Forest': forest, 'Truck IDs': truck_ids, 'Total Trucks': total_trucks})
+        grouped[int(day)] = rows
+    return grouped
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def plan_results(forests_bytes, trucks_bytes, season):
+    df, plan = solve_uploads(forests_bytes, trucks_bytes, season)
 
     # --- After plan is created, compute per-forest volumes and remaining_by_forest ---
     forest_volumes = df.reset_index().drop_duplicates("forest_id").set_index("forest_id")["weekly_stockpile_cbm"]
@@ -183,11 +185,9 @@ if forests_file and trucks_file:
     allocations = allocations.merge(truck_lists, on="Forest", how="left")
     if "Trucks Assigned" in allocations.columns:
         allocations["Trucks Assigned"] = allocations["Trucks Assigned"].fillna("")
-    # Partially harvested forests
-    partials = allocations[allocations["Remaining"] > 0]
 
     # --- Max-flow (full trips) ---
-    trucks = pd.read_csv(trucks_path)
+    trucks = read_trucks(trucks_bytes)
     assigned_trucks = set(plan["truck_id"].astype(str))
     unassigned = trucks[~trucks["truck_id"].astype(str).isin(assigned_trucks)]
     idle_df = unassigned.copy()
@@ -207,16 +207,29 @@ if forests_file and trucks_file:
     forests_df = forests_df.rename(columns={"trip_hours": "turnaround_time"})
     forests_df["volume_left"] = forests_df["forest_id"].map(remaining_by_forest)
     forests_df["profit_per_trip"] = forests_df["cbm_per_truck"] * forests_df["profit_per_cbm_euros"]
-    # Pass profit_per_trip to helper_maxflow
-    extra_assignments = helper_maxflow.top_up_with_flow(idle_df, forests_df)
-    half_assignments = helper_maxflow.half_trip_maxflow(idle_df, forests_df)
-    half_cbm = sum(a["cbm_collected"] for a in half_assignments) if half_assignments else 0
+    # Full and half trips for the idle trucks in one max-flow solve, sharing
+    # the leftover volume (kind = "full" / "half")
+    top_up_assignments = helper_maxflow.top_up(idle_df, forests_df, eligible=df.index)
+
+    top_up_plan = None
+    if top_up_assignments:
+        top_up_plan = pd.DataFrame(top_up_assignments)
+        # Map profit_per_cbm_euros from forests_df
+        profit_cbm_map = forests_df.set_index('forest_id')['profit_per_cbm_euros'].to_dict()
+        top_up_plan['profit_per_cbm_euros'] = top_up_plan['forest_id'].map(profit_cbm_map)
+        # A half trip still brings back a full load
+        top_up_plan['profit'] = top_up_plan['cbm_collected'] * top_up_plan['profit_per_cbm_euros']
+
+    # Each newly solved week goes into the Parquet history (see history.py)
+    # and the run registry (see registry.py)
+    run_id = record_run(forests_bytes, trucks_bytes, plan, top_up_plan, season=season)
+    register_run(forests_bytes, trucks_bytes, plan, season, "app", top_up_plan, run_id=run_id)
 
     # --- Compute summary statistics for the summary dictionary (move this up) ---
     total_cbm = (plan['trips_planned'] * plan['cbm_per_truck']).sum()
     total_trips = plan['trips_planned'].sum()
     trucks_used = plan['truck_id'].nunique()
-    trucks_total = pd.read_csv(trucks_path)['truck_id'].nunique()
+    trucks_total = trucks['truck_id'].nunique()
     trucks_unused = trucks_total - trucks_used
     # Only profit from full trips (main plan)
     total_profit_full_trips = allocations['Profit'].sum()
@@ -228,10 +241,93 @@ if forests_file and trucks_file:
         "Total Profit Euros": total_profit_full_trips,
     }
 
+    # --- Add truck trip breakdown and total trips per forest ---
+    truck_trip_breakdown = plan.groupby('forest_id').apply(
+        lambda df_: ', '.join([f"Truck {int(row['truck_id'])}: {int(row['trips_planned'])}" for _, row in df_.iterrows()])
+    ).reset_index().rename(columns={0: 'Truck Trip Breakdown', 'forest_id': 'Forest'})
+    total_trips_per_forest = plan.groupby('forest_id')['trips_planned'].sum().reset_index().rename(columns={'forest_id': 'Forest', 'trips_planned': 'Total Trips'})
+    breakdown_table = truck_trip_breakdown.merge(total_trips_per_forest, on='Forest', how='left')
+
+    # --- Generate daily forest-truck plan from plan DataFrame ---
+    daily_forest_plan = generate_daily_forest_plan(plan, df)
+    grouped_daily_plan = generate_grouped_daily_plan(daily_forest_plan)
+
+    # --- Add total trucks column to allocations ---
+    if 'Trucks Assigned' in allocations.columns:
+        allocations['Total Trucks'] = allocations['Trucks Assigned'].apply(lambda x: len([t for t in str(x).split(',') if t.strip()]))
+    else:
+        allocations['Total Trucks'] = 0
+
+    return {
+        "summary": summary,
+        "unassigned": unassigned,
+        "top_up_plan": top_up_plan,
+        "allocations": allocations,
+        "breakdown_table": breakdown_table,
+        "daily_forest_plan": daily_forest_plan,
+        "grouped_daily_plan": grouped_daily_plan,
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def excel_report(forests_bytes, trucks_bytes, season):
+    results = plan_results(forests_bytes, trucks_bytes, season)
+    allocations = results["allocations"]
+    grouped_daily_plan = results["grouped_daily_plan"]
+    # Write-only workbook with shared named styles (see report_writer.py)
+    excel_data = results_workbook(allocations, grouped_daily_plan)
+    return excel_data
+
+
+st.set_page_config(page_title="Truck Forest Allocation Optimizer", layout="wide")
+st.title("🪵Truck Forest Allocation Optimizer")
+st.markdown("<span style='font-size:1.2em; color:#90caf9; font-weight:500;'>Optimize truck allocations for maximum CBM collection from forests to NKOK, Libreville</span>", unsafe_allow_html=True)
+
+# --- Inputs ---
+col1, col2, col3 = st.columns(3)
+with col1:
+    forests_file = st.file_uploader("Upload Forests CSV", type="csv")
+with col2:
+    trucks_file = st.file_uploader("Upload Trucks CSV", type="csv")
+with col3:
+    season = st.selectbox("Season", ["dry", "rain"])
+use_sample = st.checkbox("Use the sample CSVs from the data folder")
+
+# --- User input for cost per CBM ---
+# (No longer needed, cost is not used)
+
+# Uploads are read straight from memory, no temp files
+if forests_file and trucks_file:
+    forests_bytes, trucks_bytes = forests_file.getvalue(), trucks_file.getvalue()
+elif use_sample:
+    with open(SAMPLE_FORESTS_CSV, "rb") as f1, open(SAMPLE_TRUCKS_CSV, "rb") as f2:
+        forests_bytes, trucks_bytes = f1.read(), f2.read()
+else:
+    forests_bytes = trucks_bytes = None
+
+if forests_bytes and trucks_bytes:
+    st.title(f"{ship_emojis[0]} Truck Forest Allocation Optimizer")
+    # Spinner only shows while something is actually being computed
+    with st.spinner("Optimising truck allocations..."):
+        # Stage timings of whatever is actually recomputed (see perf.py)
+        with recording() as perf_log:
+            results = plan_results(forests_bytes, trucks_bytes, season)
+            excel_data = excel_report(forests_bytes, trucks_bytes, season)
+    if perf_log.spans:
+        perf_log.write()
+        st.session_state["perf_log"] = perf_log
+    summary = results["summary"]
+    unassigned = results["unassigned"]
+    top_up_plan = results["top_up_plan"]
+    allocations = results["allocations"]
+    breakdown_table = results["breakdown_table"]
+    daily_forest_plan = results["daily_forest_plan"]
+    total_profit_full_trips = summary["Total Profit Euros"]
+
     # --- Output: Summary Statistics ---
     st.subheader("📊 Summary Statistics")
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Total CBM", f"{summary['Total CBM']:,}")
+    col1.metric("Total CBM", f"{summary['Total CBM']:,.0f}")
     col2.metric("Total Trips", f"{summary['Total Trips']:,}")
     col3.metric("Trucks Used", f"{summary['Trucks Used']:,}")
     col4.metric("Trucks Unused", f"{summary['Trucks Unused']:,}")
@@ -242,51 +338,33 @@ if forests_file and trucks_file:
     if not unassigned.empty:
         st.subheader("🚚 Unused Trucks")
         st.dataframe(unassigned[["truck_id", "type"]], use_container_width=True)
-        unused_csv = unassigned[["truck_id", "type"]].to_csv(index=False).encode('utf-8')
         # st.download_button(
         #     label="Download Unused Trucks as CSV",
-        #     data=unused_csv,
+        #     data=unassigned[["truck_id", "type"]].to_csv(index=False).encode('utf-8'),
         #     file_name="unused_trucks.csv",
         #     mime="text/csv",
         # )
 
     
-    # --- Show half-trip max-flow assignments in the UI (moved here) ---
-    if half_assignments:
-        half_plan = pd.DataFrame(half_assignments)
-        if 'cbm_collected' in half_plan.columns:
-            half_plan = half_plan.drop(columns=['cbm_collected'])
-        st.subheader("½ Extra Assignments from Max-Flow (Half Trips)")
-        st.write("If you'd like to push more volume then you can do 1/2 trips with the remaining trucks, and here's the breakdown:")
-        # Assign cbm_per_truck based on truck_id (MAN: 1-32 = 45, Shacman: 33-91 = 55)
-        def assign_cbm(truck_id):
-            tid = int(truck_id)
-            return 45 if 1 <= tid <= 32 else 55
-        half_plan['cbm_per_truck'] = half_plan['truck_id'].apply(assign_cbm)
-        # Map profit_per_cbm_euros from forests_df
-        profit_cbm_map = forests_df.set_index('forest_id')['profit_per_cbm_euros'].to_dict()
-        half_plan['profit_per_cbm_euros'] = half_plan['forest_id'].map(profit_cbm_map)
-        # Calculate profit for each assignment as cbm_per_truck * profit_per_cbm_euros
-        half_plan['profit'] = half_plan['cbm_per_truck'] * half_plan['profit_per_cbm_euros']
-        st.dataframe(half_plan, use_container_width=True)
-        st.write(f"<b>Extra CBM from max-flow half trips:</b> <b>{half_plan['cbm_per_truck'].sum():,.0f} m³</b>", unsafe_allow_html=True)
-        total_half_trip_profit = half_plan['profit'].sum()
-        st.write(f"<b>Profit from half trips (full load per assignment):</b> <b>€ {total_half_trip_profit:,.0f}</b>", unsafe_allow_html=True)
-        st.write(f"<b>Total profit (full trips + half trips):</b> <b>€ {total_profit_full_trips + total_half_trip_profit:,.0f}</b>", unsafe_allow_html=True)
+    # --- Show max-flow top-up assignments (full and half trips) in the UI ---
+    if top_up_plan is not None:
+        st.subheader("½ Extra Assignments from Max-Flow (Full and Half Trips)")
+        st.write("If you'd like to push more volume then the remaining trucks can do these extra trips ('kind' says full or 1/2 trip), and here's the breakdown:")
+        st.dataframe(top_up_plan, use_container_width=True)
+        for kind, label in (("full", "full trips"), ("half", "half trips")):
+            kind_plan = top_up_plan[top_up_plan['kind'] == kind]
+            if not kind_plan.empty:
+                st.write(f"<b>Extra CBM from max-flow {label}:</b> <b>{kind_plan['cbm_collected'].sum():,.0f} m³</b> "
+                         f"(€ {kind_plan['profit'].sum():,.0f})", unsafe_allow_html=True)
+        total_top_up_profit = top_up_plan['profit'].sum()
+        st.write(f"<b>Total profit (planned trips + max-flow trips):</b> <b>€ {total_profit_full_trips + total_top_up_profit:,.0f}</b>", unsafe_allow_html=True)
     else:
-        st.info("No additional assignments could be made in the half-trip max-flow phase.")
+        st.info("No additional assignments could be made in the max-flow phase.")
 
     st.markdown("<br>", unsafe_allow_html=True)
     # --- Output: Forest Allocations ---
     st.subheader("🌲 Forest Allocations")
-    st.dataframe(allocations, use_container_width=True)
-
-    # --- Add truck trip breakdown and total trips per forest ---
-    truck_trip_breakdown = plan.groupby('forest_id').apply(
-        lambda df_: ', '.join([f"Truck {int(row['truck_id'])}: {int(row['trips_planned'])}" for _, row in df_.iterrows()])
-    ).reset_index().rename(columns={0: 'Truck Trip Breakdown', 'forest_id': 'Forest'})
-    total_trips_per_forest = plan.groupby('forest_id')['trips_planned'].sum().reset_index().rename(columns={'forest_id': 'Forest', 'trips_planned': 'Total Trips'})
-    breakdown_table = truck_trip_breakdown.merge(total_trips_per_forest, on='Forest', how='left')
+    st.dataframe(allocations.drop(columns=["Total Trucks"]), use_container_width=True)
 
     # --- Per-Forest Truck Trip Breakdown (HTML table with wrapping, no container) ---
     st.subheader(" Per-Forest Truck Trip Breakdown")
@@ -317,49 +395,6 @@ if forests_file and trucks_file:
     # )
 
     st.markdown("<br><br>", unsafe_allow_html=True)
-    # --- Function to generate daily forest-truck plan DataFrame from plan DataFrame ---
-    def generate_daily_forest_plan(plan_df):
-        trips_by_truck = defaultdict(list)
-        for _, row in plan_df.iterrows():
-            truck_id = str(row['truck_id']).strip()
-            forest_id = str(row['forest_id']).strip()
-            trips_planned = int(row['trips_planned'])
-            cbm_per_truck = row['cbm_per_truck']
-            profit = row['profit']
-            trips_by_truck[truck_id].append({
-                'forest_id': forest_id,
-                'trips_planned': trips_planned,
-                'cbm_per_truck': cbm_per_truck,
-                'profit': profit
-            })
-        expanded_trips = []
-        for truck_id, trips in trips_by_truck.items():
-            total_trips = sum(trip['trips_planned'] for trip in trips)
-            for trip in trips:
-                for i in range(trip['trips_planned']):
-                    expanded_trips.append({
-                        'truck_id': truck_id,
-                        'forest_id': trip['forest_id'],
-                        'cbm_per_truck': trip['cbm_per_truck'],
-                        'profit': trip['profit'],
-                    })
-        expanded_trips.sort(key=lambda x: int(x['truck_id']))
-        trip_counters = defaultdict(int)
-        for trip in expanded_trips:
-            truck_id = trip['truck_id']
-            trip_counters[truck_id] += 1
-            trip['trip_number'] = trip_counters[truck_id]
-            trip['day'] = trip_counters[truck_id]
-        # Sort by day, then forest_id, then truck_id
-        sorted_trips = sorted(expanded_trips, key=lambda x: (int(x['day']), str(x['forest_id']), int(x['truck_id'])))
-        # Build DataFrame (without total_trips_for_truck)
-        daily_forest_plan_df = pd.DataFrame(sorted_trips)[[
-            'day', 'forest_id', 'truck_id', 'trip_number', 'cbm_per_truck', 'profit']]
-        return daily_forest_plan_df
-
-    # --- Generate daily forest-truck plan from plan DataFrame ---
-    daily_forest_plan = generate_daily_forest_plan(plan)
-
     # --- Daily Forest-Truck Assignment Schedule (Grouped) ---
     st.subheader("🗓️ Daily Forest-Truck Assignment Schedule (Grouped)")
     try:
@@ -374,148 +409,38 @@ if forests_file and trucks_file:
     except Exception as e:
         st.warning(f"Could not generate grouped daily forest-truck schedule: {e}")
 
-    # --- Add total trucks column to allocations ---
-    if 'Trucks Assigned' in allocations.columns:
-        allocations['Total Trucks'] = allocations['Trucks Assigned'].apply(lambda x: len([t for t in str(x).split(',') if t.strip()]))
-    else:
-        allocations['Total Trucks'] = 0
-
-    # --- Generate grouped daily forest-truck summary for Excel ---
-    def generate_grouped_daily_plan(daily_forest_plan):
-        grouped = {}
-        for day, day_df in daily_forest_plan.groupby('day'):
-            day_df_sorted = day_df.sort_values(['forest_id', 'truck_id'])
-            rows = []
-            for forest, forest_df in day_df_sorted.groupby('forest_id'):
-                truck_ids_list = [str(tid) for tid in forest_df['truck_id'].tolist()]
-                truck_ids = ', '.join(truck_ids_list)
-                total_trucks = len(truck_ids_list)
-                rows.append({'Forest': forest, 'Truck IDs': truck_ids, 'Total Trucks': total_trucks})
-            grouped[int(day)] = rows
-        return grouped
-
-    grouped_daily_plan = generate_grouped_daily_plan(daily_forest_plan)
-
-    with io.BytesIO() as buffer:
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            # Write Forest Allocations as usual, now with Total Trucks
-            allocations.to_excel(writer, sheet_name='Forest Allocations', index=False)
-            ws_alloc = writer.book['Forest Allocations']
-            # Format Forest Allocations: text wrap, ample sizing, header color, borders
-            header_fill = PatternFill(start_color="B7E1CD", end_color="B7E1CD", fill_type="solid")
-            header_font = Font(bold=True)
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            # Header row
-            for cell in ws_alloc[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
-            # Data rows: wrap, center, borders
-            for row in ws_alloc.iter_rows(min_row=2, max_row=ws_alloc.max_row, min_col=1, max_col=ws_alloc.max_column):
-                for cell in row:
-                    cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
-                    cell.border = border
-            # Zebra striping for data rows (alternate light blue and white)
-            light_blue_fill = PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid")
-            for row_idx in range(2, ws_alloc.max_row + 1):
-                if (row_idx - 1) % 2 == 1:
-                    for cell in ws_alloc[row_idx]:
-                        cell.fill = light_blue_fill
-            # Column widths: set min width for key columns, auto-fit others, then add extra space
-            col_map = {name: idx+1 for idx, name in enumerate(allocations.columns)}
-            min_widths = {'Forest': 24, 'Profit': 18, 'Efficiency (CBM/hr)': 18, 'Trucks Assigned': 28, 'Total Trucks': 14}
-            for col_name, min_w in min_widths.items():
-                if col_name in col_map:
-                    col_letter = ws_alloc.cell(row=1, column=col_map[col_name]).column_letter
-                    ws_alloc.column_dimensions[col_letter].width = min_w
-            for col in ws_alloc.columns:
-                max_length = 0
-                col_letter = col[0].column_letter
-                for cell in col:
-                    try:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-                if ws_alloc.column_dimensions[col_letter].width < max_length + 4:
-                    ws_alloc.column_dimensions[col_letter].width = min(max_length + 4, 40)
-                # Add extra width for breathing room
-                ws_alloc.column_dimensions[col_letter].width += 7
-            # Row heights: set all to 72 for maximum readability
-            for row_idx in range(1, ws_alloc.max_row + 1):
-                ws_alloc.row_dimensions[row_idx].height = 72
-
-            # Set font size 16 for all cells in Forest Allocations
-            for row in ws_alloc.iter_rows(min_row=1, max_row=ws_alloc.max_row, min_col=1, max_col=ws_alloc.max_column):
-                for cell in row:
-                    cell.font = Font(size=16, bold=cell.font.bold)
-
-            # --- Write grouped daily plan as separate tables for each day ---
-            ws = writer.book.create_sheet('Daily Forest-Truck Plan')
-            start_row = 1
-            for day in sorted(grouped_daily_plan.keys()):
-                # Day label
-                ws.cell(row=start_row, column=1, value=f"Day {day}")
-                ws.cell(row=start_row, column=1).font = Font(bold=True, size=16)
-                start_row += 1
-                # Header
-                ws.cell(row=start_row, column=1, value="Forest")
-                ws.cell(row=start_row, column=2, value="Truck IDs")
-                ws.cell(row=start_row, column=3, value="Total Trucks")
-                for col in range(1, 4):
-                    cell = ws.cell(row=start_row, column=col)
-                    cell.fill = header_fill
-                    cell.font = Font(size=16, bold=True)
-                    cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
-                header_row = start_row
-                start_row += 1
-                # Table rows
-                for row in grouped_daily_plan[day]:
-                    ws.cell(row=start_row, column=1, value=row['Forest'])
-                    ws.cell(row=start_row, column=2, value=row['Truck IDs'])
-                    ws.cell(row=start_row, column=3, value=row['Total Trucks'])
-                    for col in range(1, 4):
-                        cell = ws.cell(row=start_row, column=col)
-                        cell.font = Font(size=16)
-                        cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
-                        cell.border = border
-                    start_row += 1
-                # Box up the day's table
-                end_row = start_row - 1
-                for r in range(header_row, end_row + 1):
-                    for c in range(1, 4):
-                        ws.cell(row=r, column=c).border = border
-                # Add an empty row between days
-                start_row += 1
-            # Adjust column widths for grouped daily plan, add extra space
-            for col in ws.columns:
-                max_length = 0
-                col_letter = col[0].column_letter
-                for cell in col:
-                    try:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-                ws.column_dimensions[col_letter].width = min(max_length + 4, 40) + 7
-            # Row heights for grouped daily plan: set all to 72
-            for row_idx in range(1, ws.max_row + 1):
-                ws.row_dimensions[row_idx].height = 72
-
-        excel_data = buffer.getvalue()
     st.download_button(
         label="Download All Results as Excel (.xlsx)",
         data=excel_data,
         file_name="arise_trucking_results.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
+
+    # --- Performance: where the time went when the results were last computed ---
+    with st.expander("⏱️ Performance"):
+        last_log = st.session_state.get("perf_log")
+        if last_log is None:
+            st.write("These results came from the cache; nothing was recomputed in this session.")
+        else:
+            st.write(f"Stages computed at {last_log.recorded_at} (reruns since then reused the cached results). "
+                     "Times in seconds, memory in MB; every run is also appended to perf_log.jsonl.")
+            st.dataframe(stage_table(last_log), use_container_width=True, hide_index=True)
 else:
     st.title(f"{ship_emojis[0]} Truck Forest Allocation Optimizer")
     st.markdown("<span style='font-size:1.1em; color:#111; font-weight:500; background:transparent; display:block;'>Please upload both CSV files and select a season.</span>", unsafe_allow_html=True) 
+
+# --- History: past runs from the run registry ---
+with st.expander("📈 History"):
+    history_weeks = st.slider("Weeks", min_value=4, max_value=104, value=12, step=4)
+    trend = weekly_trend(season, history_weeks)
+    if trend.empty:
+        st.info(f"No {season} season runs recorded yet.")
+    else:
+        trend = trend.set_index("week")
+        st.write(f"Latest run of each of the last {len(trend)} {season} season weeks")
+        st.line_chart(trend[["total_cbm", "top_up_cbm"]])
+        st.line_chart(trend[["total_profit"]])
+        st.bar_chart(trend[["trucks_used", "trucks_unused"]])
+        st.dataframe(recent_runs(), use_container_width=True)
     
-#random comment 
\ No newline at end of file
+#random comment
@@ -0,0 +1,50 @@
+"""
+Per-truck vs truck-class aggregated solve_week as the fleet grows.
+
+    python -m benchmarks.bench_aggregate
+    python -m benchmarks.bench_aggregate --sizes 91x17 1000x17 3000x17 --season dry
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+from optimiser import solve_week
+from preprocess import build_model_input
+from benchmarks.synthetic import write_csvs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["91x17", "300x17", "1000x17", "3000x17"],
+                    help="TRUCKSxFORESTS; 91x17 uses the real data/ CSVs")
+    ap.add_argument("--season", choices=["dry", "rain"], default="rain")
+    ap.add_argument("--backend", choices=["cbc", "cpsat"], default="cbc")
+    args = ap.parse_args()
+
+    print(f"{'size':>8} {'model':>10} {'vars':>7} {'status':>9} {'total s':>8} "
+          f"{'objective':>12} {'gap':>7}")
+    for size in args.sizes:
+        n_trucks, n_forests = (int(v) for v in size.split("x"))
+        with tempfile.TemporaryDirectory() as tmp:
+            if size == "91x17":
+                df = build_model_input(season=args.season)
+            else:
+                df = build_model_input(*write_csvs(tmp, n_trucks, n_forests), season=args.season)
+
+        for aggregate in (False, True):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                plan = solve_week(df, maximize_profit=True, backend=args.backend,
+                                  aggregate=aggregate)
+            total = time.perf_counter() - start
+            s = plan.attrs["solve_stats"]
+            label = f"{s['n_classes']} classes" if aggregate else "per truck"
+            print(f"{size:>8} {label:>10} {s['n_vars']:>7,} {s['status']:>9} {total:8.2f} "
+                  f"{s['objective']:12,.1f} {s['gap']:7.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Streamlit rerun latency of app.py, driven headless through AppTest with the
+sample CSVs. The first run of each season pays for the solve, max-flow and
+Excel report; every later rerun for the same input should only redraw.
+
+    python -m benchmarks.bench_app_rerun
+    python -m benchmarks.bench_app_rerun --reruns 10
+"""
+
+import argparse
+import tempfile
+import time
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import solve_cache
+
+
+def timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reruns", type=int, default=5)
+    ap.add_argument("--timeout", type=float, default=120)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # AppTest runs the script in this process, so a fresh solve cache
+        # and an empty st.cache_data make the first run genuinely cold
+        solve_cache._default_cache = solve_cache.SolveCache(tmp)
+        st.cache_data.clear()
+
+        at = AppTest.from_file("app.py", default_timeout=args.timeout)
+        print(f"{'step':>28} {'seconds':>8}")
+        print(f"{'landing page':>28} {timed_run(at):8.3f}")
+        at.checkbox[0].check()
+        print(f"{'first run, dry (cold)':>28} {timed_run(at):8.3f}")
+        reruns = [timed_run(at) for _ in range(args.reruns)]
+        print(f"{'rerun, dry (best of %d)' % args.reruns:>28} {min(reruns):8.3f}")
+        at.selectbox[0].select("rain")
+        print(f"{'switch to rain (cold)':>28} {timed_run(at):8.3f}")
+        at.selectbox[0].select("dry")
+        print(f"{'switch back to dry':>28} {timed_run(at):8.3f}")
+
+
+if __name__ == "__main__":
+    main()
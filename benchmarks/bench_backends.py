@@ -0,0 +1,48 @@
+"""
+Solve the same weekly model with each solve_week backend and report wall
+time, objective, best bound and relative gap.
+
+    python -m benchmarks.bench_backends
+    python -m benchmarks.bench_backends --sizes 91x17 300x60 --workers 8
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+
+from optimiser import solve_week
+from preprocess import build_model_input
+from benchmarks.synthetic import write_csvs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["91x17", "300x60"],
+                    help="TRUCKSxFORESTS; 91x17 uses the real data/ CSVs")
+    ap.add_argument("--season", choices=["dry", "rain"], default="rain")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="CP-SAT workers (default: one per core)")
+    args = ap.parse_args()
+
+    print(f"{'size':>8} {'backend':>8} {'status':>9} {'wall s':>7} {'objective':>12} {'bound':>12} {'gap':>7}")
+    for size in args.sizes:
+        n_trucks, n_forests = (int(v) for v in size.split("x"))
+        with tempfile.TemporaryDirectory() as tmp:
+            if size == "91x17":
+                df = build_model_input(season=args.season)
+            else:
+                forests_csv, trucks_csv = write_csvs(tmp, n_trucks, n_forests)
+                df = build_model_input(forests_csv, trucks_csv, season=args.season)
+
+        for backend in ("cbc", "cpsat"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                plan = solve_week(df, maximize_profit=True, backend=backend,
+                                  num_workers=args.workers)
+            s = plan.attrs["solve_stats"]
+            print(f"{size:>8} {backend:>8} {s['status']:>9} {s['wall_time']:7.2f} "
+                  f"{s['objective']:12,.1f} {s['best_bound']:12,.1f} {s['gap']:7.2%}")
+
+
+if __name__ == "__main__":
+    main()
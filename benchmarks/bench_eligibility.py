@@ -0,0 +1,72 @@
+"""
+Pair generation: full cross join + filter (the old build_model_input) vs
+eligible_pairs, which only emits the pairs the rules allow. Reports time
+and peak Python memory (tracemalloc) for building the joined frame.
+
+    python -m benchmarks.bench_eligibility
+    python -m benchmarks.bench_eligibility --sizes 1000x500 5000x1000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from eligibility import DEFAULT_RULES, EligibilityRule, eligible_pairs
+from benchmarks.synthetic import make_forests, make_trucks
+
+# a tighter rainy-season rule set: MAN trucks stay under 500 km and nothing
+# goes beyond 900 km
+RAIN_RULES = DEFAULT_RULES + (
+    EligibilityRule("rain road closures", seasons=("rain",), max_roundtrip_km=900),
+)
+
+
+def cross_join(trucks, forests, rules, season):
+    df = pd.merge(trucks, forests, how="cross")
+    truck_idx, forest_idx = eligible_pairs(trucks, forests, season, rules)
+    keep = truck_idx * len(forests) + forest_idx
+    return df.iloc[keep]
+
+
+def pairs_join(trucks, forests, rules, season):
+    truck_idx, forest_idx = eligible_pairs(trucks, forests, season, rules)
+    return pd.concat([
+        trucks.iloc[truck_idx].reset_index(drop=True),
+        forests.iloc[forest_idx].reset_index(drop=True),
+    ], axis=1)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, len(result)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["1000x500", "5000x1000"])
+    args = ap.parse_args()
+
+    print(f"{'size':>10} {'season':>6} {'pairs':>10} {'cross s':>8} {'cross MiB':>9} "
+          f"{'rules s':>8} {'rules MiB':>9}")
+    for size in args.sizes:
+        n_trucks, n_forests = (int(v) for v in size.split("x"))
+        trucks = make_trucks(n_trucks)
+        # most of a large catalogue is MAN here, so the km rule bites
+        trucks["type"] = trucks["type"].where(trucks["truck_id"] % 3 == 0, "MAN TGS40.400")
+        forests = make_forests(n_forests)
+        for season, rules in (("dry", DEFAULT_RULES), ("rain", RAIN_RULES)):
+            old_s, old_mb, n_pairs = measure(cross_join, trucks, forests, rules, season)
+            new_s, new_mb, _ = measure(pairs_join, trucks, forests, rules, season)
+            print(f"{size:>10} {season:>6} {n_pairs:10,} {old_s:8.3f} {old_mb:9.1f} "
+                  f"{new_s:8.3f} {new_mb:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+The results workbook: app.py's old pd.ExcelWriter + openpyxl block (cell-by-
+cell styling, width auto-fit by scanning the finished sheets) against
+report_writer.results_workbook (write-only mode, named styles, widths from
+the DataFrames). Both must produce the same values, styles, column widths
+and row heights.
+
+    python -m benchmarks.bench_excel
+    python -m benchmarks.bench_excel --rows 1000 100000
+
+The old block slows down faster than linearly (every ws[row] lookup for the
+zebra striping rescans the sheet), so it runs in a child process that is
+stopped after --legacy-timeout seconds; the speedup is then a lower bound.
+"""
+
+import argparse
+import io
+import multiprocessing
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+from report_writer import results_workbook
+
+
+def legacy_workbook(allocations, grouped_daily_plan):
+    with io.BytesIO() as buffer:
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+            # Write Forest Allocations as usual, now with Total Trucks
+            allocations.to_excel(writer, sheet_name='Forest Allocations', index=False)
+            ws_alloc = writer.book['Forest Allocations']
+            # Format Forest Allocations: text wrap, ample sizing, header color, borders
+            header_fill = PatternFill(start_color="B7E1CD", end_color="B7E1CD", fill_type="solid")
+            header_font = Font(bold=True)
+            border = Border(
+                left=Side(style='thin'),
+                right=Side(style='thin'),
+                top=Side(style='thin'),
+                bottom=Side(style='thin')
+            )
+            # Header row
+            for cell in ws_alloc[1]:
+                cell.fill = header_fill
+                cell.font = header_font
+                cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
+            # Data rows: wrap, center, borders
+            for row in ws_alloc.iter_rows(min_row=2, max_row=ws_alloc.max_row, min_col=1, max_col=ws_alloc.max_column):
+                for cell in row:
+                    cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
+                    cell.border = border
+            # Zebra striping for data rows (alternate light blue and white)
+            light_blue_fill = PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid")
+            for row_idx in range(2, ws_alloc.max_row + 1):
+                if (row_idx - 1) % 2 == 1:
+                    for cell in ws_alloc[row_idx]:
+                        cell.fill = light_blue_fill
+            # Column widths: set min width for key columns, auto-fit others, then add extra space
+            col_map = {name: idx+1 for idx, name in enumerate(allocations.columns)}
+            min_widths = {'Forest': 24, 'Profit': 18, 'Efficiency (CBM/hr)': 18, 'Trucks Assigned': 28, 'Total Trucks': 14}
+            for col_name, min_w in min_widths.items():
+                if col_name in col_map:
+                    col_letter = ws_alloc.cell(row=1, column=col_map[col_name]).column_letter
+                    ws_alloc.column_dimensions[col_letter].width = min_w
+            for col in ws_alloc.columns:
+                max_length = 0
+                col_letter = col[0].column_letter
+                for cell in col:
+                    try:
+                        if cell.value:
+                            max_length = max(max_length, len(str(cell.value)))
+                    except:
+                        pass
+                if ws_alloc.column_dimensions[col_letter].width < max_length + 4:
+                    ws_alloc.column_dimensions[col_letter].width = min(max_length + 4, 40)
+                # Add extra width for breathing room
+                ws_alloc.column_dimensions[col_letter].width += 7
+            # Row heights: set all to 72 for maximum readability
+            for row_idx in range(1, ws_alloc.max_row + 1):
+                ws_alloc.row_dimensions[row_idx].height = 72
+
+            # Set font size 16 for all cells in Forest Allocations
+            for row in ws_alloc.iter_rows(min_row=1, max_row=ws_alloc.max_row, min_col=1, max_col=ws_alloc.max_column):
+                for cell in row:
+                    cell.font = Font(size=16, bold=cell.font.bold)
+
+            # --- Write grouped daily plan as separate tables for each day ---
+            ws = writer.book.create_sheet('Daily Forest-Truck Plan')
+            start_row = 1
+            for day in sorted(grouped_daily_plan.keys()):
+                # Day label
+                ws.cell(row=start_row, column=1, value=f"Day {day}")
+                ws.cell(row=start_row, column=1).font = Font(bold=True, size=16)
+                start_row += 1
+                # Header
+                ws.cell(row=start_row, column=1, value="Forest")
+                ws.cell(row=start_row, column=2, value="Truck IDs")
+                ws.cell(row=start_row, column=3, value="Total Trucks")
+                for col in range(1, 4):
+                    cell = ws.cell(row=start_row, column=col)
+                    cell.fill = header_fill
+                    cell.font = Font(size=16, bold=True)
+                    cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
+                header_row = start_row
+                start_row += 1
+                # Table rows
+                for row in grouped_daily_plan[day]:
+                    ws.cell(row=start_row, column=1, value=row['Forest'])
+                    ws.cell(row=start_row, column=2, value=row['Truck IDs'])
+                    ws.cell(row=start_row, column=3, value=row['Total Trucks'])
+                    for col in range(1, 4):
+                        cell = ws.cell(row=start_row, column=col)
+                        cell.font = Font(size=16)
+                        cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
+                        cell.border = border
+                    start_row += 1
+                # Box up the day's table
+                end_row = start_row - 1
+                for r in range(header_row, end_row + 1):
+                    for c in range(1, 4):
+                        ws.cell(row=r, column=c).border = border
+                # Add an empty row between days
+                start_row += 1
+            # Adjust column widths for grouped daily plan, add extra space
+            for col in ws.columns:
+                max_length = 0
+                col_letter = col[0].column_letter
+                for cell in col:
+                    try:
+                        if cell.value:
+                            max_length = max(max_length, len(str(cell.value)))
+                    except:
+                        pass
+                ws.column_dimensions[col_letter].width = min(max_length + 4, 40) + 7
+            # Row heights for grouped daily plan: set all to 72
+            for row_idx in range(1, ws.max_row + 1):
+                ws.row_dimensions[row_idx].height = 72
+
+        excel_data = buffer.getvalue()
+    return excel_data
+
+
+def make_report(n_rows, seed=0):
+    """allocations with n_rows forests and a daily plan of n_rows forest rows over 5 days."""
+    rng = np.random.default_rng(seed)
+    trucks = rng.integers(1, 6, size=n_rows)
+    allocations = pd.DataFrame({
+        "Forest": [f"F{i:06d} - Forest" for i in range(n_rows)],
+        "CBM": np.where(trucks > 1, trucks * 45.0, np.nan),
+        "Trips": trucks * 3,
+        "Hours": np.round(rng.uniform(0, 200, n_rows), 2),
+        "Profit": np.round(rng.uniform(0, 5e4, n_rows), 2),
+        "Remaining": rng.choice([0.0, 500.0, 1000.0], n_rows),
+        "Efficiency (CBM/hr)": rng.uniform(0, 10, n_rows),
+        "Trucks Assigned": [", ".join(map(str, rng.integers(1, 1000, k))) for k in trucks],
+        "Total Trucks": trucks,
+    })
+    grouped = {}
+    for day, rows in enumerate(np.array_split(np.arange(n_rows), 5), start=1):
+        grouped[day] = [{"Forest": allocations["Forest"][i],
+                         "Truck IDs": allocations["Trucks Assigned"][i],
+                         "Total Trucks": int(trucks[i])} for i in rows]
+    return allocations, grouped
+
+
+def _cell_key(cell):
+    value = None if cell.value == "" else cell.value
+    return (value, cell.font.b, cell.font.sz, cell.fill.fgColor.rgb if cell.fill.fill_type else None,
+            cell.border.left.style if cell.border.left else None, cell.alignment.horizontal, cell.alignment.wrap_text)
+
+
+def same_workbook(a: bytes, b: bytes):
+    wa, wb = load_workbook(io.BytesIO(a)), load_workbook(io.BytesIO(b))
+    assert wa.sheetnames == wb.sheetnames, (wa.sheetnames, wb.sheetnames)
+    for name in wa.sheetnames:
+        sa, sb = wa[name], wb[name]
+        assert sa.max_row == sb.max_row and sa.max_column == sb.max_column, name
+        for ra, rb in zip(sa.iter_rows(), sb.iter_rows()):
+            for ca, cb in zip(ra, rb):
+                assert _cell_key(ca) == _cell_key(cb), (name, ca.coordinate, _cell_key(ca), _cell_key(cb))
+        for col in range(1, sa.max_column + 1):
+            letter = sa.cell(row=1, column=col).column_letter
+            assert sa.column_dimensions[letter].width == sb.column_dimensions[letter].width, (name, letter)
+        for r in range(1, sa.max_row + 1):
+            assert sa.row_dimensions[r].height == sb.row_dimensions[r].height, (name, r)
+
+
+def _timed_legacy(n, queue):
+    allocations, grouped = make_report(n)
+    start = time.perf_counter()
+    data = legacy_workbook(allocations, grouped)
+    queue.put((time.perf_counter() - start, data))
+
+
+def run_legacy(n, timeout):
+    """(seconds, workbook bytes), or (None, None) if it ran past timeout."""
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_timed_legacy, args=(n, queue))
+    proc.start()
+    try:
+        return queue.get(timeout=timeout)
+    except Exception:
+        return None, None
+    finally:
+        proc.terminate()
+        proc.join()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", nargs="+", type=int, default=[100, 10000, 100000])
+    ap.add_argument("--check-up-to", type=int, default=10000,
+                    help="compare the two workbooks cell by cell up to this many rows")
+    ap.add_argument("--legacy-timeout", type=float, default=600)
+    args = ap.parse_args()
+
+    print(f"{'rows':>8} {'legacy s':>9} {'writer s':>9} {'speedup':>8} {'same':>5}")
+    for n in args.rows:
+        allocations, grouped = make_report(n)
+        t_old, old = run_legacy(n, args.legacy_timeout)
+        start = time.perf_counter()
+        new = results_workbook(allocations, grouped)
+        t_new = time.perf_counter() - start
+        same = "-"
+        if old is not None and n <= args.check_up_to:
+            same_workbook(old, new)
+            same = "yes"
+        if t_old is None:
+            t_old = args.legacy_timeout
+            print(f"{n:>8,} {'>' + format(t_old, '.0f'):>9} {t_new:>9.2f} {'>' + format(t_old / t_new, '.1f'):>7}x {same:>5}")
+        else:
+            print(f"{n:>8,} {t_old:>9.2f} {t_new:>9.2f} {t_old / t_new:>7.1f}x {same:>5}")
+
+
+if __name__ == "__main__":
+    main()
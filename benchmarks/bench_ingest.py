@@ -0,0 +1,52 @@
+"""
+CSV ingest: plain pd.read_csv (with type inference, the old path) vs the
+schema-driven pyarrow reader in preprocess, on large synthetic catalogs.
+
+    python -m benchmarks.bench_ingest
+    python -m benchmarks.bench_ingest --rows 10000 1000000
+"""
+
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from preprocess import read_forests, read_trucks
+from benchmarks.synthetic import make_forests, make_trucks
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def pandas_read(path):
+    table = pd.read_csv(path)
+    table.columns = table.columns.str.strip().str.lower()
+    return table
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", nargs="+", type=int, default=[10_000, 100_000, 500_000])
+    args = ap.parse_args()
+
+    print(f"{'file':>8} {'rows':>9} {'pandas s':>9} {'arrow s':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            for name, make, reader in (("trucks", make_trucks, read_trucks),
+                                       ("forests", make_forests, read_forests)):
+                path = f"{tmp}/{name}.csv"
+                make(rows).to_csv(path, index=False)
+                old = best_of(lambda: pandas_read(path))
+                new = best_of(lambda: reader(path))
+                print(f"{name:>8} {rows:9,} {old:9.3f} {new:9.3f} {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
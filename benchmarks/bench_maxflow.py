@@ -0,0 +1,155 @@
+"""
+The idle-truck top-up: the old networkx builder (nested iterrows loops,
+nx.max_flow_min_cost, a set_index lookup per assignment) against the
+array build + OR-Tools SimpleMinCostFlow in helper_maxflow. Both must move
+the same number of trips. Then the two passes app.py used to make
+(top_up_with_flow + half_trip_maxflow) against the combined top_up, with
+the progress prints switched off. The two passes each spend the same
+leftover volume and book trucks past their hours, so their load count is
+not reachable; "loads left" is what the forests actually have, and top_up
+must keep every truck within its available_hours.
+
+    python -m benchmarks.bench_maxflow
+    python -m benchmarks.bench_maxflow --sizes 50x17 500x60
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+import helper_maxflow
+from benchmarks.synthetic import make_forests, make_trucks
+from perf import set_verbose
+
+
+def legacy_top_up(idle_df, forests_df):
+    G = nx.DiGraph()
+    G.add_node("S"); G.add_node("T")
+    for _, t in idle_df.iterrows():
+        max_trips_anywhere = int(t.available_hours // forests_df.turnaround_time.min())
+        if max_trips_anywhere:
+            G.add_edge("S", t.truck_id, capacity=max_trips_anywhere)
+    for _, f in forests_df.iterrows():
+        trips_left = int(f.volume_left // f.cbm_per_truck)
+        if trips_left:
+            G.add_edge(f.forest_id, "T", capacity=trips_left)
+    for _, t in idle_df.iterrows():
+        for _, f in forests_df.iterrows():
+            trips_cap = int(min(
+                t.available_hours // f.turnaround_time,
+                f.volume_left // f.cbm_per_truck))
+            if trips_cap:
+                G.add_edge(t.truck_id, f.forest_id, capacity=trips_cap, weight=0)
+    flow = nx.max_flow_min_cost(G, "S", "T")
+    assignments = []
+    for t in idle_df.truck_id:
+        if t not in flow: continue
+        for f, trips in flow[t].items():
+            if trips:
+                forest_row = forests_df.set_index('forest_id').loc[f]
+                assignments.append(dict(
+                    truck_id=t, forest_id=f, trips=int(trips),
+                    cbm_collected=trips * forest_row.cbm_per_truck,
+                    hours_used=trips * forest_row.turnaround_time))
+    return assignments
+
+
+def legacy_half_trip(idle_df, forests_df):
+    G = nx.DiGraph()
+    G.add_node("S"); G.add_node("T")
+    for _, t in idle_df.iterrows():
+        if t.available_hours > 0:
+            G.add_edge("S", t.truck_id, capacity=1)
+    for _, f in forests_df.iterrows():
+        max_half_trips = int(f.volume_left // (f.cbm_per_truck / 2))
+        if max_half_trips > 0:
+            G.add_edge(f.forest_id, "T", capacity=max_half_trips)
+    for _, t in idle_df.iterrows():
+        for _, f in forests_df.iterrows():
+            if t.available_hours >= f.turnaround_time / 2 and f.volume_left >= f.cbm_per_truck / 2:
+                G.add_edge(t.truck_id, f.forest_id, capacity=1, weight=-f.cbm_per_truck / 2)
+    flow = nx.max_flow_min_cost(G, "S", "T")
+    assignments = []
+    for t in idle_df.truck_id:
+        if t not in flow: continue
+        for f, trips in flow[t].items():
+            if trips:
+                forest_row = forests_df.set_index('forest_id').loc[f]
+                assignments.append(dict(
+                    truck_id=t, forest_id=f, trips=0.5,
+                    cbm_collected=forest_row.cbm_per_truck,
+                    hours_used=forest_row.turnaround_time / 2))
+    return assignments
+
+
+def idle_inputs(n_trucks, n_forests, seed=0):
+    rng = np.random.default_rng(seed)
+    trucks = make_trucks(n_trucks, seed)
+    trucks["available_hours"] = trucks["drive_hours"] - trucks["maintenance_hours"]
+    forests = make_forests(n_forests, seed).rename(
+        columns={"Turn_around_time_dry": "turnaround_time"})
+    forests["cbm_per_truck"] = 45.0
+    # leftovers after the main plan: a few loads per forest
+    forests["volume_left"] = rng.integers(0, 12, size=n_forests) * 45.0
+    forests = forests[["forest_id", "turnaround_time", "cbm_per_truck",
+                       "volume_left", "profit_per_cbm_euros"]]
+    return trucks, forests
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["50x17", "200x60", "1000x60"])
+    args = ap.parse_args()
+    set_verbose(False)
+
+    print(f"{'size':>8} {'engine':>9} {'networkx s':>10} {'ortools s':>9} {'speedup':>8} {'trips':>7}")
+    for size in args.sizes:
+        n_trucks, n_forests = (int(v) for v in size.split("x"))
+        idle_df, forests_df = idle_inputs(n_trucks, n_forests)
+        for name, old_fn, new_fn in (("top-up", legacy_top_up, helper_maxflow.top_up_with_flow),
+                                     ("half-trip", legacy_half_trip, helper_maxflow.half_trip_maxflow)):
+            old_s, old = timed(old_fn, idle_df, forests_df.copy())
+            new_s, new = timed(new_fn, idle_df, forests_df.copy())
+            old_trips = sum(a["trips"] for a in old)
+            new_trips = sum(a["trips"] for a in new)
+            assert old_trips == new_trips, (size, name, old_trips, new_trips)
+            print(f"{size:>8} {name:>9} {old_s:10.3f} {new_s:9.4f} {old_s / new_s:7.0f}x {new_trips:7g}")
+
+    print(f"\n{'size':>8} {'two passes s':>12} {'combined s':>10} {'loads':>11} {'loads left':>10} "
+          f"{'half trips':>10}")
+    for size in args.sizes:
+        n_trucks, n_forests = (int(v) for v in size.split("x"))
+        idle_df, forests_df = idle_inputs(n_trucks, n_forests)
+        runs = []
+        for _ in range(5):
+            full_s, full = timed(helper_maxflow.top_up_with_flow, idle_df, forests_df.copy())
+            half_s, half = timed(helper_maxflow.half_trip_maxflow, idle_df, forests_df.copy())
+            both_s, both = timed(helper_maxflow.top_up, idle_df, forests_df)
+            runs.append((full_s + half_s, both_s))
+        two_s, one_s = np.min(runs, axis=0)
+        # the two passes each spend the same leftover volume; top_up shares it
+        two_loads = sum(a["trips"] for a in full) + len(half)
+        one_loads = sum(a["trips"] if a["kind"] == "full" else 1 for a in both)
+        n_half = sum(a["kind"] == "half" for a in both)
+        loads_left = int((forests_df["volume_left"] // forests_df["cbm_per_truck"]).sum())
+        booked = pd.DataFrame(both).groupby("truck_id")["hours_used"].sum()
+        hours = idle_df.set_index("truck_id")["available_hours"].reindex(booked.index)
+        assert (booked <= hours + 1e-9).all(), (size, "truck booked past its hours")
+        print(f"{size:>8} {two_s:12.4f} {one_s:10.4f} {f'{two_loads}->{one_loads}':>11} {loads_left:10} "
+              f"{n_half:10}")
+
+
+if __name__ == "__main__":
+    main()
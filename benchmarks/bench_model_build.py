@@ -0,0 +1,90 @@
+"""
+Time MILP construction in solve_week: the old row-by-row build (iterrows,
+groupby + iterrows, df.loc per variable) against the array build.
+
+    python -m benchmarks.bench_model_build
+    python -m benchmarks.bench_model_build --sizes 91x17 1000x500
+"""
+
+import argparse
+import math
+import tempfile
+import time
+
+from ortools.linear_solver import pywraplp
+
+import optimiser
+from preprocess import build_model_input
+from benchmarks.synthetic import write_csvs
+
+
+def legacy_build(df, maximize_profit=False):
+    solver = pywraplp.Solver.CreateSolver("CBC")
+    var = {}
+    for (t, f), row in df.iterrows():
+        if row.trip_hours > 0:
+            phys_lim = math.floor(row.drive_hours / row.trip_hours)
+        else:
+            phys_lim = 0
+        ub = min(max(0, phys_lim), 15)
+        var[(t, f)] = solver.IntVar(0, ub, f"x_{t}_{f}")
+    for t, t_rows in df.groupby(level=0):
+        solver.Add(
+            solver.Sum(row.trip_hours * var[(t, f)]
+                       for (_, f), row in t_rows.iterrows())
+            <= t_rows.drive_hours.iloc[0]
+        )
+    for f, f_rows in df.groupby(level=1):
+        solver.Add(
+            solver.Sum(row.cbm_per_truck * var[(t, f)]
+                       for (t, _), row in f_rows.iterrows())
+            <= f_rows.weekly_stockpile_cbm.iloc[0]
+        )
+    if maximize_profit:
+        solver.Maximize(solver.Sum(df.loc[(t, f), "cbm_per_truck"] * df.loc[(t, f), "profit_per_cbm_euros"] * var[(t, f)] for (t, f) in var))
+    else:
+        solver.Maximize(solver.Sum(df.loc[(t, f), "cbm_per_truck"] * var[(t, f)] for (t, f) in var))
+    return solver
+
+
+def array_build(df, maximize_profit=False):
+    return optimiser.build_solver(optimiser.model_arrays(df, maximize_profit).to_sparse())
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["91x17", "1000x500"],
+                    help="TRUCKSxFORESTS; 91x17 uses the real data/ CSVs")
+    ap.add_argument("--legacy-max-pairs", type=int, default=50_000,
+                    help="skip the row-by-row build above this many pairs")
+    args = ap.parse_args()
+
+    print(f"{'size':>10} {'pairs':>9} {'legacy s':>10} {'array s':>9} {'speedup':>8}")
+    for size in args.sizes:
+        n_trucks, n_forests = (int(v) for v in size.split("x"))
+        with tempfile.TemporaryDirectory() as tmp:
+            if size == "91x17":
+                df = build_model_input(season="dry")
+            else:
+                forests_csv, trucks_csv = write_csvs(tmp, n_trucks, n_forests)
+                df = build_model_input(forests_csv, trucks_csv, season="dry")
+
+        t_array, solver = timed(array_build, df, True)
+        n_pairs = solver.NumVariables()
+        if len(df) <= args.legacy_max_pairs:
+            t_legacy, legacy = timed(legacy_build, df, True)
+            assert legacy.NumConstraints() == solver.NumConstraints()
+            legacy_txt, speedup = f"{t_legacy:10.3f}", f"{t_legacy / t_array:7.1f}x"
+        else:
+            legacy_txt, speedup = f"{'skipped':>10}", f"{'-':>8}"
+        print(f"{size:>10} {n_pairs:>9,} {legacy_txt} {t_array:9.3f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
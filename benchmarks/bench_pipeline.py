@@ -0,0 +1,168 @@
+"""
+Stage-by-stage timing of the planning pipeline on seeded synthetic data
+(benchmarks/synthetic.py), written to a JSON file so two versions can be
+compared stage by stage.
+
+Stages: build_model_input, solve_week (with its sub-stages: model_arrays,
+presolve, model_build, cbc_build / cbc or glop, ...), top_up_with_flow,
+half_trip_maxflow and the daily-plan expansion (generate_daily_plans, which
+includes schedule_trips and writing the three files). Each stage's time is
+the minimum over --repeats runs; peak RSS is the process high-water mark at
+the end of the stage.
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --sizes 1000x200 5000x1000 --backend lp --out new.json
+    python -m benchmarks.bench_pipeline --compare old.json --out new.json
+
+The top-up passes get the same seeded idle trucks and leftovers as
+bench_maxflow (one idle truck per fleet truck), so their size does not
+depend on how much the plan happened to leave over. CBC rarely proves
+optimality on the synthetic data, so its stage mostly measures the time
+limit (or --rel-gap); the model size, status, stop reason, objective and
+gap are stored next to the times. CBC's memory grows quickly with the
+number of pairs (about 5 GB at 2000x500), so use --backend lp for the
+largest sizes.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import ortools
+import pandas as pd
+import pyarrow
+
+import helper_maxflow
+from benchmarks.bench_maxflow import idle_inputs
+from benchmarks.synthetic import write_csvs
+from daily_plan_generator import generate_daily_plans
+from optimiser import solve_week
+from perf import recording
+from preprocess import build_model_input
+
+
+def _git_version():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _stage_paths(log):
+    """(stage path like 'solve_week/cbc', span) for every span of the recording."""
+    stack = []
+    for s in log.spans:
+        del stack[s.depth:]
+        stack.append(s.name)
+        yield "/".join(stack), s
+
+
+def run_pipeline(forests_csv, trucks_csv, n_trucks, n_forests, args, out_dir):
+    """One pass over all stages; {stage: (wall_s, cpu_s, peak_rss_mb)} plus solve facts."""
+    idle_df, forests_df = idle_inputs(n_trucks, n_forests, args.seed)
+    with contextlib.redirect_stdout(io.StringIO()), recording() as log:
+        df = build_model_input(forests_csv, trucks_csv, season=args.season)
+        plan = solve_week(df, maximize_profit=True, backend=args.backend, time_limit=args.time_limit,
+                          rel_gap=args.rel_gap)
+        helper_maxflow.top_up_with_flow(idle_df, forests_df.copy())
+        helper_maxflow.half_trip_maxflow(idle_df, forests_df.copy())
+        generate_daily_plans(plan, df, out_dir=out_dir)
+    stages = {}
+    for path, s in _stage_paths(log):
+        if path not in stages:  # first call only, e.g. schedule_trips inside generate_daily_plans
+            stages[path] = (s.wall_s, s.cpu_s, s.peak_rss_mb)
+    t = plan.attrs["telemetry"]
+    facts = dict(pairs=len(df), n_vars=t.n_vars, n_constraints=t.n_constraints,
+                 n_nonzeros=t.n_nonzeros, status=t.status, stop_reason=t.stop_reason,
+                 objective=t.objective, best_bound=t.best_bound, gap=t.gap,
+                 trips=int(plan["trips_planned"].sum()))
+    return stages, facts
+
+
+def bench_size(size, args):
+    n_trucks, n_forests = (int(v) for v in size.split("x"))
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        forests_csv, trucks_csv = write_csvs(tmp, n_trucks, n_forests, args.seed)
+        for _ in range(args.repeats):
+            runs.append(run_pipeline(forests_csv, trucks_csv, n_trucks, n_forests, args, tmp))
+    facts = runs[-1][1]
+    rows = []
+    for stage in runs[0][0]:
+        times = np.array([r[0][stage] for r in runs if stage in r[0]], dtype=float)
+        rows.append(dict(size=size, trucks=n_trucks, forests=n_forests, stage=stage,
+                         wall_s=float(times[:, 0].min()), wall_s_median=float(np.median(times[:, 0])),
+                         cpu_s=float(times[:, 1].min()), peak_rss_mb=float(times[:, 2].max()), **facts))
+    return rows
+
+
+def compare(old_rows, new_rows, threshold):
+    """New vs old wall time per (size, stage) present in both."""
+    old = pd.DataFrame(old_rows).set_index(["size", "stage"])["wall_s"]
+    new = pd.DataFrame(new_rows).set_index(["size", "stage"])["wall_s"]
+    both = pd.concat({"old_s": old, "new_s": new}, axis=1, join="inner")
+    both["ratio"] = both["new_s"] / both["old_s"]
+    # sub-millisecond stages are all noise
+    both["flag"] = np.where((both["ratio"] > 1 + threshold) & (both["new_s"] > 1e-3), "SLOWER",
+                   np.where((both["ratio"] < 1 - threshold) & (both["old_s"] > 1e-3), "faster", ""))
+    return both.reset_index()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["91x17", "500x100", "1000x200"],
+                    help="TRUCKSxFORESTS of the synthetic data, e.g. 5000x1000")
+    ap.add_argument("--season", choices=["dry", "rain"], default="dry")
+    ap.add_argument("--backend", choices=["cbc", "cpsat", "lp"], default="cbc")
+    ap.add_argument("--time-limit", type=float, default=10, help="solver time limit in seconds")
+    ap.add_argument("--rel-gap", type=float, default=None, help="stop the solver within this relative gap")
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="bench_pipeline.json")
+    ap.add_argument("--compare", default=None, help="earlier --out file to compare against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="relative change flagged by --compare")
+    args = ap.parse_args()
+
+    meta = dict(
+        created_at=datetime.datetime.now().replace(microsecond=0).isoformat(),
+        git=_git_version(), python=platform.python_version(), platform=platform.platform(),
+        cpus=os.cpu_count(), numpy=np.__version__, pandas=pd.__version__,
+        pyarrow=pyarrow.__version__, ortools=ortools.__version__,
+        **{k: v for k, v in vars(args).items() if k not in ("out", "compare", "threshold")},
+    )
+    results = []
+    for size in args.sizes:
+        start = time.perf_counter()
+        rows = bench_size(size, args)
+        results += rows
+        print(f"\n{size}: {rows[0]['pairs']:,} pairs, {rows[0]['status']} ({rows[0]['stop_reason']}), gap {rows[0]['gap']:.2%} "
+              f"({time.perf_counter() - start:.1f}s for {args.repeats} runs)")
+        table = pd.DataFrame(rows)[["stage", "wall_s", "wall_s_median", "cpu_s", "peak_rss_mb"]]
+        print(table.to_markdown(index=False, floatfmt=("", ".4f", ".4f", ".4f", ",.0f")))
+
+    with open(args.out, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1)
+    print(f"\nWrote {len(results)} stage timings to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print(f"\nAgainst {args.compare} ({old['meta'].get('git')}, {old['meta'].get('created_at')}):")
+        table = compare(old["results"], results, args.threshold)
+        print(table.to_markdown(index=False, floatfmt=("", "", ".4f", ".4f", ".2f", "")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+What presolve removes and what it saves CBC, on data/ and on a synthetic
+mid-week replan: forests down to leftover volumes (some below one load),
+some zero-profit forests and a few trucks parked in the workshop all week.
+
+    python -m benchmarks.bench_presolve
+    python -m benchmarks.bench_presolve --sizes 300x60 1000x200 --time_limit 30
+
+CBC's own presolve finds most of the same reductions, so on models it
+closes quickly the win is small; on models that hit the time limit,
+compare the objective and gap reached.
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+
+import numpy as np
+
+from optimiser import model_arrays, presolve, solve_week
+from preprocess import build_model_input
+from benchmarks.synthetic import write_csvs
+
+
+def mid_week(df, seed=0):
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    forests = df.index.get_level_values(1)
+    left = dict(zip(forests.unique(), rng.choice([20, 60, 150, 300, 600], size=forests.nunique())))
+    df["weekly_stockpile_cbm"] = forests.map(left).astype(float)
+    no_profit = rng.choice(forests.unique(), size=max(1, forests.nunique() // 10), replace=False)
+    df.loc[forests.isin(no_profit), "profit_per_cbm_euros"] = 0.0
+    trucks = df.index.get_level_values(0)
+    parked = rng.choice(trucks.unique(), size=max(1, trucks.nunique() // 20), replace=False)
+    df.loc[trucks.isin(parked), "drive_hours"] = 0.0
+    return df
+
+
+def quiet_solve(df, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solve_week(df, maximize_profit=True, **kwargs).attrs["solve_stats"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["60x12", "300x60", "1000x200"])
+    ap.add_argument("--time_limit", type=float, default=10)
+    args = ap.parse_args()
+
+    cases = []
+    for season in ("dry", "rain"):
+        cases.append((f"data/ {season}", build_model_input(season=season)))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            n_trucks, n_forests = (int(v) for v in size.split("x"))
+            df = build_model_input(*write_csvs(tmp, n_trucks, n_forests), season="dry")
+            cases.append((f"{size} mid-week", mid_week(df)))
+
+    print(f"{'case':>16} {'vars':>7} {'tight':>6} {'zero':>6} {'noval':>6} {'domin':>5} "
+          f"{'left':>7} {'rows':>11} | {'off s':>6} {'status':>8} {'objective':>11} {'gap':>6} "
+          f"| {'on s':>6} {'status':>8} {'objective':>11} {'gap':>6}")
+    for name, df in cases:
+        _, r = presolve(model_arrays(df, maximize_profit=True))
+        line = (f"{name:>16} {r.n_vars:7,} {r.bounds_tightened:6,} {r.zero_bound:6,} {r.no_value:6,} "
+                f"{r.dominated:5,} {r.n_vars_after:7,} {f'{r.n_rows}->{r.n_rows_after}':>11}")
+        for flag in (False, True):
+            s = quiet_solve(df, presolve_model=flag, time_limit=args.time_limit)
+            line += (f" | {s['wall_time']:6.2f} {s['status']:>8} {s['objective']:11,.0f} {s['gap']:6.2%}")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Replay time of the discrete-event simulator (simulate.simulate_week) on
+synthetic fleets. Plans come from solve_week's "lp" backend, which is the
+quickest way to a full plan at these sizes.
+
+    python -m benchmarks.bench_simulate
+    python -m benchmarks.bench_simulate --sizes 1000x60 3000x200 --repeats 5
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+from benchmarks.synthetic import write_csvs
+from optimiser import solve_week
+from preprocess import build_model_input
+from simulate import simulate_week
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["100x17", "1000x60", "3000x200"],
+                    help="TRUCKSxFORESTS")
+    ap.add_argument("--repeats", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'size':>10} {'trips':>7} {'events':>8} {'delivered':>10} {'best s':>8}")
+    for size in args.sizes:
+        n_trucks, n_forests = map(int, size.split("x"))
+        with tempfile.TemporaryDirectory() as tmp:
+            forests_csv, trucks_csv = write_csvs(tmp, n_trucks, n_forests)
+            df = build_model_input(forests_csv, trucks_csv, season="dry")
+        with contextlib.redirect_stdout(io.StringIO()):
+            plan = solve_week(df, backend="lp")
+        times = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            result = simulate_week(plan, df)
+            times.append(time.perf_counter() - start)
+        s = result.summary
+        print(f"{size:>10} {s['trips_planned']:>7,} {s['events']:>8,} "
+              f"{s['delivered_share']:>10.1%} {min(times):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
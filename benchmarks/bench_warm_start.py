@@ -0,0 +1,77 @@
+"""
+Cold vs warm-started solve_week. "Last week" is solved first; "this week"
+is the same input with a few trucks in the workshop and forest volumes
+moved by up to 10 %, and is solved with and without last week's plan as
+previous_plan.
+
+    python -m benchmarks.bench_warm_start
+    python -m benchmarks.bench_warm_start --sizes 300x60 --limits 1 5
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+
+import numpy as np
+
+from optimiser import solve_week
+from preprocess import build_model_input
+from benchmarks.synthetic import write_csvs
+
+
+def next_week(df, seed=0):
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    trucks = df.index.get_level_values(0)
+    workshop = rng.choice(trucks.unique(), size=max(1, trucks.nunique() // 15), replace=False)
+    df.loc[trucks.isin(workshop), "drive_hours"] = 31.5
+    forests = df.index.get_level_values(1)
+    factor = dict(zip(forests.unique(), rng.uniform(0.9, 1.1, forests.nunique())))
+    df["weekly_stockpile_cbm"] = np.floor(df["weekly_stockpile_cbm"] * forests.map(factor))
+    return df
+
+
+def quiet_solve(*args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solve_week(*args, **kwargs).attrs["solve_stats"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["91x17", "300x60"])
+    ap.add_argument("--season", choices=["dry", "rain"], default="rain")
+    ap.add_argument("--limits", nargs="+", type=float, default=[0.5, 2, 5],
+                    help="time limits in seconds")
+    args = ap.parse_args()
+
+    print(f"{'size':>7} {'backend':>7} {'limit':>5} {'start':>5} {'first inc s':>11} "
+          f"{'objective':>12} {'gap':>7} {'hint obj':>12}")
+    for size in args.sizes:
+        n_trucks, n_forests = (int(v) for v in size.split("x"))
+        with tempfile.TemporaryDirectory() as tmp:
+            if size == "91x17":
+                df = build_model_input(season=args.season)
+            else:
+                df = build_model_input(*write_csvs(tmp, n_trucks, n_forests), season=args.season)
+        with contextlib.redirect_stdout(io.StringIO()):
+            last_plan = solve_week(df, maximize_profit=True)
+        this_week = next_week(df)
+
+        for backend in ("cbc", "cpsat"):
+            for limit in args.limits:
+                for start, prev in (("cold", None), ("warm", last_plan)):
+                    try:
+                        s = quiet_solve(this_week, maximize_profit=True, backend=backend,
+                                        previous_plan=prev, time_limit=limit)
+                    except RuntimeError:
+                        print(f"{size:>7} {backend:>7} {limit:5.1f} {start:>5} {'no incumbent in time limit':>32}")
+                        continue
+                    first = "-" if s["first_solution_time"] is None else f"{s['first_solution_time']:.2f}"
+                    hint = f"{s['hint_objective']:12,.1f}" if "hint_objective" in s else f"{'-':>12}"
+                    print(f"{size:>7} {backend:>7} {limit:5.1f} {start:>5} {first:>11} "
+                          f"{s['objective']:12,.1f} {s['gap']:7.2%} {hint}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Seeded synthetic forests / trucks tables with the same columns as the files
+in data/, for timing the pipeline at fleet sizes we do not have yet.
+
+    python -m benchmarks.synthetic --trucks 5000 --forests 1000 --out /tmp/synthetic
+"""
+
+import argparse
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+TRUCK_TYPES = {
+    # type: (cbm_per_truck, fuel_L_per_km)
+    "MAN TGS40.400": (40, 0.45),
+    "Shacman F2000": (45, 0.5),
+}
+
+
+def make_trucks(n_trucks: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    truck_id = np.arange(1, n_trucks + 1)
+    # trucks 1-32 are the MAN fleet, as in data/trucks.csv
+    types = np.where(truck_id <= 32, "MAN TGS40.400", "Shacman F2000")
+    maintenance = rng.choice([0, 0, 0, 0, 10.5, 21], size=n_trucks)
+    return pd.DataFrame({
+        "truck_id": truck_id,
+        "type": types,
+        "maintenance_hours": maintenance,
+        "drive_hours": 52.5,
+        "cbm_per_truck": [TRUCK_TYPES[t][0] for t in types],
+        "fuel_L_per_km": [TRUCK_TYPES[t][1] for t in types],
+    })
+
+
+def make_forests(n_forests: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 1)
+    roundtrip_km = rng.integers(100, 1300, size=n_forests)
+    # turnaround grows with distance, roughly like the real table
+    dry = np.round(6 + roundtrip_km * 0.03, 2)
+    rain = np.round(dry * 1.5, 5)
+    trips_dry = np.maximum(np.floor(200 / dry), 4)
+    return pd.DataFrame({
+        "forest_id": [f"F{i:04d}" for i in range(n_forests)],
+        "max_trips_month_dry": trips_dry,
+        "Turn_around_time_dry": dry,
+        "max_trips_month_rain": np.maximum(trips_dry - 2, 4),
+        "Turn_around_time_rain": rain,
+        "roundtrip_km": roundtrip_km,
+        "volume": rng.choice([0, 500, 1000, 1500, 2000], size=n_forests),
+        "sale_price_per_cbm": rng.choice([0, 15000, 25000, 35000], size=n_forests),
+        "profit_per_cbm_euros": np.round(rng.uniform(0, 40, size=n_forests), 2),
+    })
+
+
+def write_csvs(folder, n_trucks: int, n_forests: int, seed: int = 0):
+    """Write forests.csv / trucks.csv into folder and return both paths."""
+    forests_csv = f"{folder}/forests.csv"
+    trucks_csv = f"{folder}/trucks.csv"
+    make_forests(n_forests, seed).to_csv(forests_csv, index=False)
+    make_trucks(n_trucks, seed).to_csv(trucks_csv, index=False)
+    return forests_csv, trucks_csv
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--trucks", type=int, default=5000)
+    ap.add_argument("--forests", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="synthetic", help="folder for forests.csv / trucks.csv")
+    args = ap.parse_args()
+
+    pathlib.Path(args.out).mkdir(parents=True, exist_ok=True)
+    forests_csv, trucks_csv = write_csvs(args.out, args.trucks, args.forests, args.seed)
+    print(f"Wrote {forests_csv} ({args.forests} forests) and {trucks_csv} ({args.trucks} trucks), seed {args.seed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,137 +1,115 @@
-import csv
-from collections import defaultdict
-
-# Read plan.csv and collect trips per truck
-trips_by_truck = defaultdict(list)
-with open('plan.csv', newline='') as csvfile:
-    reader = csv.DictReader(csvfile)
-    for row in reader:
-        truck_id = row['truck_id'].strip()
-        forest_id = row['forest_id'].strip()
-        trips_planned = int(row['trips_planned'])
-        cbm_per_truck = row['cbm_per_truck'].strip()
-        profit = row['profit'].strip()
-        # Store each trip assignment as many times as trips_planned
-        trips_by_truck[truck_id].append({
-            'forest_id': forest_id,
-            'trips_planned': trips_planned,
-            'cbm_per_truck': cbm_per_truck,
-            'profit': profit
-        })
-
-# Expand trips into daily assignments
-expanded_trips = []
-for truck_id, trips in trips_by_truck.items():
-    # Calculate total trips for this truck
-    total_trips = sum(trip['trips_planned'] for trip in trips)
-    # Expand each trip
-    for trip in trips:
-        for i in range(trip['trips_planned']):
-            expanded_trips.append({
-                'truck_id': truck_id,
-                'forest_id': trip['forest_id'],
-                'cbm_per_truck': trip['cbm_per_truck'],
-                'profit': trip['profit'],
-                'total_trips_for_truck': total_trips
-            })
-
-# Assign day and trip_number for each truck
-# Sort by truck_id, then preserve order of appearance
-expanded_trips.sort(key=lambda x: int(x['truck_id']))
-
-# For each truck, assign trip_number and day
-trip_counters = defaultdict(int)
-for trip in expanded_trips:
-    truck_id = trip['truck_id']
-    trip_counters[truck_id] += 1
-    trip['trip_number'] = trip_counters[truck_id]
-    trip['day'] = trip_counters[truck_id]  # 1st trip is day 1, etc.
-
-# Write to daily_plan.csv
-with open('daily_plan.csv', 'w', newline='') as csvfile:
-    fieldnames = ['day', 'truck_id', 'forest_id', 'cbm_per_truck', 'profit', 'trip_number', 'total_trips_for_truck']
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-    for trip in expanded_trips:
-        writer.writerow({
-            'day': trip['day'],
-            'truck_id': trip['truck_id'],
-            'forest_id': trip['forest_id'],
-            'cbm_per_truck': trip['cbm_per_truck'],
-            'profit': trip['profit'],
-            'trip_number': trip['trip_number'],
-            'total_trips_for_truck': trip['total_trips_for_truck']
-        })
-
-# Print the daily schedule grouped by day
-def print_daily_schedule(expanded_trips):
-    # Group trips by day
-    trips_by_day = defaultdict(list)
-    for trip in expanded_trips:
-        trips_by_day[trip['day']].append(trip)
-    
-    for day in sorted(trips_by_day.keys(), key=int):
+"""
+Daily plans from a weekly plan (plan.csv).
+
+Every trip is expanded by repeating the plan rows trips_planned times and
+packed into driving days (see scheduler.py). The three orderings are then
+written from that one frame:
+
+    daily_plan.csv                 truck by truck, in driving order
+    daily_plan_by_day.csv          by day, then truck
+    daily_forest_plan_by_day.csv   by day, then forest, then truck
+
+optionally with a Parquet copy of each, and the schedule is only printed
+when asked for. Trips to a forest that is not in forests.csv take a whole
+driving day each (one trip per day), with a warning.
+
+    python daily_plan_generator.py --season rain
+    python daily_plan_generator.py --plan plan.csv --out-dir out --parquet --print
+"""
+
+import argparse
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from perf import spanned
+from scheduler import DAILY_HOURS, forest_trip_hours, schedule_trips
+
+DAILY_PLAN_COLUMNS = ['day', 'truck_id', 'forest_id', 'cbm_per_truck', 'profit',
+                      'trip_number', 'total_trips_for_truck']
+BY_DAY_COLUMNS = ['day', 'truck_id', 'forest_id', 'trip_number', 'total_trips_for_truck',
+                  'cbm_per_truck', 'profit']
+FOREST_BY_DAY_COLUMNS = ['day', 'forest_id', 'truck_id', 'trip_number', 'total_trips_for_truck',
+                         'cbm_per_truck', 'profit']
+
+
+def _print_schedules(by_day: pd.DataFrame, by_forest: pd.DataFrame):
+    trip = by_day['trip_number'].astype(str) + " of " + by_day['total_trips_for_truck'].astype(str)
+    lines = ("  Truck " + by_day['truck_id'].astype(str) + " -> " + by_day['forest_id']
+             + " (Trip " + trip + ")")
+    for day, day_lines in lines.groupby(by_day['day'].to_numpy(), sort=True):
         print(f"Day {day}:")
-        # Sort by truck_id within the day
-        for trip in sorted(trips_by_day[day], key=lambda x: int(x['truck_id'])):
-            print(f"  Truck {trip['truck_id']} -> {trip['forest_id']} (Trip {trip['trip_number']} of {trip['total_trips_for_truck']})")
+        print("\n".join(day_lines))
         print()
 
-# Call the print function at the end
-print_daily_schedule(expanded_trips)
-
-# Write a sorted CSV by day and truck_id
-sorted_trips = sorted(expanded_trips, key=lambda x: (int(x['day']), int(x['truck_id'])))
-with open('daily_plan_by_day.csv', 'w', newline='') as csvfile:
-    fieldnames = ['day', 'truck_id', 'forest_id', 'trip_number', 'total_trips_for_truck', 'cbm_per_truck', 'profit']
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-    for trip in sorted_trips:
-        writer.writerow({
-            'day': trip['day'],
-            'truck_id': trip['truck_id'],
-            'forest_id': trip['forest_id'],
-            'trip_number': trip['trip_number'],
-            'total_trips_for_truck': trip['total_trips_for_truck'],
-            'cbm_per_truck': trip['cbm_per_truck'],
-            'profit': trip['profit']
-        })
-
-def print_and_write_forest_daily_schedule(expanded_trips):
-    from collections import defaultdict
-    # Group by day, then by forest
-    schedule = defaultdict(lambda: defaultdict(list))
-    for trip in expanded_trips:
-        day = trip['day']
-        forest = trip['forest_id']
-        schedule[day][forest].append(trip)
-
-    # Print to console
-    for day in sorted(schedule.keys(), key=int):
+    trucks = (by_forest['truck_id'].astype(str) + " (" + by_forest['trip_number'].astype(str)
+              + ", " + by_forest['total_trips_for_truck'].astype(str) + ")")
+    per_forest = trucks.groupby([by_forest['day'].to_numpy(), by_forest['forest_id'].to_numpy()],
+                                sort=True).agg(", ".join)
+    for day, forests in per_forest.groupby(level=0):
         print(f"Day {day}:")
-        for forest in sorted(schedule[day].keys()):
-            trucks = schedule[day][forest]
-            truck_strs = [f"{t['truck_id']} ({t['trip_number']}, {t['total_trips_for_truck']})" for t in sorted(trucks, key=lambda x: int(x['truck_id']))]
-            print(f"  {forest}: {', '.join(truck_strs)}")
+        print("\n".join(f"  {forest}: {trucks}" for (_, forest), trucks in forests.items()))
         print()
 
-    # Write to CSV
-    with open('daily_forest_plan_by_day.csv', 'w', newline='') as csvfile:
-        fieldnames = ['day', 'forest_id', 'truck_id', 'trip_number', 'total_trips_for_truck', 'cbm_per_truck', 'profit']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for day in sorted(schedule.keys(), key=int):
-            for forest in sorted(schedule[day].keys()):
-                for t in sorted(schedule[day][forest], key=lambda x: int(x['truck_id'])):
-                    writer.writerow({
-                        'day': t['day'],
-                        'forest_id': t['forest_id'],
-                        'truck_id': t['truck_id'],
-                        'trip_number': t['trip_number'],
-                        'total_trips_for_truck': t['total_trips_for_truck'],
-                        'cbm_per_truck': t['cbm_per_truck'],
-                        'profit': t['profit']
-                    })
-
-# Call the new function at the end
-print_and_write_forest_daily_schedule(expanded_trips) 
\ No newline at end of file
+
+@spanned()
+def generate_daily_plans(plan: pd.DataFrame, trip_hours, out_dir=".", parquet=False,
+                         verbose=False) -> pd.DataFrame:
+    """
+    Schedule plan (truck_id, forest_id, trips_planned, cbm_per_truck and
+    optionally profit) and write the three daily plan files into out_dir.
+    trip_hours is what schedule_trips takes: the build_model_input frame or
+    trip hours by forest (forests missing from it get a whole day per
+    trip). Returns the schedule, truck by truck.
+    """
+    plan = plan.assign(forest_id=plan['forest_id'].astype(str).str.strip())
+    if isinstance(trip_hours, pd.Series):
+        missing = sorted(set(plan['forest_id']) - set(trip_hours.index))
+        if missing:
+            print(f"⚠️  No turnaround time for forests {missing}: one trip per day there.")
+            trip_hours = pd.concat([trip_hours, pd.Series(DAILY_HOURS, index=missing)])
+    schedule = schedule_trips(plan, trip_hours)
+
+    truck = schedule['truck_id'].to_numpy()
+    by_day = schedule.iloc[np.lexsort((truck, schedule['day'].to_numpy()))]
+    by_forest = schedule.iloc[np.lexsort((truck, schedule['forest_id'].to_numpy(),
+                                          schedule['day'].to_numpy()))]
+
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, frame, columns in (
+        ('daily_plan', schedule, DAILY_PLAN_COLUMNS),
+        ('daily_plan_by_day', by_day, BY_DAY_COLUMNS),
+        ('daily_forest_plan_by_day', by_forest, FOREST_BY_DAY_COLUMNS),
+    ):
+        frame = frame[[c for c in columns if c in frame.columns]]
+        frame.to_csv(out_dir / f"{name}.csv", index=False)
+        if parquet:
+            frame.to_parquet(out_dir / f"{name}.parquet", index=False)
+
+    if verbose:
+        _print_schedules(by_day, by_forest)
+    return schedule
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plan", default="plan.csv")
+    parser.add_argument("--forests", default="data/forests.csv")
+    parser.add_argument("--season", default="dry", choices=["dry", "rain"])
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--parquet", action="store_true", help="also write .parquet copies")
+    parser.add_argument("--print", dest="verbose", action="store_true",
+                        help="print the daily schedules")
+    args = parser.parse_args()
+
+    # Pack each truck's trips into 10.5 h driving days, using the forests'
+    # real turnaround times for the season
+    schedule = generate_daily_plans(pd.read_csv(args.plan), forest_trip_hours(args.forests, args.season),
+                                    args.out_dir, args.parquet, args.verbose)
+    print(f"✅  {len(schedule)} trips over {schedule['day'].max()} days written to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
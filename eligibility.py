@@ -0,0 +1,104 @@
+"""
+Which trucks may serve which forests, as data.
+
+An EligibilityRule picks a set of trucks (by type prefix and/or id) and
+restricts them, in the given seasons, to forests within max_roundtrip_km
+and/or on a forest whitelist. A pair is eligible when it passes every rule
+that applies to its truck.
+
+Rules are compiled to one boolean mask over trucks and one over forests
+per rule. Trucks hit by the same set of rules share one forest mask, so
+eligible_pairs() emits the pairs group by group and never materialises
+the full trucks x forests product.
+"""
+
+import json
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class EligibilityRule:
+    name: str
+    truck_type: str | None = None        # case-insensitive prefix of trucks.type
+    truck_ids: tuple | None = None
+    seasons: tuple | None = None         # None = every season
+    max_roundtrip_km: float | None = None
+    forests: tuple | None = None         # forest_id whitelist
+
+
+# MAN trucks can only do roundtrip_km <= 500
+DEFAULT_RULES = (
+    EligibilityRule("MAN short haul", truck_type="MAN", max_roundtrip_km=500),
+)
+
+
+def _rule(value) -> EligibilityRule:
+    if isinstance(value, EligibilityRule):
+        return value
+    value = dict(value)
+    for key in ("truck_ids", "seasons", "forests"):
+        if value.get(key) is not None:
+            value[key] = tuple(value[key])
+    return EligibilityRule(**value)
+
+
+def load_rules(path) -> tuple:
+    """Rules from a JSON list of objects with EligibilityRule's fields."""
+    with open(path) as f:
+        return tuple(_rule(r) for r in json.load(f))
+
+
+def save_rules(rules, path):
+    with open(path, "w") as f:
+        json.dump([asdict(_rule(r)) for r in rules], f, indent=2)
+
+
+def compile_rules(rules, trucks: pd.DataFrame, forests: pd.DataFrame, season: str):
+    """
+    Returns (truck_masks, forest_masks), both bool arrays with one row per
+    rule active in season: truck_masks[r] marks the trucks rule r applies
+    to, forest_masks[r] the forests those trucks may still serve.
+    """
+    season = season.lower()
+    rules = [r for r in map(_rule, rules)
+             if r.seasons is None or season in {s.lower() for s in r.seasons}]
+    truck_masks = np.ones((len(rules), len(trucks)), dtype=bool)
+    forest_masks = np.ones((len(rules), len(forests)), dtype=bool)
+    types = trucks["type"].fillna("").str.lower() if "type" in trucks.columns else None
+    for i, r in enumerate(rules):
+        if r.truck_type is not None:
+            if types is None:
+                raise ValueError(f"rule '{r.name}' needs a 'type' column in trucks.csv")
+            truck_masks[i] &= types.str.startswith(r.truck_type.lower()).to_numpy()
+        if r.truck_ids is not None:
+            truck_masks[i] &= trucks["truck_id"].isin(r.truck_ids).to_numpy()
+        if r.max_roundtrip_km is not None:
+            forest_masks[i] &= (forests["roundtrip_km"] <= r.max_roundtrip_km).to_numpy()
+        if r.forests is not None:
+            forest_masks[i] &= forests["forest_id"].isin(r.forests).to_numpy()
+    return truck_masks, forest_masks
+
+
+def eligible_pairs(trucks: pd.DataFrame, forests: pd.DataFrame, season: str,
+                   rules=DEFAULT_RULES):
+    """
+    Positional (truck_idx, forest_idx) arrays of every eligible pair, in
+    the same truck-major order as a cross join.
+    """
+    truck_masks, forest_masks = compile_rules(rules, trucks, forests, season)
+    # trucks hit by the same rules share one forest mask
+    signature, group = np.unique(truck_masks.T, axis=0, return_inverse=True)
+    group = group.ravel()
+    truck_idx, forest_idx = [], []
+    for g, applies in enumerate(signature):
+        members = np.flatnonzero(group == g)
+        allowed = np.flatnonzero(forest_masks[applies].all(axis=0))
+        truck_idx.append(np.repeat(members, len(allowed)))
+        forest_idx.append(np.tile(allowed, len(members)))
+    truck_idx = np.concatenate(truck_idx) if truck_idx else np.empty(0, dtype=np.int64)
+    forest_idx = np.concatenate(forest_idx) if forest_idx else np.empty(0, dtype=np.int64)
+    order = np.lexsort((forest_idx, truck_idx))
+    return truck_idx[order], forest_idx[order]
@@ -1,130 +1,290 @@
-import networkx as nx
+import numpy as np
 import pandas as pd
+from ortools.graph.python import min_cost_flow
 
+from perf import say, spanned
+
+# arc costs must be integers; CBM is scaled so half loads stay exact
+COST_SCALE = 100
+# top_up counts hours in whole thousandths, and a load as LOAD_COST / turnaround
+HOUR = 1000
+LOAD_COST = 10**9
+# keys of the dicts top_up returns
+TOP_UP_COLUMNS = ["truck_id", "forest_id", "kind", "trips", "cbm_collected", "hours_used"]
+
+
+def _pairs(idle_df: pd.DataFrame, forests_df: pd.DataFrame, eligible=None):
+    """
+    Every idle truck x leftover forest pair as positional index arrays,
+    truck-major. eligible (e.g. the build_model_input index) restricts
+    them to allowed (truck_id, forest_id) pairs.
+    """
+    n_trucks, n_forests = len(idle_df), len(forests_df)
+    truck_idx = np.repeat(np.arange(n_trucks), n_forests)
+    forest_idx = np.tile(np.arange(n_forests), n_trucks)
+    if eligible is not None:
+        pairs = pd.MultiIndex.from_arrays([
+            idle_df["truck_id"].to_numpy()[truck_idx],
+            forests_df["forest_id"].to_numpy()[forest_idx],
+        ])
+        ok = pairs.isin(eligible)
+        truck_idx, forest_idx = truck_idx[ok], forest_idx[ok]
+    return truck_idx, forest_idx
+
+
+def _solve_network(source, sink, tails, heads, caps, costs, supply=None) -> np.ndarray:
+    """
+    Max flow from source to sink, cheapest among the maximum flows; flow per
+    arc. With supply, exactly that much flow at the least cost instead.
+    """
+    caps = np.asarray(caps, dtype=np.int64)
+    keep = caps > 0
+    flow = np.zeros(len(caps), dtype=np.int64)
+    if not keep.any():
+        return flow
+    smcf = min_cost_flow.SimpleMinCostFlow()
+    arcs = smcf.add_arcs_with_capacity_and_unit_cost(
+        np.asarray(tails)[keep], np.asarray(heads)[keep], caps[keep],
+        np.asarray(costs, dtype=np.int64)[keep])
+    smcf.add_arc_with_capacity_and_unit_cost(sink, sink, 0, 0)  # make sure the sink node exists
+    if supply is None:
+        supply = int(caps[keep][np.asarray(tails)[keep] == source].sum())
+        solve = smcf.solve_max_flow_with_min_cost
+    else:
+        solve = smcf.solve
+    smcf.set_node_supply(source, int(supply))
+    smcf.set_node_supply(sink, -int(supply))
+    status = solve()
+    if status != smcf.OPTIMAL:
+        raise RuntimeError(f"min cost flow failed: {status}")
+    flow[keep] = smcf.flows(arcs)
+    return flow
+
+
+def _max_flow_min_cost(n_trucks, n_forests, source_cap, sink_cap,
+                       truck_idx, forest_idx, pair_cap, pair_cost):
+    """
+    S -> trucks -> forests -> T. Nodes: S = 0, trucks 1.., forests after,
+    T last. Returns the flow on each truck -> forest pair.
+    """
+    source, sink = 0, n_trucks + n_forests + 1
+    trucks = np.arange(1, n_trucks + 1)
+    forests = np.arange(n_trucks + 1, n_trucks + n_forests + 1)
+    tails = np.concatenate([np.full(n_trucks, source), trucks[truck_idx], forests])
+    heads = np.concatenate([trucks, forests[forest_idx], np.full(n_forests, sink)])
+    caps = np.concatenate([source_cap, pair_cap, sink_cap])
+    costs = np.concatenate([np.zeros(n_trucks), pair_cost, np.zeros(n_forests)])
+    flow = _solve_network(source, sink, tails, heads, caps, costs)
+    return flow[n_trucks:n_trucks + len(pair_cap)]
+
+
+@spanned()
 def top_up_with_flow(idle_df: pd.DataFrame,
-                     forests_df: pd.DataFrame) -> list[dict]:
+                     forests_df: pd.DataFrame,
+                     eligible=None) -> list[dict]:
     """
     Parameters
     ----------
     idle_df       columns = truck_id, available_hours, type
     forests_df    columns = forest_id, turnaround_time, cbm_per_truck, volume_left
+    eligible      optional (truck_id, forest_id) pairs trucks may serve,
+                  e.g. the index of the build_model_input frame
 
     Returns
     -------
     assignments   list of dicts with keys:
                   truck_id, forest_id, trips, cbm_collected, hours_used
     """
-    print("Idle trucks for max-flow:", len(idle_df))
-    print("Forests with leftover volume:", len(forests_df))
-    print(idle_df)
-    print(forests_df)
-
-    G = nx.DiGraph()
-    G.add_node("S"); G.add_node("T")
-
-    # source → truck
-    for _, t in idle_df.iterrows():
-        max_trips_anywhere = int(t.available_hours // forests_df.turnaround_time.min())
-        if max_trips_anywhere:
-            G.add_edge("S", t.truck_id, capacity=max_trips_anywhere)
-
-    # forest → sink
-    for _, f in forests_df.iterrows():
-        trips_left = int(f.volume_left // f.cbm_per_truck)
-        if trips_left:
-            G.add_edge(f.forest_id, "T", capacity=trips_left)
+    say("Idle trucks for max-flow:", len(idle_df))
+    say("Forests with leftover volume:", len(forests_df))
+    say(idle_df)
+    say(forests_df)
 
     # Ensure profit_per_trip is in forests_df
     if 'profit_per_cbm_euros' in forests_df.columns:
         forests_df['profit_per_trip'] = forests_df['cbm_per_truck'] * forests_df['profit_per_cbm_euros']
     else:
         forests_df['profit_per_trip'] = 0
-    # truck → forest edges
-    for _, t in idle_df.iterrows():
-        for _, f in forests_df.iterrows():
-            trips_cap = int(min(
-                t.available_hours // f.turnaround_time,
-                f.volume_left // f.cbm_per_truck))
-            if trips_cap:
-                G.add_edge(t.truck_id, f.forest_id,
-                           capacity=trips_cap,
-                           #weight=-f.profit_per_trip) # maximise profit 
-                           weight=0)   # test with zero weights
-
-    flow = nx.max_flow_min_cost(G, "S", "T")
+    if idle_df.empty or forests_df.empty:
+        return []
+
+    hours = idle_df["available_hours"].to_numpy(dtype=float)
+    turnaround = forests_df["turnaround_time"].to_numpy(dtype=float)
+    cbm = forests_df["cbm_per_truck"].to_numpy(dtype=float)
+    # forest → sink: whole loads left
+    trips_left = forests_df["volume_left"].to_numpy(dtype=float) // cbm
+
+    # source → truck: trips it could do at the nearest forest
+    source_cap = hours // turnaround.min()
+    truck_idx, forest_idx = _pairs(idle_df, forests_df, eligible)
+    # truck → forest: trips that fit both the truck's hours and the volume
+    pair_cap = np.minimum(hours[truck_idx] // turnaround[forest_idx], trips_left[forest_idx])
+    pair_cost = np.zeros(len(truck_idx))  # zero weights: any maximum flow
+    flow = _max_flow_min_cost(len(hours), len(cbm), source_cap, trips_left,
+                              truck_idx, forest_idx, pair_cap, pair_cost)
 
     # ------------------ decode ------------------
-    assignments = []
-    for t in idle_df.truck_id:
-        if t not in flow: continue
-        for f, trips in flow[t].items():
-            if trips:
-                forest_row = forests_df.set_index('forest_id').loc[f]
-                cbm = trips * forest_row.cbm_per_truck
-                assignments.append(dict(
-                    truck_id=t,
-                    forest_id=f,
-                    trips=int(trips),
-                    cbm_collected=cbm,
-                    hours_used=trips * forest_row.turnaround_time
-                ))
-    return assignments
+    used = np.flatnonzero(flow)
+    truck_ids = idle_df["truck_id"].to_numpy()[truck_idx[used]].tolist()
+    forest_ids = forests_df["forest_id"].to_numpy()[forest_idx[used]].tolist()
+    trips = flow[used]
+    return [
+        dict(truck_id=t, forest_id=f, trips=int(n), cbm_collected=c, hours_used=h)
+        for t, f, n, c, h in zip(truck_ids, forest_ids, trips,
+                                 (trips * cbm[forest_idx[used]]).tolist(),
+                                 (trips * turnaround[forest_idx[used]]).tolist())
+    ]
 
-def half_trip_maxflow(idle_df: pd.DataFrame, forests_df: pd.DataFrame) -> list[dict]:
+
+@spanned()
+def half_trip_maxflow(idle_df: pd.DataFrame, forests_df: pd.DataFrame,
+                      eligible=None) -> list[dict]:
     """
     Assigns 'half-trips' from idle trucks to forests with leftover volume.
     Each truck-forest pair is eligible if:
       - available_hours >= turnaround_time / 2
       - volume_left >= cbm_per_truck / 2
+      - it is in eligible, when given
 
     Returns a list of assignments:
       - truck_id, forest_id, trips (always 0.5), cbm_collected, hours_used
     """
-    G = nx.DiGraph()
-    G.add_node("S")
-    G.add_node("T")
+    if idle_df.empty or forests_df.empty:
+        return []
+    hours = idle_df["available_hours"].to_numpy(dtype=float)
+    turnaround = forests_df["turnaround_time"].to_numpy(dtype=float)
+    cbm = forests_df["cbm_per_truck"].to_numpy(dtype=float)
+    volume = forests_df["volume_left"].to_numpy(dtype=float)
 
     # Source → truck (each truck can do at most one half-trip)
-    for _, t in idle_df.iterrows():
-        if t.available_hours > 0:
-            G.add_edge("S", t.truck_id, capacity=1)
-
+    source_cap = (hours > 0).astype(int)
     # Forest → sink (each forest can accept as many half-trips as it has volume for)
-    for _, f in forests_df.iterrows():
-        max_half_trips = int(f.volume_left // (f.cbm_per_truck / 2))
-        if max_half_trips > 0:
-            G.add_edge(f.forest_id, "T", capacity=max_half_trips)
-
+    sink_cap = volume // (cbm / 2)
     # Truck → forest (only if both half-trip constraints are met)
-    for _, t in idle_df.iterrows():
-        for _, f in forests_df.iterrows():
-            if (
-                t.available_hours >= f.turnaround_time / 2
-                and f.volume_left >= f.cbm_per_truck / 2
-            ):
-                G.add_edge(
-                    t.truck_id,
-                    f.forest_id,
-                    capacity=1,  # Only one half-trip per truck-forest pair
-                    weight=-f.cbm_per_truck / 2,  # maximize CBM
-                )
-
-    flow = nx.max_flow_min_cost(G, "S", "T")
+    truck_idx, forest_idx = _pairs(idle_df, forests_df, eligible)
+    pair_cap = ((hours[truck_idx] >= turnaround[forest_idx] / 2)
+                & (volume[forest_idx] >= cbm[forest_idx] / 2)).astype(int)
+    pair_cost = np.rint(-cbm[forest_idx] / 2 * COST_SCALE)  # maximize CBM
+    flow = _max_flow_min_cost(len(hours), len(cbm), source_cap, sink_cap,
+                              truck_idx, forest_idx, pair_cap, pair_cost)
 
     # Decode assignments
-    assignments = []
-    for t in idle_df.truck_id:
-        if t not in flow:
+    used = np.flatnonzero(flow)
+    truck_ids = idle_df["truck_id"].to_numpy()[truck_idx[used]].tolist()
+    forest_ids = forests_df["forest_id"].to_numpy()[forest_idx[used]].tolist()
+    return [
+        dict(truck_id=t, forest_id=f, trips=0.5,
+             cbm_collected=c,  # full cbm_per_truck, not halved
+             hours_used=h)
+        for t, f, c, h in zip(truck_ids, forest_ids,
+                              cbm[forest_idx[used]].tolist(),
+                              (turnaround[forest_idx[used]] / 2).tolist())
+    ]
+
+
+def _hours_flow(left_hours, turnaround, loads_left, truck_idx, forest_idx):
+    """
+    Full trips measured in truck hours: S -> truck (its hours left) ->
+    forest (whole trips of hours the pair fits) -> T (loads left, in
+    hours). Each hour into a forest costs -1/turnaround, so the cheapest
+    flow moves the most loads; a bypass S -> T takes the hours nobody can
+    use. Trips are the flow rounded down per pair, so no truck goes over
+    its hours. All inputs in integer HOUR units.
+    """
+    n_trucks, n_forests = len(left_hours), len(turnaround)
+    pair_cap = np.minimum(left_hours[truck_idx] // turnaround[forest_idx],
+                          loads_left[forest_idx]) * turnaround[forest_idx]
+    source, sink = 0, n_trucks + n_forests + 1
+    truck_node = 1 + np.arange(n_trucks)
+    forest_node = 1 + n_trucks + np.arange(n_forests)
+    tails = np.concatenate([np.full(n_trucks, source), truck_node[truck_idx], forest_node, [source]])
+    heads = np.concatenate([truck_node, forest_node[forest_idx], np.full(n_forests, sink), [sink]])
+    caps = np.concatenate([left_hours, pair_cap, loads_left * turnaround, [left_hours.sum()]])
+    costs = np.concatenate([np.zeros(n_trucks + len(pair_cap)), -(LOAD_COST // turnaround), [0]])
+    flow = _solve_network(source, sink, tails, heads, caps, costs, supply=left_hours.sum())
+    return flow[n_trucks:n_trucks + len(pair_cap)] // turnaround[forest_idx]
+
+
+def _fill(left_hours, turnaround, loads_left, truck_idx, forest_idx, trips):
+    """Whole trips into what the rounding left, shortest turnaround first (in place)."""
+    by_forest = np.argsort(forest_idx, kind="stable")
+    starts = np.searchsorted(forest_idx[by_forest], np.arange(len(turnaround) + 1))
+    for f in np.argsort(turnaround, kind="stable"):
+        if loads_left[f] <= 0:
             continue
-        for f, trips in flow[t].items():
-            if trips:
-                forest_row = forests_df.set_index('forest_id').loc[f]
-                cbm = forest_row.cbm_per_truck  # always full volume for a half trip
-                assignments.append(dict(
-                    truck_id=t,
-                    forest_id=f,
-                    trips=0.5,
-                    cbm_collected=cbm,  # full cbm_per_truck, not halved
-                    hours_used=forest_row.turnaround_time / 2
-                ))
-    return assignments 
\ No newline at end of file
+        pairs = by_forest[starts[f]:starts[f + 1]]
+        can = left_hours[truck_idx[pairs]] // turnaround[f]
+        take = np.minimum(can, np.maximum(loads_left[f] - (np.cumsum(can) - can), 0))
+        trips[pairs] += take
+        left_hours[truck_idx[pairs]] -= take * turnaround[f]
+        loads_left[f] -= take.sum()
+
+
+@spanned()
+def top_up(idle_df: pd.DataFrame, forests_df: pd.DataFrame, eligible=None) -> list[dict]:
+    """
+    Full trips and half trips for idle trucks out of the same leftover
+    volume, without booking any truck past its available_hours:
+
+      1. full trips: a min-cost flow in truck hours (see _hours_flow),
+         rounded down per pair, then whatever whole trips still fit,
+         shortest turnaround first
+      2. half trips in the hours the full trips left: S -> truck -> forest
+         -> T with one unit per truck and the loads still left at each
+         forest; a half trip brings back a full load, as in
+         half_trip_maxflow
+
+    Both steps draw on one count of loads left per forest, so no volume is
+    counted twice. Columns as in top_up_with_flow, plus eligible.
+
+    Returns a list of dicts with keys:
+      truck_id, forest_id, kind ("full" / "half"), trips (int, or 0.5 for a
+      half trip), cbm_collected, hours_used
+    """
+    if idle_df.empty or forests_df.empty:
+        return []
+    hours = idle_df["available_hours"].to_numpy(dtype=float)
+    turnaround = forests_df["turnaround_time"].to_numpy(dtype=float)
+    cbm = forests_df["cbm_per_truck"].to_numpy(dtype=float)
+    loads = (forests_df["volume_left"].to_numpy(dtype=float) // cbm).astype(np.int64)
+    n_trucks, n_forests = len(hours), len(cbm)
+    truck_idx, forest_idx = _pairs(idle_df, forests_df, eligible)
+    # whole HOUR units, rounded so that no truck can end up over its hours
+    left_hours = np.floor(np.maximum(hours, 0) * HOUR + 1e-6).astype(np.int64)
+    turn_u = np.maximum(np.ceil(turnaround * HOUR - 1e-6), 1).astype(np.int64)
+    pair_turn = turn_u[forest_idx]
+
+    # 1. full trips
+    full_flow = _hours_flow(left_hours, turn_u, loads, truck_idx, forest_idx)
+    left_hours -= np.bincount(truck_idx, weights=full_flow * pair_turn, minlength=n_trucks).astype(np.int64)
+    loads_left = loads - np.bincount(forest_idx, weights=full_flow, minlength=n_forests).astype(np.int64)
+    _fill(left_hours, turn_u, loads_left, truck_idx, forest_idx, full_flow)
+
+    # 2. half trips, preferring the shorter ones
+    truck_node = 1 + np.arange(n_trucks)
+    forest_node = 1 + n_trucks + np.arange(n_forests)
+    source, sink = 0, n_trucks + n_forests + 1
+    half_cap = ((2 * left_hours[truck_idx] >= pair_turn) & (loads_left[forest_idx] >= 1)).astype(np.int64)
+    flow = _solve_network(
+        source, sink,
+        np.concatenate([np.full(n_trucks, source), truck_node[truck_idx], forest_node]),
+        np.concatenate([truck_node, forest_node[forest_idx], np.full(n_forests, sink)]),
+        np.concatenate([np.ones(n_trucks), half_cap, loads_left]),
+        np.concatenate([np.zeros(n_trucks), pair_turn // 2, np.zeros(n_forests)]))
+    half_flow = flow[n_trucks:n_trucks + len(truck_idx)]
+
+    # ------------------ decode ------------------
+    truck_ids = idle_df["truck_id"].to_numpy()
+    forest_ids = forests_df["forest_id"].to_numpy()
+    assignments = []
+    for kind, pair_flow in (("full", full_flow), ("half", half_flow)):
+        used = np.flatnonzero(pair_flow)
+        t, f, n = truck_idx[used], forest_idx[used], pair_flow[used]
+        trips = n if kind == "full" else np.full(len(used), 0.5)
+        hours_used = n * turnaround[f] if kind == "full" else turnaround[f] / 2
+        assignments += [
+            dict(truck_id=ti, forest_id=fi, kind=kind, trips=tr, cbm_collected=c, hours_used=h)
+            for ti, fi, tr, c, h in zip(truck_ids[t].tolist(), forest_ids[f].tolist(),
+                                        trips.tolist(), (n * cbm[f]).tolist(), hours_used.tolist())
+        ]
+    return assignments
@@ -0,0 +1,177 @@
+"""
+History of weekly runs as a Parquet dataset, partitioned by week and season.
+
+Every run appends, under its own run_id, one file to each of four tables:
+
+    history/forests/week=2026-W42/season=dry/<run_id>-0.parquet
+    history/trucks/...      the normalised inputs (as preprocess reads them)
+    history/plans/...       the weekly plan
+    history/top_ups/...     the max-flow top-up assignments
+
+Queries name the columns they need and the weeks / season they cover, so
+pyarrow only opens the partitions involved and only decodes those columns,
+however many years of history the folder holds.
+
+    python history.py --weeks 8 --season dry     # CBM per forest, last 8 weeks
+    python history.py --runs
+"""
+
+import argparse
+import datetime
+import pathlib
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from preprocess import FORESTS_SCHEMA, TRUCKS_SCHEMA, read_forests, read_trucks
+
+HISTORY_DIR = "history"
+PARTITIONING = ds.partitioning(pa.schema([("week", pa.string()), ("season", pa.string())]),
+                               flavor="hive")
+_RUN_FIELDS = [("run_id", pa.string()), ("recorded_at", pa.timestamp("s"))]
+SCHEMAS = {
+    "forests": pa.schema(list(FORESTS_SCHEMA.items()) + _RUN_FIELDS),
+    "trucks": pa.schema(list(TRUCKS_SCHEMA.items()) + _RUN_FIELDS),
+    "plans": pa.schema([
+        ("truck_id", pa.int64()),
+        ("forest_id", pa.string()),
+        ("trips_planned", pa.int64()),
+        ("cbm_per_truck", pa.float64()),
+        ("profit", pa.float64()),
+    ] + _RUN_FIELDS),
+    "top_ups": pa.schema([
+        ("truck_id", pa.int64()),
+        ("forest_id", pa.string()),
+        ("kind", pa.string()),
+        ("trips", pa.float64()),
+        ("cbm_collected", pa.float64()),
+        ("hours_used", pa.float64()),
+        ("profit", pa.float64()),
+    ] + _RUN_FIELDS),
+}
+
+
+def week_of(day=None) -> str:
+    """ISO week of day (default today) as '2026-W42'; sorts in time order."""
+    year, week, _ = (day or datetime.date.today()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _table(frame: pd.DataFrame, schema: pa.Schema, run_id, recorded_at) -> pa.Table:
+    """frame cast to schema; columns it lacks are null, extra ones are dropped."""
+    frame = frame.assign(run_id=run_id, recorded_at=recorded_at)
+    columns = {f.name: (pa.array(frame[f.name], type=f.type, from_pandas=True) if f.name in frame
+                        else pa.nulls(len(frame), f.type)) for f in schema}
+    return pa.table(columns, schema=schema)
+
+
+def record_run(forests, trucks, plan: pd.DataFrame, top_up=None, season="dry", week=None,
+               root=HISTORY_DIR, run_id=None) -> str:
+    """
+    Append one run to the history under root. forests / trucks are the input
+    CSVs (path, bytes or file-like) or frames already read by preprocess;
+    top_up is the top-up assignments (list of dicts or a frame), if any.
+    Returns the run_id.
+    """
+    if not isinstance(forests, pd.DataFrame):
+        forests = read_forests(forests)
+    if not isinstance(trucks, pd.DataFrame):
+        trucks = read_trucks(trucks)
+    top_up = pd.DataFrame(top_up if top_up is not None else [])
+    recorded_at = datetime.datetime.now().replace(microsecond=0)
+    run_id = run_id or f"{recorded_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+    week, season = week or week_of(), season.lower()
+
+    for name, frame in (("forests", forests), ("trucks", trucks), ("plans", plan), ("top_ups", top_up)):
+        table = _table(frame, SCHEMAS[name], run_id, recorded_at)
+        table = table.append_column("week", pa.array([week] * len(table), pa.string()))
+        table = table.append_column("season", pa.array([season] * len(table), pa.string()))
+        ds.write_dataset(table, pathlib.Path(root) / name, format="parquet",
+                         partitioning=PARTITIONING, basename_template=f"{run_id}-{{i}}.parquet",
+                         existing_data_behavior="overwrite_or_ignore")
+    return run_id
+
+
+def weeks(table="plans", season=None, root=HISTORY_DIR) -> list:
+    """Weeks with history in table (for season), oldest first, from the folder names alone."""
+    pattern = f"week=*/season={season.lower()}" if season else "week=*"
+    found = {p.relative_to(pathlib.Path(root) / table).parts[0].split("=", 1)[1]
+             for p in (pathlib.Path(root) / table).glob(pattern)}
+    return sorted(found)
+
+
+def read_history(table, columns=None, weeks=None, season=None, root=HISTORY_DIR) -> pd.DataFrame:
+    """
+    Rows of table (forests, trucks, plans or top_ups), restricted to columns
+    and to the given weeks and season. week and season can be asked for as
+    columns too.
+    """
+    schema = pa.unify_schemas([SCHEMAS[table], PARTITIONING.schema])
+    path = pathlib.Path(root) / table
+    if not path.exists():
+        return schema.empty_table().select(columns or schema.names).to_pandas()
+    dataset = ds.dataset(path, schema=schema, format="parquet", partitioning=PARTITIONING)
+    where = None
+    if weeks is not None:
+        where = ds.field("week").isin(list(weeks))
+    if season is not None:
+        by_season = ds.field("season") == season.lower()
+        where = by_season if where is None else where & by_season
+    return dataset.to_table(columns=columns, filter=where).to_pandas()
+
+
+def cbm_per_forest(last_weeks=8, season=None, top_ups=False, root=HISTORY_DIR) -> pd.DataFrame:
+    """
+    Planned CBM per forest (rows) and week (columns) over the last_weeks
+    weeks with history, from each week's latest run. top_ups adds the CBM
+    of the top-up assignments.
+    """
+    recent = weeks("plans", season, root)[-last_weeks:]
+    keys = ["forest_id", "week", "season", "run_id"]
+    plans = read_history("plans", keys + ["trips_planned", "cbm_per_truck"], recent, season, root)
+    plans["cbm"] = plans["trips_planned"] * plans["cbm_per_truck"]
+    parts = [plans[keys + ["cbm"]]]
+    if top_ups:
+        extra = read_history("top_ups", keys + ["cbm_collected"], recent, season, root)
+        parts.append(extra.rename(columns={"cbm_collected": "cbm"}))
+    cbm = pd.concat(parts, ignore_index=True)
+    # run_ids start with their timestamp, so the largest is the latest run
+    latest = cbm.groupby(["week", "season"])["run_id"].transform("max")
+    cbm = cbm[cbm["run_id"] == latest]
+    table = cbm.pivot_table(index="forest_id", columns="week", values="cbm", aggfunc="sum", fill_value=0)
+    return table.reindex(columns=recent, fill_value=0)
+
+
+def runs(season=None, root=HISTORY_DIR) -> pd.DataFrame:
+    """One row per recorded run: week, season, trips and CBM of its plan."""
+    plans = read_history("plans", ["run_id", "recorded_at", "week", "season", "trips_planned", "cbm_per_truck"],
+                         season=season, root=root)
+    plans["cbm"] = plans["trips_planned"] * plans["cbm_per_truck"]
+    return (plans.groupby(["run_id", "recorded_at", "week", "season"], as_index=False)
+                 .agg(trips=("trips_planned", "sum"), cbm=("cbm", "sum"))
+                 .sort_values("run_id", ignore_index=True))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", default=HISTORY_DIR)
+    ap.add_argument("--season", choices=["dry", "rain"], default=None)
+    ap.add_argument("--weeks", type=int, default=8)
+    ap.add_argument("--top-ups", action="store_true", help="include the top-up assignments' CBM")
+    ap.add_argument("--runs", action="store_true", help="list the recorded runs instead")
+    args = ap.parse_args()
+
+    if args.runs:
+        print(runs(args.season, args.root).to_markdown(index=False, floatfmt=",.0f"))
+        return
+    table = cbm_per_forest(args.weeks, args.season, args.top_ups, args.root)
+    if table.empty:
+        print(f"No history under {args.root}")
+        return
+    print(table.to_markdown(floatfmt=",.0f"))
+
+
+if __name__ == "__main__":
+    main()
@@ -300,66 +300,982 @@
 
 
 import math
+import os
+import time
+from dataclasses import asdict, dataclass, replace
+
+import numpy as np
 import pandas as pd
-from ortools.linear_solver import pywraplp
+from ortools.linear_solver import linear_solver_pb2, pywraplp
+from ortools.linear_solver.python import model_builder_helper as mbh
+from ortools.sat.python import cp_model
 
-def solve_week(df: pd.DataFrame, maximize_profit=False) -> pd.DataFrame:
-    solver = pywraplp.Solver.CreateSolver("CBC")
+from perf import say, span, spanned
 
-    n_trucks = df.index.get_level_values(0).nunique()
-    n_forests = df.index.get_level_values(1).nunique()
-    print(f"Number of trucks: {n_trucks}")
-    print(f"Number of forests: {n_forests}")
-    print(f"Number of variables (truck-forest pairs): {len(df)}")
-
-    var = {}
-    for (t, f), row in df.iterrows():
-        if row.trip_hours > 0:
-            phys_lim = math.floor(row.drive_hours / row.trip_hours)
-        else:
-            phys_lim = 0
-        ub = min(max(0, phys_lim), 15)
-        var[(t, f)] = solver.IntVar(0, ub, f"x_{t}_{f}")
-
-    for t, t_rows in df.groupby(level=0):
-        solver.Add(
-            solver.Sum(row.trip_hours * var[(t, f)]
-                       for (_, f), row in t_rows.iterrows())
-            <= t_rows.drive_hours.iloc[0]
-        )
+MAX_TRIPS_PER_PAIR = 15
+TIME_LIMIT_MS = 5000
+MINUTES_PER_HOUR = 60
+OBJECTIVE_SCALE = 100
+MIN_CPSAT_WORKERS = 8
+MAX_TRIP_PATTERNS = 20000
+
+
+@dataclass
+class SparseModel:
+    """
+    A maximisation model in coordinate form: variable bounds, objective and
+    integrality, plus "<= rhs" rows given as (row, col, coef) triplets
+    sorted by row.
+    """
+    lower: np.ndarray
+    upper: np.ndarray
+    objective: np.ndarray
+    integer: np.ndarray
+    row: np.ndarray
+    col: np.ndarray
+    coef: np.ndarray
+    rhs: np.ndarray
+
+    @property
+    def n_vars(self) -> int:
+        return len(self.lower)
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.rhs)
 
-    for f, f_rows in df.groupby(level=1):
-        solver.Add(
-            solver.Sum(row.cbm_per_truck * var[(t, f)]
-                       for (t, _), row in f_rows.iterrows())
-            <= f_rows.weekly_stockpile_cbm.iloc[0]
+    def row_slices(self):
+        """(row, slice into col/coef) for every row, in row order."""
+        bounds = np.searchsorted(self.row, np.arange(self.n_rows + 1))
+        for r in range(self.n_rows):
+            yield r, slice(bounds[r], bounds[r + 1])
+
+
+@dataclass
+class ModelArrays:
+    """
+    The weekly MILP as flat NumPy arrays, one entry per (truck, forest) pair
+    in the row order of the build_model_input frame.
+
+    truck_row / forest_row give the constraint row each variable sits in;
+    truck_ids / forest_ids are the labels of those rows (sorted, the same
+    order groupby would visit them in).
+    """
+    truck_id: np.ndarray
+    forest_id: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    objective: np.ndarray
+    trip_hours: np.ndarray
+    cbm_per_truck: np.ndarray
+    truck_row: np.ndarray
+    forest_row: np.ndarray
+    truck_ids: np.ndarray
+    forest_ids: np.ndarray
+    truck_hours: np.ndarray
+    forest_cbm: np.ndarray
+
+    @property
+    def n_vars(self) -> int:
+        return len(self.truck_id)
+
+    def to_sparse(self) -> SparseModel:
+        """One hours row per truck, then one volume row per forest."""
+        by_truck = np.argsort(self.truck_row, kind="stable")
+        by_forest = np.argsort(self.forest_row, kind="stable")
+        return SparseModel(
+            lower=self.lower,
+            upper=self.upper,
+            objective=self.objective,
+            integer=np.ones(self.n_vars, dtype=bool),
+            row=np.concatenate([self.truck_row[by_truck],
+                                len(self.truck_ids) + self.forest_row[by_forest]]),
+            col=np.concatenate([by_truck, by_forest]),
+            coef=np.concatenate([self.trip_hours[by_truck],
+                                 self.cbm_per_truck[by_forest]]).astype(float),
+            rhs=np.concatenate([self.truck_hours, self.forest_cbm]).astype(float),
         )
 
+
+def model_arrays(df: pd.DataFrame, maximize_profit=False) -> ModelArrays:
+    """Flatten the build_model_input frame into bounds, rows and objective."""
+    truck_id = df.index.get_level_values(0).to_numpy()
+    forest_id = df.index.get_level_values(1).to_numpy()
+    trip_hours = df["trip_hours"].to_numpy(dtype=float)
+    drive_hours = df["drive_hours"].to_numpy(dtype=float)
+    cbm = df["cbm_per_truck"].to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        phys_lim = np.where(trip_hours > 0, np.floor(drive_hours / trip_hours), 0)
+    upper = np.clip(phys_lim, 0, MAX_TRIPS_PER_PAIR)
+    if "max_trips" in df.columns:
+        # optional per-pair cap, e.g. what is left of a monthly trip limit
+        upper = np.minimum(upper, df["max_trips"].fillna(MAX_TRIPS_PER_PAIR).to_numpy(dtype=float))
+
+    objective = cbm.astype(float)
     if maximize_profit:
-        total_profit = solver.Sum(df.loc[(t, f), "cbm_per_truck"] * df.loc[(t, f), "profit_per_cbm_euros"] * var[(t, f)] for (t, f) in var)
-        solver.Maximize(total_profit)
-    else:
-        total_cbm = solver.Sum(df.loc[(t, f), "cbm_per_truck"] * var[(t, f)] for (t, f) in var)
-        solver.Maximize(total_cbm)
+        objective = objective * df["profit_per_cbm_euros"].to_numpy(dtype=float)
 
-    solver.set_time_limit(5000)
+    truck_row, truck_ids = pd.factorize(truck_id, sort=True)
+    forest_row, forest_ids = pd.factorize(forest_id, sort=True)
+    # the first row of each group carries that group's capacity
+    truck_hours = drive_hours[np.unique(truck_row, return_index=True)[1]]
+    forest_cbm = df["weekly_stockpile_cbm"].to_numpy(dtype=float)[
+        np.unique(forest_row, return_index=True)[1]
+    ]
 
-    status = solver.Solve()
-    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
-        raise RuntimeError("CBC did not find an optimal or feasible solution within the time limit")
-    if status == pywraplp.Solver.FEASIBLE:
-        print("⚠️  Time limit reached: returning best feasible solution found.")
+    return ModelArrays(
+        truck_id=truck_id,
+        forest_id=forest_id,
+        lower=np.zeros(len(df)),
+        upper=upper,
+        objective=objective,
+        trip_hours=trip_hours,
+        cbm_per_truck=cbm,
+        truck_row=truck_row,
+        forest_row=forest_row,
+        truck_ids=np.asarray(truck_ids),
+        forest_ids=np.asarray(forest_ids),
+        truck_hours=truck_hours,
+        forest_cbm=forest_cbm,
+    )
 
-    plan = (
-        pd.DataFrame(
-            [(t, f, int(var[(t, f)].solution_value())) for (t, f) in var],
-            columns=["truck_id", "forest_id", "trips_planned"],
+
+@dataclass
+class PresolveReport:
+    """How much each presolve reduction shrank the per-truck model."""
+    n_vars: int
+    n_rows: int
+    bounds_tightened: int = 0  # upper bounds cut by the forest volume
+    zero_bound: int = 0        # pairs that cannot fit a single trip
+    no_value: int = 0          # pairs with objective <= 0
+    dominated: int = 0         # pairs another pair of the truck always beats
+    n_vars_after: int = 0
+    n_rows_after: int = 0
+
+    def __str__(self):
+        return (f"Presolve: {self.n_vars} -> {self.n_vars_after} variables, "
+                f"{self.n_rows} -> {self.n_rows_after} rows "
+                f"({self.bounds_tightened} bounds tightened, {self.zero_bound} zero-bound, "
+                f"{self.no_value} no-value, {self.dominated} dominated pairs dropped)")
+
+
+def _hour_bound(arrays: ModelArrays) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(arrays.trip_hours > 0,
+                        np.floor(arrays.truck_hours[arrays.truck_row] / arrays.trip_hours), 0)
+
+
+def _dominated(arrays: ModelArrays, upper, keep) -> np.ndarray:
+    """
+    Pairs (t, f) for which truck t has a pair (t, g) with trip_hours no
+    longer and objective no smaller (strictly better in one), where g's
+    forest row can never bind and x_tg is only bounded by t's hours. Moving
+    every f trip to g then stays feasible and does not lose objective.
+    """
+    load = np.bincount(arrays.forest_row[keep], weights=(upper * arrays.cbm_per_truck)[keep],
+                       minlength=len(arrays.forest_ids))
+    free_forest = load <= arrays.forest_cbm
+    dominator = keep & free_forest[arrays.forest_row] & (upper == _hour_bound(arrays))
+
+    idx = np.flatnonzero(keep)
+    pairs = pd.DataFrame({
+        "truck": arrays.truck_row[idx],
+        "hours": arrays.trip_hours[idx],
+        "value": np.where(dominator[idx], arrays.objective[idx], -np.inf),
+    })
+    # best dominator value among the truck's trips up to (incl / excl) this length
+    best = pairs.groupby(["truck", "hours"])["value"].max()
+    upto = best.groupby(level=0).cummax()
+    shorter = upto.groupby(level=0).shift(1, fill_value=-np.inf)
+    key = pd.MultiIndex.from_frame(pairs[["truck", "hours"]])
+    objective = arrays.objective[idx]
+    beaten = ((upto.reindex(key).to_numpy() > objective)
+              | (shorter.reindex(key).to_numpy() >= objective))
+    dominated = np.zeros(arrays.n_vars, dtype=bool)
+    dominated[idx[beaten]] = True
+    return dominated
+
+
+def _subset(arrays: ModelArrays, keep) -> ModelArrays:
+    """The pairs in keep, with rows renumbered to the trucks / forests left."""
+    trucks, truck_row = np.unique(arrays.truck_row[keep], return_inverse=True)
+    forests, forest_row = np.unique(arrays.forest_row[keep], return_inverse=True)
+    return ModelArrays(
+        truck_id=arrays.truck_id[keep],
+        forest_id=arrays.forest_id[keep],
+        lower=arrays.lower[keep],
+        upper=arrays.upper[keep],
+        objective=arrays.objective[keep],
+        trip_hours=arrays.trip_hours[keep],
+        cbm_per_truck=arrays.cbm_per_truck[keep],
+        truck_row=truck_row,
+        forest_row=forest_row,
+        truck_ids=arrays.truck_ids[trucks],
+        forest_ids=arrays.forest_ids[forests],
+        truck_hours=arrays.truck_hours[trucks],
+        forest_cbm=arrays.forest_cbm[forests],
+    )
+
+
+def presolve(arrays: ModelArrays):
+    """
+    Shrink the per-truck model before it reaches a solver:
+
+    - cap each pair at floor(forest volume / cbm_per_truck) loads, on top
+      of the truck-hour cap model_arrays already applies
+    - drop pairs whose bound is then 0 (zero-hour trucks, trips longer
+      than the week, forests smaller than one load) or whose objective is
+      <= 0 (not driving is at least as good)
+    - drop dominated pairs (see _dominated), repeating until nothing changes
+
+    Trucks and forests left without pairs lose their rows. Returns the
+    reduced ModelArrays and a PresolveReport; the optimum is unchanged.
+    """
+    n_rows = len(arrays.truck_ids) + len(arrays.forest_ids)
+    report = PresolveReport(n_vars=arrays.n_vars, n_rows=n_rows)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volume_bound = np.where(arrays.cbm_per_truck > 0,
+                                np.floor(arrays.forest_cbm[arrays.forest_row] / arrays.cbm_per_truck),
+                                MAX_TRIPS_PER_PAIR)
+    upper = np.minimum(arrays.upper, volume_bound)
+    report.bounds_tightened = int(np.count_nonzero(upper < arrays.upper))
+
+    keep = upper > 0
+    report.zero_bound = int(np.count_nonzero(~keep))
+    no_value = keep & (arrays.objective <= 0)
+    report.no_value = int(np.count_nonzero(no_value))
+    keep &= ~no_value
+
+    arrays = replace(arrays, upper=upper)
+    while True:
+        dominated = _dominated(arrays, upper, keep)
+        if not dominated.any():
+            break
+        report.dominated += int(np.count_nonzero(dominated))
+        keep &= ~dominated
+
+    reduced = _subset(arrays, keep)
+    report.n_vars_after = reduced.n_vars
+    report.n_rows_after = len(reduced.truck_ids) + len(reduced.forest_ids)
+    return reduced, report
+
+
+def build_solver(model: SparseModel, solver_name="CBC") -> pywraplp.Solver:
+    """
+    Build a SparseModel in bulk and load it into a pywraplp solver.
+    Variable j of the solver is variable j of the model.
+    """
+    helper = mbh.ModelBuilderHelper()
+    index = helper.add_var_array_with_bounds(
+        model.lower.astype(float), model.upper.astype(float), model.integer, ""
+    )
+    variables = [mbh.Variable(helper, int(i)) for i in index]
+
+    for r, terms in model.row_slices():
+        ct = helper.add_linear_constraint()
+        helper.set_constraint_lower_bound(ct, -math.inf)
+        helper.set_constraint_upper_bound(ct, float(model.rhs[r]))
+        helper.add_terms_to_constraint(
+            ct, [variables[j] for j in model.col[terms]], model.coef[terms].tolist()
         )
-        .query("trips_planned > 0")
+
+    helper.set_objective_coefficients(index.tolist(), model.objective.tolist())
+    helper.set_maximize(True)
+
+    solver = pywraplp.Solver.CreateSolver(solver_name)
+    error = solver.LoadModelFromProto(mbh.to_mpmodel_proto(helper))
+    if error:
+        raise RuntimeError(f"Could not load the weekly model: {error}")
+    return solver
+
+
+def solution_vector(solver: pywraplp.Solver) -> np.ndarray:
+    """All variable values of the last solve as one array, in variable order."""
+    response = linear_solver_pb2.MPSolutionResponse()
+    solver.FillSolutionResponseProto(response)
+    return np.asarray(response.variable_value)
+
+
+def plan_from_solution(arrays: ModelArrays, x: np.ndarray) -> pd.DataFrame:
+    """Turn a solution vector into the plan frame app.py and scratch.py use."""
+    trips = np.rint(x).astype(int)
+    used = trips > 0
+    plan = (
+        pd.DataFrame({
+            "truck_id": arrays.truck_id[used],
+            "forest_id": arrays.forest_id[used],
+            "trips_planned": trips[used],
+            "cbm_per_truck": arrays.cbm_per_truck[used],
+        })
         .sort_values(["truck_id", "forest_id"])
         .reset_index(drop=True)
     )
-    plan["cbm_per_truck"] = [
-        df.loc[(t, f), "cbm_per_truck"] for t, f in zip(plan["truck_id"], plan["forest_id"])
-    ]
-    return plan
\ No newline at end of file
+    return plan
+
+
+def relative_gap(objective, bound) -> float:
+    """|bound - objective| relative to the objective (0 when proven optimal)."""
+    return abs(bound - objective) / max(abs(objective), 1e-9)
+
+
+def objective_bound(arrays: ModelArrays) -> float:
+    """
+    A quick upper bound on the weekly objective: every forest's volume
+    filled at its best objective per CBM, or every truck's hours at its
+    best objective per hour, whichever is lower.
+    """
+    gain = np.maximum(arrays.objective, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_cbm = np.where(arrays.cbm_per_truck > 0, gain / arrays.cbm_per_truck, np.inf)
+        per_hour = np.where(arrays.trip_hours > 0, gain / arrays.trip_hours, np.inf)
+    best_cbm = np.zeros(len(arrays.forest_ids))
+    best_hour = np.zeros(len(arrays.truck_ids))
+    np.maximum.at(best_cbm, arrays.forest_row, per_cbm)
+    np.maximum.at(best_hour, arrays.truck_row, per_hour)
+    return float(min(best_cbm @ arrays.forest_cbm, best_hour @ arrays.truck_hours))
+
+
+@dataclass
+class SolveTelemetry:
+    """Size of the model solve_week handed to the solver and how the solve went."""
+    backend: str
+    status: str
+    stop_reason: str         # "optimal", "gap_limit", "time_limit" or "lp_rounded"
+    n_vars: int
+    n_constraints: int
+    n_nonzeros: int
+    build_seconds: float     # model input -> solver loaded (arrays, presolve, model build)
+    solve_seconds: float
+    objective: float
+    best_bound: float
+    gap: float               # relative, see relative_gap
+    abs_gap: float
+    time_limit: float
+    rel_gap_limit: float | None = None
+    abs_gap_limit: float | None = None
+
+
+def hint_vector(arrays: ModelArrays, previous_plan: pd.DataFrame) -> np.ndarray:
+    """
+    Line a previous plan (truck_id, forest_id, trips_planned - e.g. last
+    week's plan.csv) up with this week's variables. Pairs that no longer
+    exist are dropped, new pairs start at zero. Ids are compared as
+    stripped strings so "PFM " in an old CSV still matches.
+    """
+    prev = previous_plan.assign(
+        truck_id=previous_plan["truck_id"].astype(str).str.strip(),
+        forest_id=previous_plan["forest_id"].astype(str).str.strip(),
+    ).groupby(["truck_id", "forest_id"])["trips_planned"].sum()
+    keys = pd.MultiIndex.from_arrays([
+        pd.Index(arrays.truck_id).astype(str).str.strip(),
+        pd.Index(arrays.forest_id).astype(str).str.strip(),
+    ])
+    return np.floor(prev.reindex(keys, fill_value=0).to_numpy(dtype=float))
+
+
+def _trim_rows(x, rows, n_rows, coef, rhs, priority):
+    # take trips off the least valuable pairs of each overloaded row
+    load = np.bincount(rows, weights=coef * x, minlength=n_rows)
+    for r in np.flatnonzero(load > rhs + 1e-9):
+        members = np.flatnonzero((rows == r) & (x > 0))
+        for j in members[np.argsort(priority[members], kind="stable")]:
+            if load[r] <= rhs[r] + 1e-9:
+                break
+            cut = min(x[j], math.ceil((load[r] - rhs[r]) / coef[j] - 1e-9))
+            x[j] -= cut
+            load[r] -= cut * coef[j]
+
+
+def repair_plan(arrays: ModelArrays, x: np.ndarray) -> np.ndarray:
+    """
+    Make an integer trip vector feasible for this week's model: clip it to
+    the variable bounds, then drop trips from overloaded trucks and forests,
+    cheapest objective per hour / per CBM first.
+    """
+    x = np.clip(np.floor(x), arrays.lower, arrays.upper)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_hour = np.where(arrays.trip_hours > 0, arrays.objective / arrays.trip_hours, np.inf)
+        per_cbm = np.where(arrays.cbm_per_truck > 0, arrays.objective / arrays.cbm_per_truck, np.inf)
+    _trim_rows(x, arrays.truck_row, len(arrays.truck_ids),
+               arrays.trip_hours, arrays.truck_hours, per_hour)
+    _trim_rows(x, arrays.forest_row, len(arrays.forest_ids),
+               arrays.cbm_per_truck.astype(float), arrays.forest_cbm, per_cbm)
+    return x
+
+
+def greedy_fill(arrays: ModelArrays, x: np.ndarray) -> np.ndarray:
+    """
+    Top a feasible trip vector up with whole trips wherever a truck still has
+    hours and its forest still has volume, best objective per hour first.
+    """
+    x = x.copy()
+    hours_left = arrays.truck_hours - np.bincount(
+        arrays.truck_row, weights=arrays.trip_hours * x, minlength=len(arrays.truck_ids))
+    cbm_left = arrays.forest_cbm - np.bincount(
+        arrays.forest_row, weights=arrays.cbm_per_truck * x, minlength=len(arrays.forest_ids))
+    candidates = np.flatnonzero(
+        (arrays.objective > 0) & (x < arrays.upper)
+        & (arrays.trip_hours <= hours_left[arrays.truck_row] + 1e-9)
+        & (arrays.cbm_per_truck <= cbm_left[arrays.forest_row] + 1e-9)
+    )
+    per_hour = arrays.objective[candidates] / arrays.trip_hours[candidates]
+    for j in candidates[np.argsort(-per_hour, kind="stable")]:
+        t, f = arrays.truck_row[j], arrays.forest_row[j]
+        add = min(arrays.upper[j] - x[j],
+                  math.floor(hours_left[t] / arrays.trip_hours[j] + 1e-9),
+                  math.floor(cbm_left[f] / arrays.cbm_per_truck[j] + 1e-9))
+        if add > 0:
+            x[j] += add
+            hours_left[t] -= add * arrays.trip_hours[j]
+            cbm_left[f] -= add * arrays.cbm_per_truck[j]
+    return x
+
+
+def _trip_patterns(lengths, caps, hours):
+    """
+    All maximal multisets of trip lengths one truck can drive within its
+    hours: rows of trip counts per length, where no further trip fits.
+    Returns None once there are more than MAX_TRIP_PATTERNS.
+    """
+    order = np.argsort(-lengths)
+    patterns = []
+    counts = np.zeros(len(lengths), dtype=int)
+
+    def extend(i, left):
+        if len(patterns) > MAX_TRIP_PATTERNS:
+            return
+        if i == len(order):
+            fits = (lengths <= left + 1e-9) & (counts < caps)
+            if not fits.any():
+                patterns.append(counts.copy())
+            return
+        k = order[i]
+        for n in range(min(caps[k], math.floor(left / lengths[k] + 1e-9)), -1, -1):
+            counts[k] = n
+            extend(i + 1, left - n * lengths[k])
+        counts[k] = 0
+
+    extend(0, hours)
+    if len(patterns) > MAX_TRIP_PATTERNS:
+        return None
+    return np.array(patterns, dtype=int).reshape(-1, len(lengths))
+
+
+@dataclass
+class TruckClasses:
+    """
+    Trucks that are interchangeable for the model, and the aggregated model
+    built on them.
+
+    The aggregated model has trip variables y[c, f] per (class, forest) and
+    pattern variables z[c, p]: how many trucks of class c drive trip pattern
+    p, a maximal set of trips (counted per trip length) that fits in one
+    truck's hours. Trips of each length must be covered by the patterns
+    chosen, so every aggregated solution splits back onto single trucks
+    exactly - unlike pooling the class's hours, which allows trips that do
+    not pack.
+
+    truck_class    class of every truck row of the full model
+    pair_class     y variable of every full-model variable
+    pair_length    trip-length index of every y variable
+    patterns       (n_patterns, n_lengths) trip counts of every z variable
+    pattern_class  class of every z variable
+    model          the aggregated SparseModel, y variables first
+    """
+    truck_class: np.ndarray
+    pair_class: np.ndarray
+    pair_length: np.ndarray
+    patterns: np.ndarray
+    pattern_class: np.ndarray
+    model: SparseModel
+
+    @property
+    def n_classes(self) -> int:
+        return int(self.truck_class.max()) + 1 if len(self.truck_class) else 0
+
+    @property
+    def n_pairs(self) -> int:
+        return len(self.pair_length)
+
+    def aggregate_hint(self, arrays: ModelArrays, x: np.ndarray) -> np.ndarray:
+        """A per-truck trip vector expressed in the aggregated variables."""
+        y = np.bincount(self.pair_class, weights=x, minlength=self.n_pairs)
+        z = np.zeros(len(self.patterns))
+        n_lengths = self.patterns.shape[1]
+        counts = np.zeros((len(arrays.truck_ids), n_lengths))
+        np.add.at(counts, (arrays.truck_row, self.pair_length[self.pair_class]), x)
+        for t, c in enumerate(self.truck_class):
+            in_class = np.flatnonzero(self.pattern_class == c)
+            covers = in_class[(self.patterns[in_class] >= counts[t]).all(axis=1)]
+            if len(covers):
+                z[covers[0]] += 1
+        return np.concatenate([y, z])
+
+    def disaggregate(self, arrays: ModelArrays, solution: np.ndarray) -> np.ndarray:
+        """
+        Hand an aggregated solution back to individual trucks: each class
+        member takes one of the chosen patterns, then the class's trips of
+        each length fill those trucks' slots for that length in truck order.
+        """
+        y = np.rint(solution[:self.n_pairs]).astype(int)
+        z = np.rint(solution[self.n_pairs:]).astype(int)
+        pair_index = np.full((len(arrays.truck_ids), len(arrays.forest_ids)), -1)
+        pair_index[arrays.truck_row, arrays.forest_row] = np.arange(arrays.n_vars)
+        # class and forest of every y variable, from any full-model member
+        y_class = np.empty(self.n_pairs, dtype=int)
+        y_class[self.pair_class] = self.truck_class[arrays.truck_row]
+        y_forest = np.empty(self.n_pairs, dtype=int)
+        y_forest[self.pair_class] = arrays.forest_row
+
+        x = np.zeros(arrays.n_vars)
+        for c in range(self.n_classes):
+            members = np.flatnonzero(self.truck_class == c)
+            chosen = np.flatnonzero((self.pattern_class == c) & (z > 0))
+            slots = np.repeat(self.patterns[chosen], z[chosen], axis=0)[:len(members)]
+            trucks = members[:len(slots)]
+            for k in np.flatnonzero((y_class == c) & (y > 0)):
+                length, f, need = self.pair_length[k], y_forest[k], y[k]
+                for i, t in enumerate(trucks):
+                    if need == 0:
+                        break
+                    j = pair_index[t, f]
+                    take = min(need, slots[i, length], arrays.upper[j] - x[j])
+                    if take > 0:
+                        x[j] += take
+                        slots[i, length] -= take
+                        need -= take
+        return x
+
+
+def truck_classes(arrays: ModelArrays):
+    """
+    Group trucks whose rows are identical for the model - same hour budget
+    and, forest by forest, the same trip hours, CBM, objective and bound
+    (so type, maintenance and eligibility all have to agree) - and build
+    the aggregated pattern model on them. Returns None when some class has
+    more than MAX_TRIP_PATTERNS trip patterns, i.e. when the forests have
+    too many distinct trip lengths for aggregation to pay off.
+    """
+    n_trucks = len(arrays.truck_ids)
+    pair_data = pd.DataFrame({
+        "forest": arrays.forest_row,
+        "trip_hours": arrays.trip_hours,
+        "cbm": arrays.cbm_per_truck,
+        "objective": arrays.objective,
+        "upper": arrays.upper,
+    })
+    # two independent order-free sums of per-pair hashes fingerprint each
+    # truck's set of pairs
+    fingerprint = []
+    for key in ("0123456789123456", "6543210987654321"):
+        h = pd.util.hash_pandas_object(pair_data, index=False, hash_key=key).to_numpy()
+        acc = np.zeros(n_trucks, dtype=np.uint64)
+        np.add.at(acc, arrays.truck_row, h)
+        fingerprint.append(acc)
+    keys = pd.DataFrame({
+        "hours": arrays.truck_hours,
+        "n_pairs": np.bincount(arrays.truck_row, minlength=n_trucks),
+        "h1": fingerprint[0],
+        "h2": fingerprint[1],
+    })
+    truck_class = keys.groupby(list(keys.columns), sort=False).ngroup().to_numpy()
+    class_size = np.bincount(truck_class)
+    class_hours = arrays.truck_hours[np.unique(truck_class, return_index=True)[1]]
+
+    # y variables: one per (class, forest), data taken from any member
+    var_class = truck_class[arrays.truck_row]
+    pair_class = pd.factorize(
+        pd.MultiIndex.from_arrays([var_class, arrays.forest_row]), sort=True)[0]
+    rep = np.unique(pair_class, return_index=True)[1]
+    n_pairs = len(rep)
+    y_class = var_class[rep]
+    pair_length, lengths = pd.factorize(np.round(arrays.trip_hours[rep], 9), sort=True)
+    lengths = np.asarray(lengths)
+    usable = arrays.upper[rep] > 0
+
+    # z variables: the maximal trip patterns of every class
+    pattern_blocks, pattern_class = [], []
+    for c in range(len(class_size)):
+        # per length, one truck can drive at most MAX_TRIPS_PER_PAIR trips
+        # to each of the class's forests of that length
+        caps = np.bincount(pair_length[(y_class == c) & usable],
+                           minlength=len(lengths)) * MAX_TRIPS_PER_PAIR
+        patterns = _trip_patterns(lengths, caps, class_hours[c])
+        if patterns is None:
+            return None
+        pattern_blocks.append(patterns)
+        pattern_class.append(np.full(len(patterns), c))
+    patterns = np.vstack(pattern_blocks)
+    pattern_class = np.concatenate(pattern_class)
+    n_patterns = len(patterns)
+    z_col = n_pairs + np.arange(n_patterns)
+
+    # rows: trucks per class, trips per (class, length) covered by the
+    # chosen patterns, volume per forest
+    n_classes = len(class_size)
+    cl_len = y_class * len(lengths) + pair_length
+    p_idx, l_idx = np.nonzero(patterns)
+    row = np.concatenate([
+        pattern_class,
+        n_classes + cl_len,
+        n_classes + pattern_class[p_idx] * len(lengths) + l_idx,
+        n_classes + n_classes * len(lengths) + arrays.forest_row[rep],
+    ])
+    col = np.concatenate([z_col, np.arange(n_pairs), z_col[p_idx], np.arange(n_pairs)])
+    coef = np.concatenate([
+        np.ones(n_patterns),
+        np.ones(n_pairs),
+        -patterns[p_idx, l_idx].astype(float),
+        arrays.cbm_per_truck[rep].astype(float),
+    ])
+    rhs = np.concatenate([
+        class_size.astype(float),
+        np.zeros(n_classes * len(lengths)),
+        arrays.forest_cbm,
+    ])
+    order = np.argsort(row, kind="stable")
+
+    model = SparseModel(
+        lower=np.zeros(n_pairs + n_patterns),
+        upper=np.concatenate([
+            np.bincount(pair_class, weights=arrays.upper, minlength=n_pairs),
+            class_size[pattern_class].astype(float),
+        ]),
+        objective=np.concatenate([arrays.objective[rep], np.zeros(n_patterns)]),
+        integer=np.ones(n_pairs + n_patterns, dtype=bool),
+        row=row[order],
+        col=col[order],
+        coef=coef[order],
+        rhs=rhs,
+    )
+    return TruckClasses(truck_class=truck_class, pair_class=pair_class,
+                        pair_length=pair_length, patterns=patterns,
+                        pattern_class=pattern_class, model=model)
+
+
+def _solve_cbc(model: SparseModel, time_limit, hint=None, rel_gap=None):
+    start = time.perf_counter()
+    with span("cbc_build", n_vars=model.n_vars):
+        solver = build_solver(model)
+    build_time = time.perf_counter() - start
+    solver.set_time_limit(int(time_limit * 1000))
+    params = pywraplp.MPSolverParameters()
+    if rel_gap is not None:
+        params.SetDoubleParam(params.RELATIVE_MIP_GAP, rel_gap)
+
+    with span("cbc"):
+        status = solver.Solve(params)
+    solved = status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE)
+    if not solved and hint is None:
+        raise RuntimeError("CBC did not find an optimal or feasible solution within the time limit")
+
+    if solved:
+        x = solution_vector(solver)
+        objective = solver.Objective().Value()
+        bound = solver.Objective().BestBound()
+    else:
+        x, objective, bound = hint, -math.inf, math.inf
+    stats = dict(
+        backend="cbc",
+        status="OPTIMAL" if status == pywraplp.Solver.OPTIMAL else "FEASIBLE",
+        wall_time=solver.wall_time() / 1000,
+        build_time=build_time,
+        # CBC gives no incumbent callback
+        first_solution_time=None,
+    )
+    if hint is not None:
+        # CBC through OR-Tools ignores MIP starts, so the repaired hint
+        # acts as a floor: it is the incumbent at t=0 and is returned
+        # whenever CBC's own best is worse
+        hint_objective = float(model.objective @ hint)
+        stats.update(hint_objective=hint_objective, first_solution_time=0.0)
+        if hint_objective > objective:
+            x, objective = hint, hint_objective
+    stats.update(objective=objective, best_bound=bound,
+                 gap=relative_gap(objective, bound))
+    return x, stats
+
+
+def _solve_lp(model: SparseModel):
+    """
+    The LP relaxation (GLOP). Its optimum bounds the integer optimum; the
+    solution is rounded down, which keeps every <= row satisfied since all
+    coefficients of the weekly model are non-negative.
+    """
+    relaxed = replace(model, integer=np.zeros(model.n_vars, dtype=bool))
+    start = time.perf_counter()
+    solver = build_solver(relaxed, "GLOP")
+    build_time = time.perf_counter() - start
+    status = solver.Solve()
+    if status != pywraplp.Solver.OPTIMAL:
+        raise RuntimeError("GLOP could not solve the LP relaxation")
+
+    bound = solver.Objective().Value()
+    x = np.floor(solution_vector(solver) + 1e-9)
+    stats = dict(
+        backend="lp",
+        status="LP_ROUNDED",
+        wall_time=solver.wall_time() / 1000,
+        build_time=build_time,
+        first_solution_time=solver.wall_time() / 1000,
+        objective=float(model.objective @ x),
+        best_bound=bound,
+        lp_bound=bound,
+    )
+    stats["gap"] = relative_gap(stats["objective"], bound)
+    return x, stats
+
+
+def integer_arrays(arrays: ModelArrays) -> ModelArrays:
+    """
+    ModelArrays with integer row coefficients for CP-SAT. Hours are counted
+    in whole minutes, rounded so that any integer plan is still feasible in
+    real hours (trips up, budgets down). CBM is already integral.
+    """
+    def minutes(hours, rounding):
+        return rounding(np.round(hours * MINUTES_PER_HOUR, 6)).astype(np.int64)
+
+    return replace(
+        arrays,
+        trip_hours=minutes(arrays.trip_hours, np.ceil),
+        truck_hours=minutes(arrays.truck_hours, np.floor),
+        cbm_per_truck=np.ceil(arrays.cbm_per_truck).astype(np.int64),
+        forest_cbm=np.floor(arrays.forest_cbm).astype(np.int64),
+    )
+
+
+def build_cp_model(model: SparseModel) -> cp_model.CpModel:
+    """
+    A SparseModel with integral rows (see integer_arrays) as a CP-SAT model;
+    the objective is scaled to hundredths.
+    """
+    cp = cp_model.CpModel()
+    proto = cp.proto
+    for lb, ub in zip(np.ceil(model.lower).astype(np.int64).tolist(),
+                      np.floor(model.upper).astype(np.int64).tolist()):
+        proto.variables.add().domain.extend((lb, ub))
+
+    coef = np.rint(model.coef).astype(np.int64)
+    rhs = np.floor(model.rhs + 1e-9).astype(np.int64)
+    for r, terms in model.row_slices():
+        linear = proto.constraints.add().linear
+        linear.vars.extend(model.col[terms].tolist())
+        linear.coeffs.extend(coef[terms].tolist())
+        linear.domain.extend((cp_model.INT_MIN, int(rhs[r])))
+
+    # CP-SAT minimises; a -1 scaling factor turns it into a maximisation
+    objective = np.rint(model.objective * OBJECTIVE_SCALE).astype(np.int64)
+    proto.objective.vars.extend(range(model.n_vars))
+    proto.objective.coeffs.extend((-objective).tolist())
+    proto.objective.scaling_factor = -1
+    return cp
+
+
+class _FirstSolutionTimer(cp_model.CpSolverSolutionCallback):
+    def __init__(self):
+        super().__init__()
+        self.first = None
+
+    def on_solution_callback(self):
+        if self.first is None:
+            self.first = self.wall_time
+
+
+def _solve_cpsat(model: SparseModel, time_limit, num_workers=None, hint=None,
+                 rel_gap=None, abs_gap=None):
+    start = time.perf_counter()
+    cp = build_cp_model(model)
+    if hint is not None:
+        cp.proto.solution_hint.vars.extend(range(model.n_vars))
+        cp.proto.solution_hint.values.extend(np.rint(hint).astype(np.int64).tolist())
+    build_time = time.perf_counter() - start
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    if rel_gap is not None:
+        solver.parameters.relative_gap_limit = rel_gap
+    if abs_gap is not None:
+        solver.parameters.absolute_gap_limit = abs_gap * OBJECTIVE_SCALE
+    # CP-SAT's portfolio needs several workers to find incumbents reliably,
+    # even when they have to share fewer cores
+    solver.parameters.num_workers = num_workers or max(os.cpu_count() or 1, MIN_CPSAT_WORKERS)
+
+    timer = _FirstSolutionTimer()
+    status = solver.solve(cp, timer)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        raise RuntimeError("CP-SAT did not find an optimal or feasible solution within the time limit")
+
+    objective = solver.objective_value / OBJECTIVE_SCALE
+    bound = solver.best_objective_bound / OBJECTIVE_SCALE
+    stats = dict(
+        backend="cpsat",
+        status=solver.status_name(status),
+        wall_time=solver.wall_time,
+        build_time=build_time,
+        first_solution_time=timer.first,
+        objective=objective,
+        best_bound=bound,
+        gap=relative_gap(objective, bound),
+    )
+    if hint is not None:
+        stats["hint_objective"] = float(model.objective @ hint)
+    return np.asarray(solver.response_proto.solution), stats
+
+
+@spanned()
+def solve_week(df: pd.DataFrame, maximize_profit=False, backend="cbc",
+               num_workers=None, previous_plan=None,
+               time_limit=TIME_LIMIT_MS / 1000, aggregate=False,
+               presolve_model=True, rel_gap=None, abs_gap=None,
+               return_telemetry=False):
+    """
+    backend        "cbc" (single-threaded MILP), "cpsat" (CP-SAT with
+                   num_workers search workers, default one per core and
+                   at least 8) or "lp" (fast what-if mode: the LP
+                   relaxation of the truck-class model, rounded down and
+                   greedily filled, with the LP optimum reported as
+                   lp_bound)
+    previous_plan  optional plan frame (truck_id, forest_id, trips_planned),
+                   e.g. last week's plan.csv; it is clipped and repaired to
+                   this week's model and used as a starting solution
+    time_limit     seconds
+    aggregate      solve one model per class of interchangeable trucks
+                   instead of per truck, then hand the trips back to
+                   individual trucks (see truck_classes)
+    presolve_model tighten bounds and drop dead / dominated pairs before
+                   solving (see presolve); the optimum is the same
+    rel_gap        stop as soon as the plan is proven within this relative
+                   gap of the optimum (e.g. 0.01), instead of closing it
+    abs_gap        the same in objective units (CBM, or euros with
+                   maximize_profit). CBC has no absolute gap setting, so it
+                   gets the relative gap abs_gap / objective_bound, which
+                   implies it; that bound is loose (about 9,700 CBM for the
+                   rain week, whose optimum is near 7,300), so on CBC a
+                   small abs_gap rarely stops the solve before the time
+                   limit. Use rel_gap there. Both are ignored by the lp
+                   backend.
+
+    The returned plan carries the solver's status, wall time, time to first
+    incumbent, objective, best bound and relative gap in
+    plan.attrs["solve_stats"], and a SolveTelemetry (model size, build vs
+    solve time, why the solver stopped) in plan.attrs["telemetry"];
+    return_telemetry=True returns (plan, telemetry).
+    """
+    if backend not in ("cbc", "cpsat", "lp"):
+        raise ValueError(f"Unknown backend {backend!r}, use 'cbc', 'cpsat' or 'lp'")
+    start = time.perf_counter()
+
+    n_trucks = df.index.get_level_values(0).nunique()
+    n_forests = df.index.get_level_values(1).nunique()
+    say(f"Number of trucks: {n_trucks}")
+    say(f"Number of forests: {n_forests}")
+    say(f"Number of variables (truck-forest pairs): {len(df)}")
+
+    with span("model_arrays"):
+        arrays = model_arrays(df, maximize_profit=maximize_profit)
+    report = None
+    if presolve_model:
+        with span("presolve"):
+            arrays, report = presolve(arrays)
+        say(report)
+    hint = None
+    if previous_plan is not None:
+        with span("warm_start"):
+            hint = repair_plan(arrays, hint_vector(arrays, previous_plan))
+
+    with span("model_build", backend=backend, aggregate=aggregate):
+        # the LP mode always relaxes the pattern model when it can: its
+        # relaxation is far tighter than the per-truck one and rounds better
+        classes = truck_classes(arrays) if aggregate or backend == "lp" else None
+        if aggregate and classes is None:
+            say("Too many distinct trip patterns to aggregate; solving per truck.")
+        if classes is not None:
+            model = classes.model
+            say(f"Truck classes: {classes.n_classes} "
+                f"({classes.n_pairs} trip + {len(classes.patterns)} pattern variables)")
+            if hint is not None:
+                hint = classes.aggregate_hint(arrays, hint)
+        elif backend == "cpsat":
+            int_arrays = integer_arrays(arrays)
+            model = int_arrays.to_sparse()
+            if hint is not None:
+                # repair again against the minute-rounded hours CP-SAT sees
+                hint = repair_plan(int_arrays, hint)
+        else:
+            model = arrays.to_sparse()
+
+    prepared = time.perf_counter() - start
+    if backend == "cbc":
+        cbc_gap = rel_gap
+        if abs_gap is not None:
+            bound = objective_bound(arrays)
+            if bound > 0:
+                cbc_gap = min(cbc_gap if cbc_gap is not None else math.inf, abs_gap / bound)
+        x, stats = _solve_cbc(model, time_limit, hint, cbc_gap)
+    elif backend == "cpsat":
+        with span("cpsat", n_vars=model.n_vars):
+            x, stats = _solve_cpsat(model, time_limit, num_workers, hint, rel_gap, abs_gap)
+    else:
+        with span("glop", n_vars=model.n_vars):
+            x, stats = _solve_lp(model)
+
+    stats["n_vars"] = model.n_vars
+    if report is not None:
+        stats["presolve"] = asdict(report)
+    if classes is not None:
+        x = classes.disaggregate(arrays, x)
+        stats.update(n_classes=classes.n_classes,
+                     aggregated_objective=stats["objective"])
+    if classes is not None or backend == "lp":
+        # use up truck hours and forest volume the rounding left behind;
+        # the solver's bound still bounds the per-truck model
+        with span("greedy_fill"):
+            x = greedy_fill(arrays, x)
+        stats["objective"] = float(arrays.objective @ x)
+        stats["gap"] = relative_gap(stats["objective"], stats["best_bound"])
+
+    abs_gap_found = abs(stats["best_bound"] - stats["objective"])
+    within = ((rel_gap is not None and stats["gap"] <= rel_gap + 1e-9)
+              or (abs_gap is not None and abs_gap_found <= abs_gap + 1e-9))
+    if backend == "lp":
+        stop_reason = "lp_rounded"
+    elif stats["status"] != "OPTIMAL" and stats["wall_time"] >= time_limit:
+        stop_reason = "time_limit"
+    elif stats["gap"] <= 1e-6:
+        stop_reason = "optimal"
+    elif within:
+        stop_reason = "gap_limit"  # the solver stopped early on rel_gap / abs_gap
+    elif stats["status"] == "OPTIMAL":
+        stop_reason = "optimal"  # within the solver's default tolerance
+    else:
+        stop_reason = "time_limit"
+    telemetry = SolveTelemetry(
+        backend=backend,
+        status=stats["status"],
+        stop_reason=stop_reason,
+        n_vars=model.n_vars,
+        n_constraints=model.n_rows,
+        n_nonzeros=len(model.coef),
+        build_seconds=prepared + stats["build_time"],
+        solve_seconds=stats["wall_time"],
+        objective=stats["objective"],
+        best_bound=stats["best_bound"],
+        gap=stats["gap"],
+        abs_gap=abs_gap_found,
+        time_limit=time_limit,
+        rel_gap_limit=rel_gap,
+        abs_gap_limit=abs_gap,
+    )
+
+    if stop_reason == "time_limit":
+        print("⚠️  Time limit reached: returning best feasible solution found.")
+    say(f"{backend}: {stats['status']} ({stop_reason}) in {stats['wall_time']:.2f}s, gap {stats['gap']:.2%}")
+
+    plan = plan_from_solution(arrays, x)
+    plan.attrs["solve_stats"] = stats
+    plan.attrs["telemetry"] = telemetry
+    if return_telemetry:
+        return plan, telemetry
+    return plan
@@ -0,0 +1,179 @@
+"""
+Per-stage timing and memory of the planning pipeline.
+
+The stages are marked with spans:
+
+    with span("presolve"):
+        ...
+
+    @spanned()
+    def build_model_input(...):
+
+Spans cost nothing unless a recording is open; inside one, every span
+records its wall time, CPU time and the process's peak RSS (and, with
+trace_memory=True, the peak Python allocation of the stage itself, via
+tracemalloc, which slows allocation-heavy code down):
+
+    with recording() as log:
+        plan = solve_week(df)
+    print(log.to_frame())
+    log.write("perf_log.jsonl")
+
+Nested spans keep their parent, so a stage's time includes its sub-stages.
+The app shows the last recording in its "Performance" panel. set_verbose(False)
+(or TRUCKING_VERBOSE=0) silences the progress prints of solve_week and the
+top-up, which go through say().
+"""
+
+import contextvars
+import datetime
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PERF_LOG = "perf_log.jsonl"
+VERBOSE = os.environ.get("TRUCKING_VERBOSE", "1") != "0"
+MB = 2**20
+
+
+def set_verbose(on: bool):
+    global VERBOSE
+    VERBOSE = bool(on)
+
+
+def say(*args, **kwargs):
+    """print, unless verbose output is switched off."""
+    if VERBOSE:
+        print(*args, **kwargs)
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+@dataclass
+class Span:
+    name: str
+    parent: str | None
+    depth: int
+    started_at: float          # seconds since the recording began
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mb: float | None = None
+    rss_growth_mb: float | None = None    # how much the stage raised the process peak
+    traced_peak_mb: float | None = None   # peak Python allocation during the stage
+    meta: dict = field(default_factory=dict)
+
+
+class PerfLog:
+    """The spans of one recording, in the order they started."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.started = time.perf_counter()
+        self.recorded_at = datetime.datetime.now().replace(microsecond=0).isoformat(sep=" ")
+        self.spans = []
+        self._open = []    # [span, traced peak seen so far] of the enclosing spans
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([asdict(s) for s in self.spans],
+                            columns=[f for f in Span.__dataclass_fields__])
+
+    def to_dict(self) -> dict:
+        return {"recorded_at": self.recorded_at, "spans": [asdict(s) for s in self.spans]}
+
+    def write(self, path=PERF_LOG):
+        """Append the recording to path as one JSON line."""
+        with open(path, "a") as f:
+            f.write(json.dumps(self.to_dict()) + "\n")
+
+
+_current = contextvars.ContextVar("perf_log", default=None)
+
+
+@contextmanager
+def recording(trace_memory=False):
+    """Collect the spans run inside the with-block (in this thread) into a PerfLog."""
+    log = PerfLog(trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _current.set(log)
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+@contextmanager
+def span(name, **meta):
+    log = _current.get()
+    if log is None:
+        yield
+        return
+    parent = log._open[-1] if log._open else None
+    s = Span(name, parent[0].name if parent else None, len(log._open),
+             round(time.perf_counter() - log.started, 6), meta=meta)
+    tracing = log.trace_memory and tracemalloc.is_tracing()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        if parent:
+            parent[1] = max(parent[1], peak)
+        tracemalloc.reset_peak()
+    rss_before = _peak_rss_mb()
+    entry = [s, 0]
+    log._open.append(entry)
+    log.spans.append(s)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        s.wall_s = time.perf_counter() - wall
+        s.cpu_s = time.process_time() - cpu
+        log._open.pop()
+        s.peak_rss_mb = _peak_rss_mb()
+        if rss_before is not None:
+            s.rss_growth_mb = s.peak_rss_mb - rss_before
+        if tracing:
+            peak = max(entry[1], tracemalloc.get_traced_memory()[1])
+            s.traced_peak_mb = (peak - current) / MB
+            if parent:
+                parent[1] = max(parent[1], peak)
+
+
+def spanned(name=None):
+    """Decorator: run the function inside span(name or its name)."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(name or fn.__name__):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def stage_table(log: PerfLog) -> pd.DataFrame:
+    """The spans as a table for printing, sub-stages marked with a dot per level."""
+    table = log.to_frame()
+    table["stage"] = ["· " * d + n for d, n in zip(table["depth"], table["name"])]
+    columns = ["stage", "wall_s", "cpu_s", "peak_rss_mb", "rss_growth_mb"]
+    if log.trace_memory:
+        columns.append("traced_peak_mb")
+    return table[columns]
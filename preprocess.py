@@ -105,8 +105,17 @@ adds score = cbm_per_truck / trip_days
 returns dataframe to whoever calls it (optimiser)
 """
 
+import csv
 import math
+import pathlib
+
 import pandas as pd 
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+from eligibility import DEFAULT_RULES, eligible_pairs
+from perf import spanned
 
 # DAILY_KM = 300          # Max km a truck can drive in a day
 # we'll be using this for now to get a rough estimate of trip_days 
@@ -115,19 +124,117 @@ import pandas as pd
 
 #DEFAULT_MAINT_DAYS = 0    # Default maintenance days if missing 
 
-
+# Column schemas for the two input files. Header names are matched after
+# strip + lower, every value is whitespace-trimmed and empty cells are
+# null. Columns not listed here are kept as (trimmed) strings.
+FORESTS_SCHEMA = {
+    "forest_id": pa.string(),
+    "max_trips_month_dry": pa.float64(),
+    "turn_around_time_dry": pa.float64(),
+    "max_trips_month_rain": pa.float64(),
+    "turn_around_time_rain": pa.float64(),
+    "roundtrip_km": pa.float64(),
+    "volume": pa.float64(),
+    "sale_price_per_cbm": pa.float64(),
+    "profit_per_cbm_euros": pa.float64(),
+}
+FORESTS_REQUIRED = ("forest_id", "turn_around_time_dry", "turn_around_time_rain",
+                    "roundtrip_km", "volume")
+
+TRUCKS_SCHEMA = {
+    "truck_id": pa.int64(),
+    "type": pa.string(),
+    "maintenance_hours": pa.float64(),
+    "drive_hours": pa.float64(),
+    "cbm_per_truck": pa.float64(),
+    "fuel_l_per_km": pa.float64(),
+}
+TRUCKS_REQUIRED = ("truck_id", "cbm_per_truck")
+
+
+def _csv_bytes(source) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    if hasattr(source, "read"):
+        return source.read()
+    return pathlib.Path(source).read_bytes()
+
+
+def read_table(source, schema: dict, required=(), name="csv") -> pd.DataFrame:
+    """
+    Parse a CSV (path, bytes or file-like) with the pyarrow reader against
+    an explicit schema, so no column types are inferred. Values are
+    whitespace-trimmed and blank cells become null. Rows without a value in
+    the first required column (the id) are dropped.
+    """
+    data = _csv_bytes(source)
+    header = next(csv.reader([data.split(b"\n", 1)[0].decode("utf-8-sig")]), [])
+    names = [h.strip().lower() for h in header]
+    dupes = sorted({n for n in names if n and names.count(n) > 1})
+    if dupes:
+        raise ValueError(f"{name}: duplicate columns {dupes}")
+    missing = [c for c in required if c not in names]
+    if missing:
+        raise ValueError(f"{name}: missing required columns {missing}")
+    # blank header cells (e.g. a trailing comma) are dropped
+    column_names = [n or f"_blank_{i}" for i, n in enumerate(names)]
+    keep = [n for n in names if n]
+
+    try:
+        table = pa_csv.read_csv(
+            pa.py_buffer(data),
+            read_options=pa_csv.ReadOptions(column_names=column_names, skip_rows=1),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={n: schema.get(n, pa.string()) for n in keep},
+                include_columns=keep,
+                strings_can_be_null=True,
+            ),
+        )
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"{name}: {e}") from None
+
+    # numbers are trimmed by the parser already; trim text and null blanks
+    for i, col in enumerate(table.column_names):
+        if pa.types.is_string(table.schema.field(col).type):
+            values = pc.utf8_trim_whitespace(table[col])
+            values = pc.if_else(pc.equal(values, ""), pa.scalar(None, pa.string()), values)
+            table = table.set_column(i, col, values)
+
+    if required:
+        table = table.filter(pc.is_valid(table[required[0]]))
+    for col in required:
+        n_null = table[col].null_count
+        if n_null:
+            raise ValueError(f"{name}: {n_null} empty value(s) in required column '{col}'")
+    return table.to_pandas()
+
+
+def read_forests(forests_csv="data/forests.csv") -> pd.DataFrame:
+    return read_table(forests_csv, FORESTS_SCHEMA, FORESTS_REQUIRED, name="forests.csv")
+
+
+def read_trucks(trucks_csv="data/trucks.csv") -> pd.DataFrame:
+    trucks = read_table(trucks_csv, TRUCKS_SCHEMA, TRUCKS_REQUIRED, name="trucks.csv")
+    if trucks["truck_id"].duplicated().any():
+        dupes = trucks.loc[trucks["truck_id"].duplicated(), "truck_id"].unique().tolist()
+        raise ValueError(f"trucks.csv: duplicate truck_id {dupes}")
+    return trucks
+
+
+@spanned()
 def build_model_input(
     forests_csv: str = "data/forests.csv",
     trucks_csv: str = "data/trucks.csv",
     season: str = "dry",
+    rules=DEFAULT_RULES,
 ) -> pd.DataFrame: 
     
     
-    # 1. Read and clean CSVs
-    forests = pd.read_csv(forests_csv)
-    forests.columns = forests.columns.str.strip().str.lower()
-    trucks  = pd.read_csv(trucks_csv)
-    trucks.columns  = trucks.columns.str.strip().str.lower()
+    # 1. Read, type and clean CSVs (headers and values are stripped)
+    forests = read_forests(forests_csv)
+    trucks  = read_trucks(trucks_csv)
 
     # Remove cbm_per_truck from forests if present
     if "cbm_per_truck" in forests.columns:
@@ -140,9 +247,8 @@ def build_model_input(
     else:
         forests["trip_hours"] = forests["turn_around_time_rain"]
 
-    # 3. Ensure each forest has a weekly stockpile (volume to be picked up)
-    if "volume" not in forests.columns:
-        raise ValueError("Add a 'volume' column to forests.csv (weekly CBM stock-pile)")
+    # 3. Each forest's weekly stockpile (volume to be picked up); read_forests
+    # has already checked the 'volume' column is there
     forests["weekly_stockpile_cbm"] = forests["volume"]
 
     # 4. Remove forests with zero stock-pile (no logs to pick up)
@@ -153,15 +259,17 @@ def build_model_input(
         trucks["maintenance_hours"] = 0
     if "drive_hours" not in trucks.columns:
         trucks["drive_hours"] = 52.5  # default, e.g. 5 days * 10.5 hours
+    trucks["maintenance_hours"] = trucks["maintenance_hours"].fillna(0)
+    trucks["drive_hours"] = trucks["drive_hours"].fillna(52.5)
     trucks["drive_hours"] = (trucks["drive_hours"] - trucks["maintenance_hours"]).clip(lower=0)
 
-    # 6. Cross-join trucks and forests (all possible assignments)
-    df = pd.merge(trucks, forests, how="cross")
-    # --- NEW CONSTRAINT: MAN trucks (1-32) can only do roundtrip_km <= 500 ---
-    df['truck_id'] = df['truck_id'].astype(int)
-    df['roundtrip_km'] = df['roundtrip_km'].astype(float)
-    is_man = df['truck_id'].between(1, 32)
-    df = df[~(is_man & (df['roundtrip_km'] > 500))]
+    # 6. Join trucks and forests on the eligible pairs only (see
+    # eligibility.py - e.g. MAN trucks can only do roundtrip_km <= 500)
+    truck_idx, forest_idx = eligible_pairs(trucks, forests, season, rules)
+    df = pd.concat([
+        trucks.iloc[truck_idx].reset_index(drop=True),
+        forests.iloc[forest_idx].reset_index(drop=True),
+    ], axis=1)
     # Each row now has truck's cbm_per_truck
 
     # 7. Set a multi-index for the optimizer
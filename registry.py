@@ -0,0 +1,155 @@
+"""
+SQLite registry of optimisation runs: one row per run with the hashes of
+its inputs, the solver status and time and the week's KPIs.
+
+app.py and scratch.py register every run (the weekly agent should do the
+same). The runs table is indexed on (season, week), week and input_hash,
+so the trend of the latest run per week and "was this input solved
+before?" are index lookups, not scans over old plans.
+
+    python registry.py --season dry --weeks 12
+"""
+
+import argparse
+import datetime
+import hashlib
+import pathlib
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from history import week_of
+from preprocess import read_trucks
+from solve_cache import _normalised_hash, _read_bytes
+
+REGISTRY_DB = "runs.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id            INTEGER PRIMARY KEY,
+    run_id        TEXT NOT NULL,
+    recorded_at   TEXT NOT NULL,
+    week          TEXT NOT NULL,
+    season        TEXT NOT NULL,
+    source        TEXT NOT NULL,
+    forests_hash  TEXT NOT NULL,
+    trucks_hash   TEXT NOT NULL,
+    input_hash    TEXT NOT NULL,
+    backend       TEXT,
+    status        TEXT,
+    solve_seconds REAL,
+    gap           REAL,
+    total_cbm     REAL,
+    total_profit  REAL,
+    total_trips   INTEGER,
+    trucks_used   INTEGER,
+    trucks_unused INTEGER,
+    top_up_cbm    REAL
+);
+CREATE INDEX IF NOT EXISTS runs_season_week ON runs (season, week);
+CREATE INDEX IF NOT EXISTS runs_week ON runs (week);
+CREATE INDEX IF NOT EXISTS runs_input_hash ON runs (input_hash);
+"""
+KPI_COLUMNS = ["total_cbm", "total_profit", "total_trips", "trucks_used", "trucks_unused",
+               "top_up_cbm", "solve_seconds"]
+
+
+def connect(db=REGISTRY_DB) -> sqlite3.Connection:
+    con = sqlite3.connect(db)
+    con.execute("PRAGMA journal_mode=WAL")  # the app reads while scripts write
+    con.executescript(_SCHEMA)
+    return con
+
+
+def input_hash(forests_hash, trucks_hash, season) -> str:
+    return hashlib.sha256(f"{forests_hash}\x1e{trucks_hash}\x1e{season.lower()}".encode()).hexdigest()
+
+
+def register_run(forests_csv, trucks_csv, plan: pd.DataFrame, season, source, top_up=None,
+                 run_id=None, week=None, db=REGISTRY_DB) -> int:
+    """
+    Add a run to the registry. forests_csv / trucks_csv are the input CSVs
+    (path, bytes or file-like) and are hashed after normalisation, as the
+    solve cache does; the solver status, backend, time and gap come from
+    plan.attrs["solve_stats"]. Returns the row id.
+    """
+    forests_data, trucks_data = _read_bytes(forests_csv), _read_bytes(trucks_csv)
+    forests_hash, trucks_hash = _normalised_hash(forests_data), _normalised_hash(trucks_data)
+    stats = plan.attrs.get("solve_stats", {})
+    recorded_at = datetime.datetime.now().replace(microsecond=0)
+    trucks_used = int(plan.loc[plan["trips_planned"] > 0, "truck_id"].nunique())
+    top_up = pd.DataFrame(top_up if top_up is not None else [])
+    row = {
+        "run_id": run_id or f"{recorded_at:%Y%m%dT%H%M%S}",
+        "recorded_at": recorded_at.isoformat(sep=" "),
+        "week": week or week_of(),
+        "season": season.lower(),
+        "source": source,
+        "forests_hash": forests_hash,
+        "trucks_hash": trucks_hash,
+        "input_hash": input_hash(forests_hash, trucks_hash, season),
+        "backend": stats.get("backend"),
+        "status": stats.get("status"),
+        "solve_seconds": stats.get("wall_time"),
+        "gap": stats.get("gap"),
+        "total_cbm": float((plan["trips_planned"] * plan["cbm_per_truck"]).sum()),
+        "total_profit": float(plan["profit"].sum()) if "profit" in plan else None,
+        "total_trips": int(plan["trips_planned"].sum()),
+        "trucks_used": trucks_used,
+        "trucks_unused": int(read_trucks(trucks_data)["truck_id"].nunique()) - trucks_used,
+        "top_up_cbm": float(top_up["cbm_collected"].sum()) if "cbm_collected" in top_up else 0.0,
+    }
+    with closing(connect(db)) as con, con:
+        cur = con.execute(f"INSERT INTO runs ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                          list(row.values()))
+        return cur.lastrowid
+
+
+def weekly_trend(season, last_weeks=None, db=REGISTRY_DB) -> pd.DataFrame:
+    """KPIs of the latest run of each of the last_weeks weeks of season, oldest first."""
+    if not pathlib.Path(db).exists():
+        return pd.DataFrame(columns=["week", "status"] + KPI_COLUMNS)
+    # MAX(id) per week is answered from the (season, week) index alone
+    query = f"""
+        SELECT week, status, {', '.join(KPI_COLUMNS)} FROM runs
+        WHERE id IN (SELECT MAX(id) FROM runs WHERE season = ? GROUP BY week
+                     ORDER BY week DESC LIMIT ?)
+        ORDER BY week
+    """
+    with closing(connect(db)) as con:
+        return pd.read_sql_query(query, con, params=(season.lower(), last_weeks or -1))
+
+
+def runs_for_input(input_hash, db=REGISTRY_DB) -> pd.DataFrame:
+    """Every run of the same inputs and season, newest first."""
+    with closing(connect(db)) as con:
+        return pd.read_sql_query("SELECT * FROM runs WHERE input_hash = ? ORDER BY id DESC",
+                                 con, params=(input_hash,))
+
+
+def recent_runs(limit=20, db=REGISTRY_DB) -> pd.DataFrame:
+    if not pathlib.Path(db).exists():
+        return pd.DataFrame()
+    with closing(connect(db)) as con:
+        return pd.read_sql_query(
+            "SELECT id, recorded_at, week, season, source, status, solve_seconds, total_cbm, "
+            "total_profit, trucks_unused FROM runs ORDER BY id DESC LIMIT ?", con, params=(limit,))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=REGISTRY_DB)
+    ap.add_argument("--season", choices=["dry", "rain"], default="dry")
+    ap.add_argument("--weeks", type=int, default=12)
+    args = ap.parse_args()
+
+    trend = weekly_trend(args.season, args.weeks, args.db)
+    if trend.empty:
+        print(f"No {args.season} season runs in {args.db}")
+        return
+    print(trend.to_markdown(index=False, floatfmt=("g", "g", ",.0f", ",.0f", "g", "g", "g", ",.0f", ".2f")))
+
+
+if __name__ == "__main__":
+    main()
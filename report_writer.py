@@ -0,0 +1,135 @@
+"""
+The results workbook behind app.py's "Download All Results as Excel" button.
+
+Sheets and look are the ones app.py used to produce through
+pd.ExcelWriter + openpyxl, but the workbook is written in openpyxl's
+write-only mode: every cell is streamed once with one of a few shared
+named styles, and column widths are worked out from the DataFrames
+before any row is written, instead of walking the finished sheets.
+"""
+
+import io
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from perf import spanned
+
+ROW_HEIGHT = 72
+DEFAULT_WIDTH = 13     # openpyxl's width for columns we do not size
+MAX_WIDTH = 40
+EXTRA_WIDTH = 7        # breathing room added to every column
+ALLOCATION_MIN_WIDTHS = {'Forest': 24, 'Profit': 18, 'Efficiency (CBM/hr)': 18,
+                         'Trucks Assigned': 28, 'Total Trucks': 14}
+DAILY_COLUMNS = ["Forest", "Truck IDs", "Total Trucks"]
+
+
+def _styles():
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    centered = Alignment(wrap_text=True, horizontal='center', vertical='center')
+    header_fill = PatternFill(start_color="B7E1CD", end_color="B7E1CD", fill_type="solid")
+    stripe_fill = PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid")
+    return [
+        NamedStyle("report_header", font=Font(size=16, bold=True), fill=header_fill,
+                   border=border, alignment=centered),
+        NamedStyle("report_cell", font=Font(size=16), border=border, alignment=centered),
+        NamedStyle("report_cell_striped", font=Font(size=16), fill=stripe_fill,
+                   border=border, alignment=centered),
+        NamedStyle("report_day", font=Font(size=16, bold=True)),
+    ]
+
+
+def _text_width(values) -> int:
+    """Longest str() of the non-empty values, as openpyxl would show them."""
+    values = pd.Series(values, dtype=object)
+    values = values[values.notna() & values.astype(bool)]
+    return int(values.astype(str).str.len().max()) if len(values) else 0
+
+
+def _cells(ws, n, style):
+    """
+    n cells carrying style. A write-only sheet serialises a row as soon as
+    it is appended, so the same cells are refilled and appended row after
+    row and each style is resolved once per column, not once per cell.
+    """
+    cells = [WriteOnlyCell(ws) for _ in range(n)]
+    for cell in cells:
+        cell.style = style
+    return cells
+
+
+def _fill(cells, values):
+    for cell, value in zip(cells, values):
+        cell.value = value
+    return cells
+
+
+def _rows(frame: pd.DataFrame):
+    """Rows of frame as Python objects, with None for missing values."""
+    return frame.astype(object).where(frame.notna(), None).to_numpy().tolist()
+
+
+def _write_allocations(wb, allocations: pd.DataFrame):
+    ws = wb.create_sheet('Forest Allocations')
+    for i, name in enumerate(allocations.columns, start=1):
+        longest = max(len(str(name)), _text_width(allocations[name]))
+        width = ALLOCATION_MIN_WIDTHS.get(name, DEFAULT_WIDTH)
+        if width < longest + 4:
+            width = min(longest + 4, MAX_WIDTH)
+        ws.column_dimensions[get_column_letter(i)].width = width + EXTRA_WIDTH
+
+    n = len(allocations.columns)
+    ws.row_dimensions[1].height = ROW_HEIGHT
+    ws.append(_fill(_cells(ws, n, "report_header"), allocations.columns))
+    # zebra striping: every other data row, starting with the first
+    striped, plain = _cells(ws, n, "report_cell_striped"), _cells(ws, n, "report_cell")
+    for r, row in enumerate(_rows(allocations), start=2):
+        ws.row_dimensions[r].height = ROW_HEIGHT
+        ws.append(_fill(striped if r % 2 == 0 else plain, row))
+
+
+def _write_daily_plan(wb, grouped_daily_plan: dict):
+    ws = wb.create_sheet('Daily Forest-Truck Plan')
+    days = sorted(grouped_daily_plan)
+    tables = {day: pd.DataFrame(grouped_daily_plan[day], columns=DAILY_COLUMNS) for day in days}
+    labels = [f"Day {day}" for day in days]
+    for i, name in enumerate(DAILY_COLUMNS, start=1):
+        longest = max([len(name)] + [_text_width(t[name]) for t in tables.values()]
+                      + ([_text_width(labels)] if i == 1 else []))
+        ws.column_dimensions[get_column_letter(i)].width = min(longest + 4, MAX_WIDTH) + EXTRA_WIDTH
+
+    label_cell = _cells(ws, 1, "report_day")
+    header = _fill(_cells(ws, len(DAILY_COLUMNS), "report_header"), DAILY_COLUMNS)
+    body = _cells(ws, len(DAILY_COLUMNS), "report_cell")
+    r = 0
+
+    def append(cells):
+        nonlocal r
+        r += 1
+        ws.row_dimensions[r].height = ROW_HEIGHT
+        ws.append(cells)
+
+    for n, (day, label) in enumerate(zip(days, labels)):
+        append(_fill(label_cell, [label]))
+        append(header)
+        for row in _rows(tables[day]):
+            append(_fill(body, row))
+        if n < len(days) - 1:
+            append([])  # an empty row between days
+
+
+@spanned()
+def results_workbook(allocations: pd.DataFrame, grouped_daily_plan: dict) -> bytes:
+    """The 'Forest Allocations' and 'Daily Forest-Truck Plan' sheets as .xlsx bytes."""
+    wb = Workbook(write_only=True)
+    for style in _styles():
+        wb.add_named_style(style)
+    _write_allocations(wb, allocations)
+    _write_daily_plan(wb, grouped_daily_plan)
+    with io.BytesIO() as buffer:
+        wb.save(buffer)
+        return buffer.getvalue()
@@ -0,0 +1,249 @@
+"""
+Monte Carlo robustness of a weekly plan against turnaround-time and
+truck-availability uncertainty.
+
+Each sample scales every forest's trip_hours by a random factor (lognormal
+with mean 1, triangular or uniform around 1, with a per-forest spread if
+given) and takes each truck off the road for the whole week with
+probability 1 - availability. The plan is then evaluated for all samples at
+once as (samples x plan rows) NumPy arrays: a truck whose planned trips no
+longer fit in its drive_hours completes the same share of each of its
+trips, rounded down. Chunks of samples run in a process pool.
+
+Optionally `resolve` further samples are also re-solved from scratch
+(solve_week, "lp" backend by default) to show what re-planning recovers.
+
+    python robustness.py --season rain --samples 5000 --spread 0.25 --availability 0.95
+    python robustness.py --samples 2000 --resolve 20
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from optimiser import solve_week
+from solve_cache import cached_solve
+
+PERCENTILES = (10, 50, 90)
+
+
+@dataclass(frozen=True)
+class Uncertainty:
+    distribution: str = "lognormal"     # "lognormal", "triangular" or "uniform"
+    spread: float = 0.2                 # lognormal sigma, or half-width as a fraction of the mean
+    forest_spread: dict = field(default_factory=dict)  # forest_id -> spread
+    availability: float = 0.95          # chance a truck is on the road all week
+
+
+def turnaround_factors(u: Uncertainty, spread: np.ndarray, n: int, rng) -> np.ndarray:
+    """(n, n_forests) multipliers of trip_hours, each with mean 1."""
+    shape = (n, len(spread))
+    if u.distribution == "lognormal":
+        return rng.lognormal(-spread**2 / 2, spread, size=shape)
+    if u.distribution == "triangular":
+        return rng.triangular(1 - spread, 1, 1 + spread, size=shape)
+    if u.distribution == "uniform":
+        return rng.uniform(1 - spread, 1 + spread, size=shape)
+    raise ValueError(f"Unknown distribution {u.distribution!r}, "
+                     "use 'lognormal', 'triangular' or 'uniform'")
+
+
+def _plan_arrays(df: pd.DataFrame, plan: pd.DataFrame, u: Uncertainty) -> dict:
+    plan = plan[plan["trips_planned"] > 0]
+    rows = df.loc[pd.MultiIndex.from_frame(plan[["truck_id", "forest_id"]])]
+    forest_ids = df.index.get_level_values(1).unique()
+    truck_ids = df.index.get_level_values(0).unique()
+    drive_hours = df["drive_hours"].groupby(level=0).first().reindex(truck_ids)
+    return dict(
+        truck_ids=truck_ids.to_numpy(),
+        forest_ids=forest_ids.to_numpy(),
+        truck_row=truck_ids.get_indexer(plan["truck_id"]),
+        forest_row=forest_ids.get_indexer(plan["forest_id"]),
+        trips=plan["trips_planned"].to_numpy(dtype=float),
+        trip_hours=rows["trip_hours"].to_numpy(dtype=float),
+        cbm_per_trip=rows["cbm_per_truck"].to_numpy(dtype=float),
+        profit_per_cbm=rows["profit_per_cbm_euros"].fillna(0).to_numpy(dtype=float),
+        drive_hours=drive_hours.to_numpy(dtype=float),
+        spread=np.array([u.forest_spread.get(f, u.spread) for f in forest_ids], dtype=float),
+    )
+
+
+def _evaluate_chunk(arrays: dict, u: Uncertainty, n: int, seed) -> dict:
+    rng = np.random.default_rng(seed)
+    n_trucks, n_forests = len(arrays["truck_ids"]), len(arrays["forest_ids"])
+    factors = turnaround_factors(u, arrays["spread"], n, rng)
+    available = rng.random((n, n_trucks)) < u.availability
+
+    t, f = arrays["truck_row"], arrays["forest_row"]
+    hours = arrays["trips"] * arrays["trip_hours"] * factors[:, f]           # (n, rows)
+    needed = np.zeros((n, n_trucks))
+    np.add.at(needed.T, t, hours.T)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(needed > 0, np.minimum(1, arrays["drive_hours"] / needed), 1)
+    share *= available
+    done = np.floor(arrays["trips"] * share[:, t] + 1e-9)
+    cbm = done * arrays["cbm_per_trip"]
+
+    lost = (arrays["trips"] - done) * arrays["cbm_per_trip"]
+    forest_lost = np.zeros((n, n_forests))
+    np.add.at(forest_lost.T, f, lost.T)
+    # a truck binds when it is on the road but its trips no longer fit
+    short = available & (needed > arrays["drive_hours"] + 1e-9)
+    return dict(
+        cbm=cbm.sum(axis=1),
+        profit=(cbm * arrays["profit_per_cbm"]).sum(axis=1),
+        truck_binding=short.sum(axis=0),
+        truck_down=(~available).sum(axis=0),
+        forest_binding=(forest_lost > 0).sum(axis=0),
+        forest_lost_cbm=forest_lost.sum(axis=0),
+    )
+
+
+def _resolve_sample(df: pd.DataFrame, u: Uncertainty, seed, solver: dict) -> dict:
+    rng = np.random.default_rng(seed)
+    truck_ids = df.index.get_level_values(0).unique()
+    forest_ids = df.index.get_level_values(1).unique()
+    spread = np.array([u.forest_spread.get(f, u.spread) for f in forest_ids], dtype=float)
+    factors = turnaround_factors(u, spread, 1, rng)[0]
+    available = rng.random(len(truck_ids)) < u.availability
+
+    sample = df.copy()
+    sample["trip_hours"] *= factors[forest_ids.get_indexer(sample.index.get_level_values(1))]
+    sample["drive_hours"] *= available[truck_ids.get_indexer(sample.index.get_level_values(0))]
+    with contextlib.redirect_stdout(io.StringIO()):
+        plan = solve_week(sample, maximize_profit=True, **solver)
+    plan = plan[plan["trips_planned"] > 0]
+    rows = sample.loc[pd.MultiIndex.from_frame(plan[["truck_id", "forest_id"]])]
+    cbm = plan["trips_planned"].to_numpy() * rows["cbm_per_truck"].to_numpy()
+
+    # binding: no room for one more of its trips / one more load
+    hours_left = sample["drive_hours"].groupby(level=0).first() - (
+        plan["trips_planned"].to_numpy() * rows["trip_hours"]).groupby(level=0).sum()
+    hours_left = hours_left.reindex(truck_ids).fillna(sample["drive_hours"].groupby(level=0).first())
+    shortest_trip = sample["trip_hours"].groupby(level=0).min().reindex(truck_ids)
+    volume_left = sample["weekly_stockpile_cbm"].groupby(level=1).first() - pd.Series(
+        cbm, index=rows.index).groupby(level=1).sum()
+    volume_left = volume_left.reindex(forest_ids).fillna(sample["weekly_stockpile_cbm"].groupby(level=1).first())
+    smallest_load = sample["cbm_per_truck"].groupby(level=1).min().reindex(forest_ids)
+    return dict(
+        cbm=float(cbm.sum()),
+        profit=float((cbm * rows["profit_per_cbm_euros"].fillna(0).to_numpy()).sum()),
+        truck_binding=(available & (hours_left < shortest_trip).to_numpy()),
+        forest_binding=(volume_left < smallest_load).to_numpy(),
+    )
+
+
+def _seeds(seed, n):
+    return np.random.SeedSequence(seed).spawn(n)
+
+
+def evaluate_plan(df: pd.DataFrame, plan: pd.DataFrame, u: Uncertainty = Uncertainty(),
+                  n_samples=5000, seed=0, chunk=1000, max_workers=None) -> dict:
+    """
+    Achievable CBM / profit of plan in n_samples random weeks. Returns the
+    per-sample "cbm" and "profit" arrays plus per-truck / per-forest counts
+    of samples in which they bound (see _evaluate_chunk).
+    """
+    arrays = _plan_arrays(df, plan, u)
+    sizes = [min(chunk, n_samples - i) for i in range(0, n_samples, chunk)]
+    seeds = _seeds(seed, len(sizes))
+    max_workers = min(max_workers or os.cpu_count() or 1, len(sizes))
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            parts = list(pool.map(_evaluate_chunk, [arrays] * len(sizes), [u] * len(sizes), sizes, seeds))
+    else:
+        parts = [_evaluate_chunk(arrays, u, n, s) for n, s in zip(sizes, seeds)]
+    out = {k: np.concatenate([p[k] for p in parts]) for k in ("cbm", "profit")}
+    for k in ("truck_binding", "truck_down", "forest_binding", "forest_lost_cbm"):
+        out[k] = sum(p[k] for p in parts)
+    out.update(truck_ids=arrays["truck_ids"], forest_ids=arrays["forest_ids"], n_samples=n_samples)
+    return out
+
+
+def resolve_samples(df: pd.DataFrame, u: Uncertainty = Uncertainty(), n_samples=20, seed=0,
+                    max_workers=None, **solver) -> dict:
+    """Re-solve n_samples random weeks; solver kwargs go to solve_week (backend "lp" by default)."""
+    solver.setdefault("backend", "lp")
+    seeds = _seeds(seed, n_samples)
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(max_workers, n_samples)) as pool:
+        parts = list(pool.map(_resolve_sample, [df] * n_samples, [u] * n_samples, seeds,
+                              [solver] * n_samples))
+    return dict(
+        cbm=np.array([p["cbm"] for p in parts]),
+        profit=np.array([p["profit"] for p in parts]),
+        truck_binding=sum(p["truck_binding"].astype(int) for p in parts),
+        forest_binding=sum(p["forest_binding"].astype(int) for p in parts),
+        truck_ids=df.index.get_level_values(0).unique().to_numpy(),
+        forest_ids=df.index.get_level_values(1).unique().to_numpy(),
+        n_samples=n_samples,
+    )
+
+
+def percentile_table(results: dict) -> pd.DataFrame:
+    """P10 / P50 / P90 (and mean) CBM and profit, one row per result set."""
+    rows = []
+    for name, r in results.items():
+        row = {"mode": name, "samples": r["n_samples"]}
+        for metric in ("cbm", "profit"):
+            for p, value in zip(PERCENTILES, np.percentile(r[metric], PERCENTILES)):
+                row[f"{metric}_p{p}"] = value
+            row[f"{metric}_mean"] = r[metric].mean()
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def binding_table(r: dict, kind: str, top=10) -> pd.DataFrame:
+    """The trucks or forests that bind in the largest share of samples."""
+    ids = r[f"{kind}_ids"]
+    table = pd.DataFrame({f"{kind}_id": ids, "binding_share": r[f"{kind}_binding"] / r["n_samples"]})
+    if kind == "forest" and "forest_lost_cbm" in r:
+        table["mean_lost_cbm"] = r["forest_lost_cbm"] / r["n_samples"]
+    table = table[table["binding_share"] > 0]
+    return table.sort_values("binding_share", ascending=False).head(top).reset_index(drop=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", default="dry", choices=["dry", "rain"])
+    ap.add_argument("--forests", default="data/forests.csv")
+    ap.add_argument("--trucks", default="data/trucks.csv")
+    ap.add_argument("--samples", type=int, default=5000)
+    ap.add_argument("--resolve", type=int, default=0, help="also re-solve this many samples")
+    ap.add_argument("--distribution", default="lognormal", choices=["lognormal", "triangular", "uniform"])
+    ap.add_argument("--spread", type=float, default=0.2)
+    ap.add_argument("--availability", type=float, default=0.95)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=None, help="default: one per core")
+    args = ap.parse_args()
+
+    u = Uncertainty(args.distribution, args.spread, availability=args.availability)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, plan = cached_solve(args.forests, args.trucks, args.season, maximize_profit=True)
+
+    start = time.perf_counter()
+    results = {"plan as is": evaluate_plan(df, plan, u, args.samples, args.seed, max_workers=args.workers)}
+    print(f"Evaluated {args.samples} samples in {time.perf_counter() - start:.2f}s")
+    if args.resolve:
+        start = time.perf_counter()
+        results["re-solved"] = resolve_samples(df, u, args.resolve, args.seed, max_workers=args.workers)
+        print(f"Re-solved {args.resolve} samples in {time.perf_counter() - start:.2f}s")
+
+    planned = plan["trips_planned"].to_numpy() @ plan["cbm_per_truck"].to_numpy()
+    print(f"\nPlanned CBM: {planned:,.0f}")
+    print(percentile_table(results).to_markdown(index=False, floatfmt=",.0f"))
+    for name, r in results.items():
+        for kind in ("forest", "truck"):
+            print(f"\nMost often binding {kind}s ({name}):")
+            print(binding_table(r, kind).to_markdown(index=False, floatfmt=("g", ".2f", ".1f")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Rolling-horizon planning of a month, one week at a time.
+
+forests.csv's max_trips_month_dry / max_trips_month_rain cap the trips a
+truck may make to a forest in a month. plan_month solves week 1 with
+solve_week, commits it, then carries the state forward and re-solves the
+next week:
+
+  - stockpile: what was not collected stays at the forest, and `inflow`
+    times the forest's volume arrives again each week (1.0 = volume is
+    the weekly stockpile, as in the one-week model; 0 = a fixed stockpile
+    for the whole month)
+  - monthly caps: every pair's trips so far are subtracted from its cap and
+    what is left bounds the pair's trips (the max_trips column
+    model_arrays honours); with pace=True the remainder is also spread
+    evenly over the weeks left
+
+Each weekly model is the same size as today's, and the committed week is
+the warm start for the next.
+
+    python rolling.py --season dry --weeks 4
+    python rolling.py --season rain --weeks 5 --inflow 0.5 --pace --out month_plan.csv
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from optimiser import solve_week
+from preprocess import build_model_input
+
+
+def plan_month(forests_csv="data/forests.csv", trucks_csv="data/trucks.csv", season="dry",
+               n_weeks=4, inflow=1.0, pace=False, maximize_profit=False, **solver_kwargs):
+    """
+    Returns (plan, summary): the committed plans of all weeks with a week
+    column, and one summary row per week.
+    """
+    df = build_model_input(forests_csv, trucks_csv, season=season)
+    forest_of = df.index.get_level_values(1)
+    volume = df["weekly_stockpile_cbm"].groupby(level=1).first()
+    stockpile = volume.copy()
+    cap_column = f"max_trips_month_{season.lower()}"
+    cap = df[cap_column] if cap_column in df.columns else pd.Series(np.nan, index=df.index)
+    remaining = cap.fillna(np.inf).astype(float)
+
+    plans, summary, previous = [], [], None
+    for week in range(1, n_weeks + 1):
+        weekly = df.copy()
+        weekly["weekly_stockpile_cbm"] = stockpile.reindex(forest_of).to_numpy()
+        allowed = np.ceil(remaining / (n_weeks - week + 1)) if pace else remaining
+        weekly["max_trips"] = allowed.where(np.isfinite(allowed))
+        with contextlib.redirect_stdout(io.StringIO()):
+            plan = solve_week(weekly, maximize_profit=maximize_profit,
+                              previous_plan=previous, **solver_kwargs)
+        stats = plan.attrs["solve_stats"]
+
+        key = pd.MultiIndex.from_frame(plan[["truck_id", "forest_id"]])
+        trips = pd.Series(plan["trips_planned"].to_numpy(), index=key)
+        remaining = remaining - trips.reindex(df.index, fill_value=0)
+        collected = (trips * plan["cbm_per_truck"].to_numpy()).groupby(level=1).sum()
+        left = stockpile - collected.reindex(stockpile.index, fill_value=0)
+
+        summary.append({
+            "week": week,
+            "status": stats["status"],
+            "stockpile_cbm": stockpile.sum(),
+            "cbm": collected.sum(),
+            "trips": int(trips.sum()),
+            "trucks_used": plan["truck_id"].nunique(),
+            "carried_over_cbm": left.sum(),
+            "pairs_at_cap": int((remaining <= 0).sum()),
+            "solve_s": stats["wall_time"],
+        })
+        plans.append(plan.assign(week=week))
+        print(f"Week {week}: {collected.sum():,.0f} CBM in {int(trips.sum())} trips "
+              f"({stats['status']}, {stats['wall_time']:.2f}s), "
+              f"{left.sum():,.0f} CBM carried over")
+        stockpile = left + inflow * volume
+        previous = plan
+
+    plan = pd.concat(plans, ignore_index=True)[["week", "truck_id", "forest_id", "trips_planned", "cbm_per_truck"]]
+    return plan, pd.DataFrame(summary)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", default="dry", choices=["dry", "rain"])
+    ap.add_argument("--forests", default="data/forests.csv")
+    ap.add_argument("--trucks", default="data/trucks.csv")
+    ap.add_argument("--weeks", type=int, default=4)
+    ap.add_argument("--inflow", type=float, default=1.0,
+                    help="share of each forest's volume arriving again every week")
+    ap.add_argument("--pace", action="store_true", help="spread monthly caps evenly over the weeks")
+    ap.add_argument("--profit", action="store_true", help="maximise profit instead of CBM")
+    ap.add_argument("--backend", default="cbc", choices=["cbc", "cpsat", "lp"])
+    ap.add_argument("--out", default="month_plan.csv")
+    args = ap.parse_args()
+
+    start = time.perf_counter()
+    plan, summary = plan_month(args.forests, args.trucks, args.season, args.weeks, args.inflow,
+                               args.pace, args.profit, backend=args.backend)
+    elapsed = time.perf_counter() - start
+    print()
+    print(summary.to_markdown(index=False, floatfmt=",.1f"))
+    plan.to_csv(args.out, index=False)
+    print(f"\n✅  {args.weeks} weeks, {summary['cbm'].sum():,.0f} CBM, planned in {elapsed:.1f}s; "
+          f"plan written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+What-if scenarios over one forests / trucks pair, solved in parallel.
+
+A Scenario is a name plus declarative overrides applied to the
+build_model_input frame: season, truck hours, trucks in the workshop,
+forest volumes (absolute or extra), profit per CBM and excluded forests.
+run_scenarios solves them all in a process pool (one worker per core)
+and returns one comparison row per scenario.
+
+    python scenarios.py --scenarios data/scenarios.json --out comparison.csv
+    python scenarios.py --scenarios data/scenarios.json --out comparison.parquet
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from optimiser import solve_week
+from preprocess import build_model_input
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    season: str = "dry"
+    maximize_profit: bool = True
+    truck_hours: dict = field(default_factory=dict)      # truck_id -> drive hours this week
+    exclude_trucks: tuple = ()                           # ids or "40-55" ranges
+    volumes: dict = field(default_factory=dict)          # forest_id -> stockpile CBM
+    extra_volume: dict = field(default_factory=dict)     # forest_id -> CBM added
+    profit_per_cbm: dict = field(default_factory=dict)   # forest_id -> euros
+    exclude_forests: tuple = ()
+    solver: dict = field(default_factory=dict)           # extra solve_week arguments
+
+
+def _truck_ids(values) -> set:
+    ids = set()
+    for v in values:
+        if isinstance(v, str) and "-" in v:
+            lo, hi = (int(x) for x in v.split("-"))
+            ids.update(range(lo, hi + 1))
+        else:
+            ids.add(int(v))
+    return ids
+
+
+def load_scenarios(path) -> list:
+    """Scenarios from a JSON list of objects with Scenario's fields."""
+    with open(path) as f:
+        raw = json.load(f)
+    scenarios = []
+    for s in raw:
+        s = dict(s)
+        # JSON object keys are strings; truck ids are ints in the model
+        s["truck_hours"] = {int(k): v for k, v in s.get("truck_hours", {}).items()}
+        for key in ("exclude_trucks", "exclude_forests"):
+            s[key] = tuple(s.get(key, ()))
+        scenarios.append(Scenario(**s))
+    return scenarios
+
+
+def apply_overrides(df: pd.DataFrame, scenario: Scenario) -> pd.DataFrame:
+    """A copy of the build_model_input frame with the scenario's overrides."""
+    trucks = df.index.get_level_values(0)
+    forests = df.index.get_level_values(1)
+    unknown = (set(scenario.volumes) | set(scenario.extra_volume)
+               | set(scenario.profit_per_cbm)) - set(forests)
+    if unknown:
+        raise ValueError(f"{scenario.name}: unknown forests {sorted(unknown)}")
+
+    keep = ~trucks.isin(_truck_ids(scenario.exclude_trucks)) & ~forests.isin(scenario.exclude_forests)
+    df = df[keep].copy()
+    trucks = df.index.get_level_values(0)
+    forests = df.index.get_level_values(1)
+    if scenario.truck_hours:
+        hours = trucks.map(scenario.truck_hours)
+        df["drive_hours"] = hours.where(hours.notna(), df["drive_hours"]).astype(float)
+    if scenario.volumes:
+        volume = forests.map(scenario.volumes)
+        df["weekly_stockpile_cbm"] = volume.where(volume.notna(), df["weekly_stockpile_cbm"]).astype(float)
+    if scenario.extra_volume:
+        df["weekly_stockpile_cbm"] += forests.map(scenario.extra_volume).fillna(0).to_numpy()
+    if scenario.profit_per_cbm:
+        profit = forests.map(scenario.profit_per_cbm)
+        df["profit_per_cbm_euros"] = profit.where(profit.notna(), df["profit_per_cbm_euros"]).astype(float)
+    return df[df["weekly_stockpile_cbm"] > 0]
+
+
+def run_scenario(forests_data: bytes, trucks_data: bytes, scenario: Scenario) -> dict:
+    """Build, override and solve one scenario; the solver's prints are dropped."""
+    start = time.perf_counter()
+    df = build_model_input(io.BytesIO(forests_data), io.BytesIO(trucks_data), season=scenario.season)
+    df = apply_overrides(df, scenario)
+    with contextlib.redirect_stdout(io.StringIO()):
+        plan = solve_week(df, maximize_profit=scenario.maximize_profit, **scenario.solver)
+    stats = plan.attrs["solve_stats"]
+
+    pairs = df.loc[pd.MultiIndex.from_frame(plan[["truck_id", "forest_id"]])]
+    cbm = plan["trips_planned"].to_numpy() * plan["cbm_per_truck"].to_numpy()
+    return {
+        "scenario": scenario.name,
+        "season": scenario.season,
+        "status": stats["status"],
+        "total_cbm": float(cbm.sum()),
+        "total_profit": float((cbm * pairs["profit_per_cbm_euros"].to_numpy()).sum()),
+        "total_trips": int(plan["trips_planned"].sum()),
+        "trucks_used": int(plan["truck_id"].nunique()),
+        "trucks_available": int(df.index.get_level_values(0).nunique()),
+        "gap": stats["gap"],
+        "solve_s": stats["wall_time"],
+        "total_s": time.perf_counter() - start,
+    }
+
+
+def run_scenarios(scenarios, forests_csv="data/forests.csv", trucks_csv="data/trucks.csv",
+                  max_workers=None) -> pd.DataFrame:
+    """
+    Solve every scenario in a process pool (default one worker per core).
+    Returns one row per scenario, in input order, with CBM and profit also
+    given relative to the first scenario (the base case).
+    """
+    with open(forests_csv, "rb") as f1, open(trucks_csv, "rb") as f2:
+        forests_data, trucks_data = f1.read(), f2.read()
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(scenarios))) as pool:
+        rows = list(pool.map(run_scenario, [forests_data] * len(scenarios),
+                             [trucks_data] * len(scenarios), scenarios))
+    table = pd.DataFrame(rows)
+    base = table.iloc[0]
+    table["cbm_vs_base"] = table["total_cbm"] - base["total_cbm"]
+    table["profit_vs_base"] = table["total_profit"] - base["total_profit"]
+    return table
+
+
+def write_table(table: pd.DataFrame, path):
+    if str(path).endswith(".parquet"):
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scenarios", default="data/scenarios.json")
+    ap.add_argument("--forests", default="data/forests.csv")
+    ap.add_argument("--trucks", default="data/trucks.csv")
+    ap.add_argument("--out", default="scenario_comparison.csv", help=".csv or .parquet")
+    ap.add_argument("--workers", type=int, default=None, help="default: one per core")
+    args = ap.parse_args()
+
+    scenarios = load_scenarios(args.scenarios)
+    start = time.perf_counter()
+    table = run_scenarios(scenarios, args.forests, args.trucks, max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+    write_table(table, args.out)
+    print(table.to_markdown(index=False, floatfmt=",.2f"))
+    print(f"\n✅  {len(table)} scenarios in {elapsed:.1f}s "
+          f"(solver {table['solve_s'].sum():.1f}s of {table['total_s'].sum():.1f}s summed over scenarios), "
+          f"written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Daily trip schedule for a weekly plan.
+
+Each truck's planned trips are packed into working days of at most
+daily_hours of driving, using the real trip_hours of each trip:
+
+  - trips longer than a day run back to back on a continuous clock of
+    driving hours, so each starts in what is left of the day before it;
+    what is left of the last day can still take short trips
+  - the other trips are packed best-fit decreasing: longest first, each
+    into the open day with the least room that still fits it, or a new day
+  - if that leaves a truck driving on more days than its hours need
+    (ceil(total hours / daily_hours)), all its trips go on the clock, back
+    to back, so a week that fits in drive_hours never spills past it
+
+Days are kept in a sorted list and found by bisection, so a truck with n
+trips costs O(n log n) and a whole fleet packs in one pass over its trips.
+app.py, scratch.py and daily_plan_generator.py all schedule through
+schedule_trips.
+"""
+
+import math
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+from perf import spanned
+from preprocess import read_forests
+
+DAILY_HOURS = 10.5
+TOL = 1e-9
+
+
+def _clock_day(t, daily_hours):
+    """Hour t of a truck's driving clock -> (day, hours already driven that day)."""
+    day = math.floor(t / daily_hours + TOL)
+    return day + 1, max(0.0, t - day * daily_hours)
+
+
+def _pack(hours, daily_hours):
+    """
+    hours sorted longest first -> (day, start_hour) of each trip, where
+    start_hour is the driving hours already used on that day.
+    """
+    days, starts = [], []
+    clock = 0.0
+    n_long = int(np.sum(hours > daily_hours + TOL))  # a prefix, hours are sorted
+    for h in hours[:n_long]:
+        day, used = _clock_day(clock, daily_hours)
+        days.append(day)
+        starts.append(used)
+        clock += h
+    day, used = _clock_day(clock, daily_hours)
+    open_days = []  # (free hours, day, used hours) of days with room left
+    if used > TOL:
+        open_days.append((daily_hours - used, day, used))
+        day += 1
+    next_day = day
+    for h in hours[n_long:]:
+        i = bisect_left(open_days, (h - TOL,))
+        if i < len(open_days):
+            free, day, used = open_days.pop(i)
+        else:
+            free, day, used = daily_hours, next_day, 0.0
+            next_day += 1
+        days.append(day)
+        starts.append(used)
+        if free - h > TOL:
+            insort(open_days, (free - h, day, used + h))
+    if next_day - 1 > math.ceil(np.sum(hours) / daily_hours - TOL):
+        ends = np.cumsum(hours)
+        days, starts = map(list, zip(*(_clock_day(t, daily_hours) for t in ends - hours)))
+    return days, starts
+
+
+def _check_week(trips, trip_hours, daily_hours):
+    """Trucks whose trips fit in their drive_hours must finish within ceil(drive_hours / daily_hours) days."""
+    drive = trip_hours["drive_hours"].groupby(level=0).first()
+    per_truck = trips.groupby("truck_id").agg(hours=("trip_hours", "sum"), last_day=("end_day", "max"))
+    per_truck["drive_hours"] = per_truck.index.map(drive)
+    fits = per_truck["hours"] <= per_truck["drive_hours"] + TOL
+    spill = per_truck[fits & (per_truck["last_day"] > np.ceil(per_truck["drive_hours"] / daily_hours - TOL))]
+    if not spill.empty:
+        raise RuntimeError(f"Daily schedule runs past the week for trucks {spill.index.tolist()}")
+
+
+def forest_trip_hours(forests_csv="data/forests.csv", season="dry") -> pd.Series:
+    """trip_hours by forest_id, as build_model_input sets them for season."""
+    forests = read_forests(forests_csv)
+    column = "turn_around_time_dry" if season.lower() == "dry" else "turn_around_time_rain"
+    return forests.set_index("forest_id")[column].rename("trip_hours")
+
+
+@spanned()
+def schedule_trips(plan: pd.DataFrame, trip_hours=None, daily_hours=DAILY_HOURS) -> pd.DataFrame:
+    """
+    One row per trip of plan (truck_id, forest_id, trips_planned, ...),
+    with day (the day it starts), end_day, start_hour, trip_hours,
+    trip_number (in driving order) and total_trips_for_truck; plan's other
+    columns are carried along.
+
+    trip_hours is needed when plan has no trip_hours column: either the
+    build_model_input frame (indexed by truck_id, forest_id) or a Series
+    indexed by forest_id (see forest_trip_hours).
+    """
+    plan = plan[plan["trips_planned"] > 0]
+    if "trip_hours" not in plan.columns:
+        if trip_hours is None:
+            raise ValueError("schedule_trips needs trip_hours: pass the model input frame "
+                             "or trip hours by forest")
+        if isinstance(trip_hours, pd.DataFrame):
+            key = pd.MultiIndex.from_frame(plan[["truck_id", "forest_id"]])
+            hours = trip_hours["trip_hours"].reindex(key).to_numpy()
+        else:
+            hours = plan["forest_id"].map(trip_hours).to_numpy()
+        if np.isnan(hours).any():
+            missing = sorted(set(plan["forest_id"][np.isnan(hours)]))
+            raise ValueError(f"No trip_hours for forests {missing}")
+        plan = plan.assign(trip_hours=hours)
+
+    trips = plan.loc[plan.index.repeat(plan["trips_planned"])].drop(columns="trips_planned")
+    trips = trips.sort_values(["truck_id", "trip_hours"], ascending=[True, False], kind="stable")
+    hours = trips["trip_hours"].to_numpy(dtype=float)
+    truck = trips["truck_id"].to_numpy()
+    bounds = np.flatnonzero(np.r_[True, truck[1:] != truck[:-1], True])
+
+    day = np.empty(len(trips), dtype=int)
+    start = np.empty(len(trips))
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        day[a:b], start[a:b] = _pack(hours[a:b], daily_hours)
+
+    trips = trips.assign(
+        day=day,
+        end_day=np.maximum(day, day + np.ceil((start + hours) / daily_hours - TOL).astype(int) - 1),
+        start_hour=start,
+    ).sort_values(["truck_id", "day", "start_hour"], kind="stable")
+    if isinstance(trip_hours, pd.DataFrame) and "drive_hours" in trip_hours.columns:
+        _check_week(trips, trip_hours, daily_hours)
+    trips["trip_number"] = trips.groupby("truck_id").cumcount() + 1
+    trips["total_trips_for_truck"] = trips.groupby("truck_id")["trip_number"].transform("size")
+    first = ["day", "end_day", "truck_id", "forest_id", "trip_number", "total_trips_for_truck",
+             "start_hour", "trip_hours"]
+    return trips[first + [c for c in trips.columns if c not in first]].reset_index(drop=True)
@@ -1,8 +1,17 @@
 import argparse, pathlib
-from preprocess import build_model_input
+from preprocess import build_model_input, read_trucks
+from eligibility import DEFAULT_RULES, load_rules
 from optimiser import solve_week
+from solve_cache import cached_solve
 import pandas as pd
 import helper_maxflow
+from scheduler import schedule_trips
+from history import HISTORY_DIR, record_run
+from registry import REGISTRY_DB, register_run
+from perf import PERF_LOG, recording, set_verbose, stage_table
+
+FORESTS_CSV = "data/forests.csv"
+TRUCKS_CSV = "data/trucks.csv"
 
 
 def main():
@@ -10,22 +19,59 @@ def main():
     ap.add_argument("--season", choices=["dry", "rain"], default="dry")
     ap.add_argument("--out", default="plan.csv")
     ap.add_argument("--cost_per_cbm", type=float, default=20000.0, help="Cost per CBM (FCFA)")
+    ap.add_argument("--backend", choices=["cbc", "cpsat", "lp"], default="cbc", help="Solver backend for solve_week (lp = fast LP-and-round)")
+    ap.add_argument("--previous_plan", default=None, help="Last week's plan CSV to warm-start the solver from")
+    ap.add_argument("--aggregate", action="store_true", help="Solve per class of interchangeable trucks")
+    ap.add_argument("--time_limit", type=float, default=None, help="Solver time limit in seconds (default 5)")
+    ap.add_argument("--rel_gap", type=float, default=None, help="Stop once the plan is within this relative gap of the optimum, e.g. 0.01")
+    ap.add_argument("--abs_gap", type=float, default=None, help="Stop once the plan is within this many CBM / euros of the optimum")
+    ap.add_argument("--no_cache", action="store_true", help="Always re-solve instead of reusing a cached plan")
+    ap.add_argument("--rules", default=None, help="JSON file of truck-forest eligibility rules (default: MAN trucks <= 500 km)")
+    ap.add_argument("--history", default=HISTORY_DIR, help="Parquet history the run is appended to")
+    ap.add_argument("--registry", default=REGISTRY_DB, help="SQLite run registry the run is added to")
+    ap.add_argument("--no_history", action="store_true", help="Do not record the run in the history or the registry")
+    ap.add_argument("--quiet", action="store_true", help="Silence the solver and max-flow progress prints")
+    ap.add_argument("--perf", action="store_true", help=f"Print per-stage timings and append them to {PERF_LOG} (with --no_cache to time the solve)")
     args = ap.parse_args()
+    set_verbose(not args.quiet)
+    if not args.perf:
+        run(args)
+        return
+    with recording() as perf_log:
+        run(args)
+    perf_log.write()
+    print("\n---- Stage timings (s, MB) ----")
+    print(stage_table(perf_log).to_markdown(index=False, floatfmt=".3f"))
+
+
+def run(args):
+    rules = load_rules(args.rules) if args.rules else DEFAULT_RULES
 
-    # 1. Build the model input (all possible truck-forest assignments)
-    df = build_model_input(season=args.season)
+    # 1. Maximise profit when forests.csv has sale prices (only its header is read here)
+    forests_header = pd.read_csv(FORESTS_CSV, nrows=0).columns.str.strip().str.lower()
+    maximize_profit = "sale_price_per_cbm" in forests_header
+
+    # 2. Solve the weekly optimization problem; the cache hands back the model
+    #    input (all eligible truck-forest assignments) so a hit skips building it
+    previous_plan = pd.read_csv(args.previous_plan) if args.previous_plan else None
+    solver_kwargs = dict(backend=args.backend, aggregate=args.aggregate)
+    for name in ("time_limit", "rel_gap", "abs_gap"):
+        if getattr(args, name) is not None:
+            solver_kwargs[name] = getattr(args, name)
+    if previous_plan is not None:
+        solver_kwargs["previous_plan"] = previous_plan
+    if args.no_cache:
+        df = build_model_input(FORESTS_CSV, TRUCKS_CSV, season=args.season, rules=rules)
+        plan = solve_week(df, maximize_profit=maximize_profit, **solver_kwargs)
+    else:
+        df, plan = cached_solve(FORESTS_CSV, TRUCKS_CSV, season=args.season,
+                                maximize_profit=maximize_profit, rules=rules, **solver_kwargs)
 
-    # 2. Add profit columns if sale_price_per_cbm exists
-    if "sale_price_per_cbm" in df.columns:
+    # 3. Add profit columns if sale_price_per_cbm exists
+    if maximize_profit:
         df["cost_per_cbm"] = args.cost_per_cbm
         df["profit_per_cbm"] = df["sale_price_per_cbm"] - df["cost_per_cbm"]
         df["profit_per_trip"] = df["cbm_per_truck"] * df["profit_per_cbm"]
-        maximize_profit = True
-    else:
-        maximize_profit = False
-
-    # 3. Solve the weekly optimization problem
-    plan = solve_week(df, maximize_profit=maximize_profit)
 
     # Compute profit using profit_per_cbm_euros from forests.csv
     plan['profit'] = plan.apply(lambda row: row['trips_planned'] * df.loc[(row['truck_id'], row['forest_id']), 'cbm_per_truck'] * df.loc[(row['truck_id'], row['forest_id']), 'profit_per_cbm_euros'], axis=1)
@@ -43,6 +89,12 @@ def main():
     if maximize_profit:
         total_profit = plan['profit'].sum()
         print(f"Total Profit  : {total_profit:,.0f} FCFA")
+    telemetry = plan.attrs.get("telemetry")
+    if telemetry is not None:
+        print(f"Solver      : {telemetry.backend} {telemetry.status} ({telemetry.stop_reason}), "
+              f"gap {telemetry.gap:.2%}, {telemetry.n_vars:,} variables x {telemetry.n_constraints:,} rows "
+              f"({telemetry.n_nonzeros:,} nonzeros), built in {telemetry.build_seconds:.2f}s, "
+              f"solved in {telemetry.solve_seconds:.2f}s")
 
     # Print per-forest volume depletion
     forest_volumes = df.reset_index().drop_duplicates("forest_id").set_index("forest_id")["weekly_stockpile_cbm"]
@@ -57,10 +109,9 @@ def main():
         print(f"{forest:30} {original:10,.0f} {depleted:10,.0f} {remaining:10,.0f}")
 
     # 6. Print unassigned trucks
-    trucks = pd.read_csv("data/trucks.csv")
-    trucks["truck_id"] = trucks["truck_id"].astype(str).str.strip()
+    trucks = read_trucks(TRUCKS_CSV)
     assigned_trucks = set(plan["truck_id"].astype(str))
-    unassigned = trucks[~trucks["truck_id"].isin(assigned_trucks)]
+    unassigned = trucks[~trucks["truck_id"].astype(str).isin(assigned_trucks)]
     if not unassigned.empty:
         print("\n---- Unassigned Trucks ----")
         print(unassigned[["truck_id", "type"]].to_markdown(index=False))
@@ -68,6 +119,7 @@ def main():
         print("\nAll trucks were assigned at least one trip.")
 
     # --- Second pass: Max-flow assignment of unassigned trucks to forests with leftover volume ---
+    top_up_plan = None
     if not unassigned.empty:
         print("\n---- Second Pass: Max-flow Assignment of Unassigned Trucks ----")
         remaining_by_forest = {forest: forest_volumes[forest] - depleted_by_forest.get(forest, 0) for forest in forest_volumes.index}
@@ -91,42 +143,17 @@ def main():
                     return df.loc[key, "profit_per_trip"]
             return float('nan')  # or 0
         forests_df["profit_per_trip"] = forests_df.apply(get_profit_per_trip, axis=1)
-        extra_assignments = helper_maxflow.top_up_with_flow(idle_df, forests_df)
-        if extra_assignments:
-            rows = []
-            for a in extra_assignments:
-                key = (int(a["truck_id"]), a["forest_id"])
-                if key in df.index:
-                    cbm_per_truck = df.loc[key, "cbm_per_truck"]
-                    rows.append({
-                        "truck_id": a["truck_id"],
-                        "forest_id": a["forest_id"],
-                        "trips_planned": a["trips"],
-                        "cbm_per_truck": cbm_per_truck
-                    })
-                else:
-                    print(f"Skipping invalid assignment: {key}")
-            new_plan = pd.DataFrame(rows)
-            if not new_plan.empty:
-                print("\nAdded assignments (max-flow, full trips):")
-                print(new_plan.to_markdown(index=False))
-                print(f"Extra CBM from max-flow full trips: {new_plan['trips_planned'].mul(new_plan['cbm_per_truck']).sum():,.0f} m³")
+        # Full and half trips in one max-flow solve, sharing the leftover volume
+        assignments = helper_maxflow.top_up(idle_df, forests_df, eligible=df.index)
+        top_up_plan = pd.DataFrame(assignments, columns=helper_maxflow.TOP_UP_COLUMNS)
+        for kind, label in (("full", "full trips"), ("half", "half trips")):
+            kind_plan = top_up_plan[top_up_plan["kind"] == kind]
+            if not kind_plan.empty:
+                print(f"\nAdded assignments (max-flow, {label}):")
+                print(kind_plan.drop(columns="kind").to_markdown(index=False))
+                print(f"Extra CBM from max-flow {label}: {kind_plan['cbm_collected'].sum():,.0f} m³")
             else:
-                print("No valid assignments could be made in the second pass (max-flow, full trips).")
-        else:
-            print("No additional assignments could be made in the second pass (max-flow, full trips).")
-        # --- Now run half-trip max-flow ---
-        half_assignments = helper_maxflow.half_trip_maxflow(idle_df, forests_df)
-        if half_assignments:
-            half_plan = pd.DataFrame([
-                {"truck_id": a["truck_id"], "forest_id": a["forest_id"], "trips": a["trips"], "cbm_collected": a["cbm_collected"], "hours_used": a["hours_used"]}
-                for a in half_assignments
-            ])
-            print("\nAdded assignments (max-flow, half trips):")
-            print(half_plan.to_markdown(index=False))
-            print(f"Extra CBM from max-flow half trips: {half_plan['cbm_collected'].sum():,.0f} m³")
-        else:
-            print("No additional assignments could be made in the half-trip max-flow phase.")
+                print(f"No additional assignments could be made in the max-flow phase ({label}).")
 
     # Print summary statistics
     total_cbm = (plan["trips_planned"] * plan["cbm_per_truck"]).sum()
@@ -139,28 +166,16 @@ def main():
         total_profit = plan['profit'].sum()
         print(f"Total Profit  : {total_profit:,.0f} FCFA")
 
-    # --- Build daily schedule ---
-    daily_hours_limit = 10.5
-    plan_expanded = []
-    for _, row in plan.iterrows():
-        truck = row['truck_id']
-        forest = row['forest_id']
-        trips = int(row['trips_planned'])
-        trip_hours = df.loc[(truck, forest), 'trip_hours']
-        for trip_num in range(trips):
-            plan_expanded.append({'truck_id': truck, 'forest_id': forest, 'trip_hours': trip_hours})
-    schedule_df = pd.DataFrame(plan_expanded)
-    # Assign trips to days for each truck
-    schedule_df['day'] = 0
-    for truck, group in schedule_df.groupby('truck_id'):
-        hours_used = 0
-        day = 1
-        for idx in group.index:
-            if hours_used + group.loc[idx, 'trip_hours'] > daily_hours_limit:
-                day += 1
-                hours_used = 0
-            schedule_df.at[idx, 'day'] = day
-            hours_used += group.loc[idx, 'trip_hours']
+    # Keep the inputs, the plan and the top-ups in the weekly history
+    if not args.no_history:
+        run_id = record_run(FORESTS_CSV, TRUCKS_CSV, plan, top_up_plan,
+                            season=args.season, root=args.history)
+        register_run(FORESTS_CSV, TRUCKS_CSV, plan, args.season, "scratch", top_up_plan,
+                     run_id=run_id, db=args.registry)
+        print(f"Run {run_id} added to the history in {args.history}/ and to {args.registry}")
+
+    # --- Build daily schedule (10.5 h of driving a day, real trip hours) ---
+    schedule_df = schedule_trips(plan, df)
     # Print daily allocation
     print("\n---- Daily Truck Allocation ----")
     for day in sorted(schedule_df['day'].unique()):
@@ -0,0 +1,222 @@
+"""
+Shadow prices of the weekly model from one LP solve.
+
+The LP relaxation of the per-truck model solve_week builds (one drive-hours
+row per truck, one weekly_stockpile_cbm row per forest) is solved once with
+GLOP. From its optimal basis we read
+
+  - the dual of every row: CBM (or euros with --profit) gained per extra
+    truck-hour / per extra CBM of stockpile, and the range of drive_hours /
+    stockpile over which that price holds (right-hand-side ranging);
+  - the reduced cost of every truck-forest pair and the range its objective
+    coefficient can move in before the optimal basis changes.
+
+These are LP values: they price the relaxation, which the integer plan
+tracks closely but not exactly (a truck-hour is only worth something once
+it adds up to a whole trip). Ranging keeps the basis inverse dense, an
+m x m matrix for m = trucks + forests rows (about 290 MB at 6,000 rows);
+the constraint matrix stays sparse and the products over the pairs are
+taken a block of rows at a time, so memory does not grow with rows x pairs.
+
+    python sensitivity.py --season dry
+    python sensitivity.py --season rain --profit --top 15
+"""
+
+import argparse
+import pathlib
+import time
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+from ortools.linear_solver import pywraplp
+
+from optimiser import build_solver, model_arrays
+from preprocess import build_model_input
+
+TOL = 1e-9
+# entries of the (rows x nonzeros) blocks used for the products with A
+BLOCK = 2**22
+
+
+@dataclass
+class SensitivityReport:
+    objective: float        # LP optimum, CBM or euros
+    unit: str
+    trucks: pd.DataFrame    # one row per truck: hours, shadow price and its range
+    forests: pd.DataFrame   # one row per forest: stockpile, shadow price and its range
+    pairs: pd.DataFrame     # one row per pair: LP trips, reduced cost, objective range
+    solve_time: float
+
+
+def _ratio_limits(value, step, lower, upper):
+    """
+    Largest interval [lo, hi] of t with lower <= value + t * step <= upper,
+    column by column (value / lower / upper are vectors over the rows of
+    step).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        to_upper = np.where(step > TOL, (upper - value)[:, None] / step, np.inf)
+        to_lower = np.where(step < -TOL, (lower - value)[:, None] / step, np.inf)
+        hi = np.minimum(to_upper, to_lower).min(axis=0, initial=np.inf)
+        from_lower = np.where(step > TOL, (lower - value)[:, None] / step, -np.inf)
+        from_upper = np.where(step < -TOL, (upper - value)[:, None] / step, -np.inf)
+        lo = np.maximum(from_lower, from_upper).max(axis=0, initial=-np.inf)
+    return lo, hi
+
+
+def _times_a(model):
+    """W -> W @ A for a dense W (k x rows) and the model's sparse constraint matrix A."""
+    order = np.lexsort((model.row, model.col))
+    row, coef = model.row[order], model.coef[order]
+    cols, starts = np.unique(model.col[order], return_index=True)
+
+    def times_a(W):
+        out = np.zeros((W.shape[0], model.n_vars))
+        if len(cols):
+            out[:, cols] = np.add.reduceat(W[:, row] * coef, starts, axis=1)
+        return out
+    return times_a
+
+
+def sensitivity_report(df: pd.DataFrame, maximize_profit=False) -> SensitivityReport:
+    """One GLOP solve of the per-truck LP relaxation, then ranging on its basis."""
+    arrays = model_arrays(df, maximize_profit=maximize_profit)
+    model = arrays.to_sparse()
+    model = replace(model, integer=np.zeros(model.n_vars, dtype=bool))
+    solver = build_solver(model, "GLOP")
+    start = time.perf_counter()
+    if solver.Solve() != pywraplp.Solver.OPTIMAL:
+        raise RuntimeError("GLOP could not solve the LP relaxation")
+    solve_time = time.perf_counter() - start
+
+    variables, constraints = solver.variables(), solver.constraints()
+    n, m = model.n_vars, model.n_rows
+    x = np.array([v.solution_value() for v in variables])
+    duals = np.array([c.dual_value() for c in constraints])
+    reduced = np.array([v.reduced_cost() for v in variables])
+    duals[np.abs(duals) < TOL] = 0
+    reduced[np.abs(reduced) < TOL] = 0
+
+    # standard form [A | I] [x; s] = rhs, slack s >= 0 for every <= row; A
+    # is only ever used through its (row, col, coef) entries
+    cost = np.concatenate([model.objective, np.zeros(m)])
+    lower = np.concatenate([model.lower, np.zeros(m)])
+    upper = np.concatenate([model.upper, np.full(m, np.inf)])
+    Ax = np.bincount(model.row, weights=model.coef * x[model.col], minlength=m)
+    value = np.concatenate([x, model.rhs - Ax])
+    basic = np.array([v.basis_status() == pywraplp.Solver.BASIC for v in variables]
+                     + [c.basis_status() == pywraplp.Solver.BASIC for c in constraints])
+    if basic.sum() != m:
+        raise RuntimeError(f"GLOP returned {basic.sum()} basic columns for {m} rows")
+
+    basic_idx = np.flatnonzero(basic)
+    position = np.full(n + m, -1)
+    position[basic_idx] = np.arange(m)
+    B = np.zeros((m, m))
+    in_basis = basic[model.col]
+    np.add.at(B, (model.row[in_basis], position[model.col[in_basis]]), model.coef[in_basis])
+    slacks = basic_idx[basic_idx >= n]
+    B[slacks - n, position[slacks]] = 1.0
+    B_inv = np.linalg.inv(B)
+
+    # right-hand-side ranging: rhs_i + t moves the basic values by t * B_inv[:, i]
+    rhs_lo, rhs_hi = _ratio_limits(value[basic], B_inv, lower[basic], upper[basic])
+
+    # objective ranging of nonbasic pairs: up to the point their reduced cost flips
+    y = cost[basic] @ B_inv
+    d = cost - np.concatenate([np.bincount(model.col, weights=y[model.row] * model.coef, minlength=n), y])
+    at_upper = ~basic & (value >= upper - TOL)
+    fixed = upper - lower <= TOL
+    cost_lo = np.where(at_upper & ~fixed, -d, -np.inf)
+    cost_hi = np.where(~basic & ~at_upper & ~fixed, -d, np.inf)
+    # ... and of basic pairs: a change t to c_j moves every nonbasic d_n by -t * alpha_n
+    nonbasic = np.flatnonzero(~basic & ~fixed)
+    nb_pairs, nb_slacks = nonbasic[nonbasic < n], nonbasic[nonbasic >= n] - n
+    dn = d[nonbasic]
+    sign = np.where(at_upper[nonbasic], -1.0, 1.0)           # need sign * d_n <= 0
+    structural = np.flatnonzero(basic_idx < n)
+    times_a = _times_a(model)
+    block = max(1, BLOCK // max(len(model.coef), n, 1))
+    for rows in np.array_split(structural, -(-len(structural) // block) or 1):
+        W = B_inv[rows]
+        # alpha = B_inv @ [A | I] on the nonbasic columns, for these basic pairs
+        alpha = np.hstack([times_a(W)[:, nb_pairs], W[:, nb_slacks]])
+        step = -sign * alpha                                 # sign * d_n(t) = sign * d_n + t * step
+        lo, hi = _ratio_limits(sign * dn, step.T, np.full(len(dn), -np.inf), np.zeros(len(dn)))
+        cost_lo[basic_idx[rows]] = lo
+        cost_hi[basic_idx[rows]] = hi
+
+    n_trucks = len(arrays.truck_ids)
+    hours_used = np.bincount(arrays.truck_row, weights=arrays.trip_hours * x, minlength=n_trucks)
+    collected = np.bincount(arrays.forest_row, weights=arrays.cbm_per_truck * x,
+                            minlength=len(arrays.forest_ids))
+    unit = "EUR" if maximize_profit else "CBM"
+    t_rows, f_rows = slice(0, n_trucks), slice(n_trucks, m)
+    trucks = pd.DataFrame({
+        "truck_id": arrays.truck_ids,
+        "drive_hours": arrays.truck_hours,
+        "hours_used": hours_used,
+        f"{unit}_per_hour": duals[t_rows],
+        "valid_from_hours": arrays.truck_hours + rhs_lo[t_rows],
+        "valid_to_hours": arrays.truck_hours + rhs_hi[t_rows],
+    })
+    forests = pd.DataFrame({
+        "forest_id": arrays.forest_ids,
+        "stockpile_cbm": arrays.forest_cbm,
+        "collected_cbm": collected,
+        f"{unit}_per_cbm": duals[f_rows],
+        f"{unit}_per_100_cbm": 100 * duals[f_rows],
+        "valid_from_cbm": arrays.forest_cbm + rhs_lo[f_rows],
+        "valid_to_cbm": arrays.forest_cbm + rhs_hi[f_rows],
+    })
+    pairs = pd.DataFrame({
+        "truck_id": arrays.truck_id,
+        "forest_id": arrays.forest_id,
+        "lp_trips": x,
+        f"{unit}_per_trip": model.objective,
+        "reduced_cost": reduced,
+        "valid_from": model.objective + cost_lo[:n],
+        "valid_to": model.objective + cost_hi[:n],
+    })
+    return SensitivityReport(solver.Objective().Value(), unit, trucks, forests, pairs, solve_time)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", default="dry", choices=["dry", "rain"])
+    ap.add_argument("--forests", default="data/forests.csv")
+    ap.add_argument("--trucks", default="data/trucks.csv")
+    ap.add_argument("--profit", action="store_true", help="price in euros of profit instead of CBM")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--out", default=None, help="folder for trucks / forests / pairs CSVs")
+    args = ap.parse_args()
+
+    df = build_model_input(args.forests, args.trucks, season=args.season)
+    report = sensitivity_report(df, maximize_profit=args.profit)
+    u = report.unit
+    print(f"LP optimum: {report.objective:,.1f} {u} (GLOP {report.solve_time:.3f}s)\n")
+
+    print(f"Forests - value of 100 more CBM of stockpile ({u}):")
+    forests = report.forests.sort_values(f"{u}_per_100_cbm", ascending=False)
+    print(forests.to_markdown(index=False, floatfmt=",.1f"))
+
+    print(f"\nTrucks - value of one more drive hour ({u}), top {args.top}:")
+    trucks = report.trucks.sort_values(f"{u}_per_hour", ascending=False).head(args.top)
+    print(trucks.to_markdown(index=False, floatfmt=("g", ",.1f", ",.1f", ",.2f", ",.1f", ",.1f")))
+
+    print(f"\nUnused pairs closest to entering the plan, top {args.top}:")
+    unused = report.pairs[report.pairs["lp_trips"] <= TOL]
+    print(unused.sort_values("reduced_cost", ascending=False).head(args.top)
+          .to_markdown(index=False, floatfmt=",.2f"))
+
+    if args.out:
+        out = pathlib.Path(args.out)
+        out.mkdir(parents=True, exist_ok=True)
+        for name in ("trucks", "forests", "pairs"):
+            getattr(report, name).to_csv(out / f"sensitivity_{name}.csv", index=False)
+        print(f"\n✅  CSVs written to {out}")
+
+
+if __name__ == "__main__":
+    main()
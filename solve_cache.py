@@ -0,0 +1,182 @@
+"""
+Content-addressed cache in front of build_model_input + solve_week.
+
+The key is a hash of the normalised forests / trucks content (header case
+and stray whitespace do not matter), the season, the objective flag, the
+eligibility rules, the solver settings and CACHE_VERSION, which changes
+whenever preprocess.py, eligibility.py or optimiser.py change. Entries live in an in-memory LRU and in an on-disk
+folder that is trimmed back to max_bytes, least recently used first.
+"""
+
+import functools
+import hashlib
+import io
+import os
+import pathlib
+import pickle
+from collections import OrderedDict
+
+import pandas as pd
+
+from eligibility import DEFAULT_RULES
+from optimiser import solve_week
+from preprocess import build_model_input
+
+CACHE_FORMAT = 1
+_SOURCES = ("preprocess.py", "eligibility.py", "optimiser.py")
+
+
+def _code_version() -> str:
+    h = hashlib.sha256(str(CACHE_FORMAT).encode())
+    here = pathlib.Path(__file__).resolve().parent
+    for name in _SOURCES:
+        h.update((here / name).read_bytes())
+    return h.hexdigest()[:16]
+
+
+CACHE_VERSION = _code_version()
+
+
+def _read_bytes(csv) -> bytes:
+    """Raw bytes of a CSV given as a path, bytes or a file-like object."""
+    if isinstance(csv, bytes):
+        return csv
+    if hasattr(csv, "getvalue"):
+        return csv.getvalue()
+    if hasattr(csv, "read"):
+        csv.seek(0)
+        data = csv.read()
+        csv.seek(0)
+        return data
+    return pathlib.Path(csv).read_bytes()
+
+
+@functools.lru_cache(maxsize=64)
+def _normalised_hash(data: bytes) -> str:
+    table = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+    table.columns = table.columns.str.strip().str.lower()
+    table = table.loc[:, ~table.columns.str.startswith("unnamed")]
+    table = table.apply(lambda col: col.str.strip())
+    h = hashlib.sha256("\x1f".join(table.columns).encode())
+    h.update(pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _fingerprint(value) -> str:
+    if isinstance(value, pd.DataFrame):
+        return hashlib.sha256(
+            pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes()
+        ).hexdigest()
+    return repr(value)
+
+
+def cache_key(forests_data: bytes, trucks_data: bytes, season: str,
+              maximize_profit: bool, solver_kwargs: dict, rules=DEFAULT_RULES) -> str:
+    h = hashlib.sha256(CACHE_VERSION.encode())
+    for part in (
+        _normalised_hash(forests_data),
+        _normalised_hash(trucks_data),
+        season.lower(),
+        str(bool(maximize_profit)),
+        repr(tuple(rules)),
+        *(f"{k}={_fingerprint(v)}" for k, v in sorted(solver_kwargs.items())),
+    ):
+        h.update(part.encode())
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+class SolveCache:
+    """In-memory LRU of up to max_entries results, backed by folder on disk."""
+
+    def __init__(self, folder=".solve_cache", max_entries=32, max_bytes=256 * 2**20):
+        self.folder = pathlib.Path(folder)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+
+    def _path(self, key):
+        return self.folder / f"{key}.pkl"
+
+    def get(self, key):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)  # mark as recently used for eviction
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        self._remember(key, value)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(key).with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(self._path(key))
+        self._evict()
+
+    def clear(self):
+        self._memory.clear()
+        for path in self.folder.glob("*.pkl"):
+            path.unlink(missing_ok=True)
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        entries = sorted(self.folder.glob("*.pkl"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in entries)
+        while entries and total > self.max_bytes:
+            oldest = entries.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+
+
+_default_cache = None
+
+
+def default_cache() -> SolveCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SolveCache()
+    return _default_cache
+
+
+def cached_solve(forests_csv="data/forests.csv", trucks_csv="data/trucks.csv",
+                 season="dry", maximize_profit=False, rules=DEFAULT_RULES, cache=None,
+                 **solver_kwargs):
+    """
+    build_model_input + solve_week through the cache. The CSVs can be paths,
+    bytes or file-like objects (e.g. Streamlit uploads); rules go to
+    build_model_input and solver_kwargs to solve_week, both part of the key.
+
+    Returns (df, plan) - copies, so callers may add columns freely.
+    """
+    cache = cache or default_cache()
+    forests_data = _read_bytes(forests_csv)
+    trucks_data = _read_bytes(trucks_csv)
+    key = cache_key(forests_data, trucks_data, season, maximize_profit, solver_kwargs, rules)
+
+    hit = cache.get(key)
+    if hit is None:
+        df = build_model_input(io.BytesIO(forests_data), io.BytesIO(trucks_data),
+                               season=season, rules=rules)
+        plan = solve_week(df, maximize_profit=maximize_profit, **solver_kwargs)
+        hit = (df, plan)
+        cache.put(key, hit)
+    df, plan = hit
+    plan_copy = plan.copy()
+    plan_copy.attrs = {**plan.attrs, "cache_key": key}
+    return df.copy(), plan_copy